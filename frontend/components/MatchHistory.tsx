@@ -2,7 +2,7 @@ import { useEffect, useState, ReactElement } from 'react';
 import { useUserContext } from '../context/UserContext';
 import { fetchMatchData, fetchUsers } from '../utils/Fetch';
 import { MatchData, FetchedUserData, User } from '../utils/Interfaces';
-import { DEFAULT_AVATAR } from '../utils/constants';
+import { DEFAULT_AVATAR, AVATAR_SIZES, avatarVariant } from '../utils/constants';
 import { useRequestNewToken } from '../utils/Hooks';
 import { useTranslation } from 'react-i18next';
 
@@ -34,9 +34,9 @@ const MatchRows = ({match, users}: {match: MatchData, users: FetchedUserData[]})
             <span className='ml-3'>{localTime}</span>
             <span className='col-span-2 grid grid-cols-[max-content_auto_auto_auto_max-content] items-center justify-center gap-2'>
 				<span className='w-24 truncate'>{match.player_name ? match.player_name : match.player_username} </span> 
-				<img src={avatar1} className={`profilePicSmall !border-4 flex-shrink-0 ${match.result === 'win' ? 'border-[#2E6F40]' : match.result === 'loss' ? 'border-[#CD1C18]' : 'border-black'}`} />
+				<img src={avatarVariant(avatar1, AVATAR_SIZES.small)} className={`profilePicSmall !border-4 flex-shrink-0 ${match.result === 'win' ? 'border-[#2E6F40]' : match.result === 'loss' ? 'border-[#CD1C18]' : 'border-black'}`} />
 				<span className=''>vs</span>
-				<img src={avatar2} className={`profilePicSmall !border-4 flex-shrink-0 ${match.result === 'loss' ? 'border-[#2E6F40]' : match.result === 'win' ? 'border-[#CD1C18]' : 'border-black'}`} />
+				<img src={avatarVariant(avatar2, AVATAR_SIZES.small)} className={`profilePicSmall !border-4 flex-shrink-0 ${match.result === 'loss' ? 'border-[#2E6F40]' : match.result === 'win' ? 'border-[#CD1C18]' : 'border-black'}`} />
 				<span className={`w-24 truncate ${match.is_guest_opponent === 1 ? 'italic' : 'normal'}`}>{match.opponent_name ? match.opponent_name : match.opponent_username}</span>
 			</span>
             <span className=''>{match.player_score} - {match.opponent_score}</span>
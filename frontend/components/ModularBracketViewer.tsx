@@ -1,5 +1,5 @@
-import React, { useEffect, useMemo, useRef, useState } from 'react';
-import { Result, TournamentHistoryRow, ModularBracketViewerProps} from '../utils/Interfaces';
+import React, { useRef } from 'react';
+import { ModularBracketViewerProps } from '../utils/Interfaces';
 
 const MatchCard: React.FC<{
   player1: string | null;
@@ -17,33 +17,13 @@ const MatchCard: React.FC<{
   );
 };
 
-function groupRounds(matches: TournamentHistoryRow[], totalPlayers: number) {
-  const roundsCount = Math.round(Math.log2(totalPlayers));
-  const rounds: TournamentHistoryRow[][] = [];
-  for (let i = 0; i < roundsCount; i++) {
-    const stage = roundsCount - i;
-    const roundMatches = matches
-      .filter((m) => m.stage_number === stage)
-      .sort((a, b) => a.match_number - b.match_number);
-    rounds.push(roundMatches);
-  }
-  return rounds;
-}
-
 const ModularBracketViewer: React.FC<ModularBracketViewerProps> = ({
-  matches,
-  totalPlayers: totalPlayersProp,
+  bracket,
   roundGap = 120,
   matchGap = 28,
 }) => {
-  const inferredPlayers = useMemo(() => {
-    if (totalPlayersProp) return totalPlayersProp;
-    const maxStage = Math.max(...matches.map((m) => m.stage_number));
-    return Math.pow(2, maxStage);
-  }, [totalPlayersProp, matches]);
-
-  const totalPlayers = inferredPlayers;
-  const rounds = useMemo(() => groupRounds(matches, totalPlayers), [matches, totalPlayers]);
+  // The server sends the bracket already grouped into rounds, first round to final
+  const rounds = bracket.rounds.map((round) => round.matches);
 
   const matchRefs = useRef<Map<string, HTMLDivElement | null>>(new Map());
 
@@ -51,12 +31,7 @@ const ModularBracketViewer: React.FC<ModularBracketViewerProps> = ({
     return `${roundIndex}-${matchIndex}`;
   }
 
-  const finalMatch = rounds[rounds.length - 1]?.[0];
-  let tournamentWinner = 'TBD';
-  if (finalMatch) {
-    if (finalMatch.result === 'win') tournamentWinner = finalMatch.player_name ?? 'TBD';
-    else if (finalMatch.result === 'loss') tournamentWinner = finalMatch.opponent_name ?? 'TBD';
-  }
+  const tournamentWinner = bracket.winner ?? 'TBD';
 
   return (
     <div className="w-202 flex justify-center items-center bg-[#FFEE8C] rounded-xl -translate-x-5">
@@ -15,10 +15,12 @@ import { useTranslation } from 'react-i18next';
 import { SearchBar } from '../components/SearchBar';
 import { useRequestNewToken, useValidationField } from '../utils/Hooks';
 import { isValidUsername } from '../utils/Validation';
-import { fetchUsers } from '../utils/Fetch';
+import { searchUsers } from '../utils/Fetch';
 import { FetchedUserData } from '../utils/Interfaces';
 import { usePlayersContext } from '../context/PlayersContext';
-import { DEFAULT_AVATAR } from '../utils/constants';
+import { DEFAULT_AVATAR, AVATAR_SIZES, avatarVariant } from '../utils/constants';
+
+const SEARCH_DEBOUNCE_MS = 250;
 
 export const Navbar = () => {  
     const { user, setUser, logOut } = useUserContext();
@@ -31,17 +33,27 @@ export const Navbar = () => {
 	const location = useLocation();
 	const isGame = location.pathname.includes('/game');
     
-    // fetch users from search bar
+    // search users as the user types, once typing pauses
     useEffect(() => {
-        const fetchOtherUsers = async () => {
+        const query = searchField.value.trim();
+        if (!user || !query) {
+            setRivalData([]);
+            return ;
+        }
+        let cancelled = false;
+        const timer = setTimeout(async () => {
 			const token = await requestNewToken();
-			if (!user || !token)
+			if (!token || cancelled)
 				return ;
-            const data = await fetchUsers(token);
-            setRivalData(data);
+            const data = await searchUsers(token, query);
+            if (!cancelled)
+                setRivalData(data);
+        }, SEARCH_DEBOUNCE_MS);
+        return () => {
+            cancelled = true;
+            clearTimeout(timer);
         };
-        fetchOtherUsers();
-    }, [user])
+    }, [user, searchField.value])
 
     // change languages
     const changeLanguage = (lang: any) => {
@@ -118,7 +130,7 @@ export const Navbar = () => {
                         />
                     </div>
                 </div>
-                <Menu aria-label='profile menu' Icon={<img src={user.profilePic || DEFAULT_AVATAR} className='profilePicSmall -translate-x-1' />} elements={profileMenuItems} className='menuIcon' variant='userMenu'/>
+                <Menu aria-label='profile menu' Icon={<img src={avatarVariant(user.profilePic, AVATAR_SIZES.small) || DEFAULT_AVATAR} className='profilePicSmall -translate-x-1' />} elements={profileMenuItems} className='menuIcon' variant='userMenu'/>
             </div>
         </nav>
     );
@@ -5,7 +5,7 @@ import { useUserContext } from '../context/UserContext';
 import { useTranslation } from 'react-i18next';
 import { fetchUsers } from '../utils/Fetch';
 import { useRequestNewToken } from '../utils/Hooks';
-import { DEFAULT_AVATAR } from '../utils/constants';
+import { DEFAULT_AVATAR, AVATAR_SIZES, avatarVariant } from '../utils/constants';
 
 const calculateWinRatio = (wins: number | undefined, losses: number | undefined, games_played_against_rival: number | undefined) => {
 	if (wins === undefined || losses === undefined || games_played_against_rival === undefined)
@@ -52,7 +52,7 @@ export const RivalRow = ({ rivalData }: { rivalData: RivalData }) => {
 			<div className='grid grid-cols-12 h-12 w-full mb-2 bg-[#FFEE8C] rounded-xl items-center text-center 
 							transition ease-in-out duration-300 hover:scale-105 hover:cursor-pointer'
 					onClick={() => navigate(`/user/${rivalData.rival_username}`)}>
-				<img src={rivalPic} className='profilePicSmall'/>
+				<img src={avatarVariant(rivalPic, AVATAR_SIZES.small)} className='profilePicSmall'/>
 				<span className='col-span-2'>{rivalData.rival_username}</span>
 				<span className='col-span-2'>{rivalData.rival_elo_score}</span>
 				<span className={`col-span-2 ${winratio >= 50 ? winratio === 50 ? 'text-black' : 'text-[#2E6F40]' : 'text-[#CD1C18]'}`}>{winratio}%</span>
@@ -2,7 +2,7 @@ import { ChangeEvent, useState, useEffect, useRef } from "react";
 import { useClickOutside } from "../utils/Hooks";
 import { SearchBarInputProps } from "../utils/Interfaces";
 import { useTranslation } from 'react-i18next';
-import { DEFAULT_AVATAR } from "../utils/constants";
+import { DEFAULT_AVATAR, AVATAR_SIZES, avatarVariant } from "../utils/constants";
 
 export const SearchBar = ({
     type = "text",
@@ -57,7 +57,7 @@ export const SearchBar = ({
                                 className={'dropdown-option !py-1'}
                                 onClick={() => handleOptionClick(option.username)}
                             >
-                            {option.avatarUrl ? <img src={option.avatarUrl} className="profilePicMini" /> : <img src={DEFAULT_AVATAR} className="profilePicMini" />}
+                            {option.avatarUrl ? <img src={avatarVariant(option.avatarUrl, AVATAR_SIZES.mini)} className="profilePicMini" /> : <img src={DEFAULT_AVATAR} className="profilePicMini" />}
                             {option.username}
                             </li>
                         ))
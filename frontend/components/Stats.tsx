@@ -5,7 +5,7 @@ import { UserStats, ScoreHistory } from '../utils/Interfaces'
 import { useTranslation } from 'react-i18next';
 import { useState, useEffect } from 'react';
 import { useUserContext } from '../context/UserContext';
-import { DEFAULT_AVATAR } from '../utils/constants';
+import { DEFAULT_AVATAR, AVATAR_SIZES, avatarVariant } from '../utils/constants';
 import { fetchUsers, fetchRivalData } from '../utils/Fetch';
 import { useRequestNewToken } from '../utils/Hooks';
 import { FetchedUserData } from '../utils/Interfaces';
@@ -87,7 +87,7 @@ export const Stats = ({ userStats, scoreHistory }: { userStats: UserStats, score
             <button className='group relative flex size-25 rounded-full border-4 border-black bg-[#FFCC00] items-center justify-center}'>
               <div className='absolute text-2xl -top-12 left-1/2 -translate-x-1/2 text-black opacity-0 translate-y-2
                               group-hover:opacity-100 group-hover:translate-y-1 transition ease-in-out duration-300'>{worstRivalName}</div>
-              <img src={worstRivalPic} className='profilePic !border-0' />
+              <img src={avatarVariant(worstRivalPic, AVATAR_SIZES.big)} className='profilePic !border-0' />
             </button>
             <h4 className='h4 my-2 font-semibold'>{t('components.stats.worstRival')}</h4>
           </div>
@@ -0,0 +1,138 @@
+// Client side of the game-service protocol (services/game-service/game/protocol.js): decodes the
+// full and delta snapshots of an online match and sends this player's buttons, acknowledging
+// each snapshot so the server can send the next one as a delta against it.
+
+export const BUTTON_UP = 1;
+export const BUTTON_DOWN = 2;
+export const BUTTON_BOOST = 4;
+export const BUTTON_SHIELD = 8;
+
+export const PHASE_WAITING = 0;
+export const PHASE_SERVE = 1;
+export const PHASE_PLAY = 2;
+export const PHASE_ENDED = 3;
+
+// The 'lastHit' field: what the ball last bounced off, with HIT_BOOSTED set on a boosted return
+export const HIT_PADDLE1 = 1;
+export const HIT_PADDLE2 = 2;
+export const HIT_BOOSTED = 0x80;
+
+const SNAPSHOT_FULL = 1;
+const SNAPSHOT_DELTA = 2;
+const INPUT = 1;
+// Kept as delta bases; the server never refers further back than its own history of 32
+const HISTORY_SIZE = 32;
+
+const POSITION_SCALE = 1000;
+const VELOCITY_SCALE = 10000;
+
+// Same order as the server's FIELDS: [name, byte size, scale]
+const FIELDS = [
+  ['ballX', 2, POSITION_SCALE], ['ballZ', 2, POSITION_SCALE],
+  ['ballVx', 2, VELOCITY_SCALE], ['ballVz', 2, VELOCITY_SCALE],
+  ['paddle1Z', 2, POSITION_SCALE], ['paddle2Z', 2, POSITION_SCALE],
+  ['shield1Z', 2, POSITION_SCALE], ['shield2Z', 2, POSITION_SCALE],
+  ['score1', 1, 1], ['score2', 1, 1], ['phase', 1, 1], ['countdown', 1, 1],
+  ['shields', 1, 1], ['boostLevel', 1, 1], ['hits', 1, 1], ['lastHit', 1, 1],
+] as const;
+
+type FieldName = typeof FIELDS[number][0];
+// Positions in world units, velocities in units per 60 Hz frame, as in main.tsx
+export type Snapshot = { tick: number } & Record<FieldName, number>;
+
+export type ShieldState = { hp: number; active: boolean };
+
+// The 'shields' byte: per side 2 bits of hp and 1 bit raised
+export const unpackShields = (bits: number): [ShieldState, ShieldState] => [0, 1].map((side) => {
+  const v = bits >> (side * 3);
+  return { hp: v & 3, active: (v & 4) !== 0 };
+}) as [ShieldState, ShieldState];
+
+export type GameMessage =
+  | { type: 'welcome'; match_id: string; side: 0 | 1; players: { username: string; elo_score: number }[];
+      map: string; win_target: number; tick_rate: number; snapshot_rate: number }
+  | { type: 'paused'; username: string; reconnect_ms: number }
+  | { type: 'resumed' }
+  | { type: 'end'; reason: 'score' | 'forfeit' | 'no_show' | 'shutdown'; winner?: string; score?: [number, number] };
+
+type GameConnectionHandlers = {
+  onSnapshot: (snapshot: Snapshot) => void;
+  onMessage?: (message: GameMessage) => void;
+  onClose?: (code: number, reason: string) => void;
+};
+
+export class GameConnection {
+  private socket: WebSocket;
+  // tick -> raw field values, oldest first
+  private history = new Map<number, Int32Array>();
+  private lastTick = 0;
+  private buttons = 0;
+
+  constructor(matchId: string, token: string, private handlers: GameConnectionHandlers) {
+    const params = new URLSearchParams({ token });
+    this.socket = new WebSocket(`wss://localhost:8443/game/ws/${encodeURIComponent(matchId)}?${params}`);
+    this.socket.binaryType = 'arraybuffer';
+    this.socket.onmessage = (event) => {
+      if (typeof event.data === 'string') {
+        this.handlers.onMessage?.(JSON.parse(event.data));
+      } else {
+        this.receive(new DataView(event.data));
+      }
+    };
+    this.socket.onclose = (event) => this.handlers.onClose?.(event.code, event.reason);
+  }
+
+  // Bitmask of BUTTON_*; sent only when it changes
+  setButtons(buttons: number) {
+    if (buttons === this.buttons) return;
+    this.buttons = buttons;
+    this.send();
+  }
+
+  close() {
+    this.socket.close(1000);
+  }
+
+  private send() {
+    if (this.socket.readyState !== WebSocket.OPEN) return;
+    const message = new DataView(new ArrayBuffer(6));
+    message.setUint8(0, INPUT);
+    message.setUint8(1, this.buttons);
+    message.setUint32(2, this.lastTick, true);
+    this.socket.send(message.buffer);
+  }
+
+  private receive(view: DataView) {
+    const kind = view.getUint8(0);
+    const tick = view.getUint32(1, true);
+    let values: Int32Array;
+    let mask = 0xffff;
+    let offset = 5;
+    if (kind === SNAPSHOT_DELTA) {
+      const base = this.history.get(view.getUint32(5, true));
+      if (!base) return;
+      values = base.slice();
+      mask = view.getUint16(9, true);
+      offset = 11;
+    } else if (kind === SNAPSHOT_FULL) {
+      values = new Int32Array(FIELDS.length);
+    } else {
+      return;
+    }
+    FIELDS.forEach(([, size], i) => {
+      if (!(mask & (1 << i))) return;
+      values[i] = size === 2 ? view.getInt16(offset, true) : view.getUint8(offset);
+      offset += size;
+    });
+
+    this.history.set(tick, values);
+    if (this.history.size > HISTORY_SIZE) this.history.delete(this.history.keys().next().value!);
+    this.lastTick = tick;
+    // Acknowledge it, so the next delta can be taken against it
+    this.send();
+
+    const snapshot = { tick } as Snapshot;
+    FIELDS.forEach(([name, , scale], i) => { snapshot[name] = values[i] / scale; });
+    this.handlers.onSnapshot(snapshot);
+  }
+}
@@ -0,0 +1,206 @@
+import React, { useEffect } from 'react';
+import { Texture, Vector3, AbstractMesh, Sound } from '@babylonjs/core';
+import { spawnFlash, flashPaddle, createFireTrail, updateFireTrail, resetFireTrail } from './effects';
+import { createScene } from './sceneSetup';
+import { createObjects } from './objects';
+import { createMaterials } from './materials';
+import { updateStartPrompt } from './uiHelpers';
+import { applyMap } from './maps';
+import {
+  GameConnection, GameMessage, Snapshot, unpackShields,
+  BUTTON_UP, BUTTON_DOWN, BUTTON_BOOST, BUTTON_SHIELD, PHASE_SERVE, PHASE_PLAY,
+  HIT_PADDLE1, HIT_PADDLE2, HIT_BOOSTED,
+} from './netcode';
+
+type MapKey = 'default' | 'large' | 'obstacles';
+type KeyBinding = { up: string; down: string; boost: string, shield: string };
+
+type OnlineGameCanvasProps = {
+  canvasRef: React.RefObject<HTMLCanvasElement | null>;
+  matchId: string;
+  token: string;
+  // In the match's order: the first is paddle 1
+  playerNames: [string, string];
+  // This player's controls, whichever paddle they get
+  keyBinding: KeyBinding;
+  labels: { waiting: string; paused: (username: string) => string; wins: (winner: string) => string };
+  onMatchEnd?: (winner: string, score1: number, score2: number) => void;
+  // The connection closed before the match ended; game-service's close reason
+  onError?: (reason: string) => void;
+};
+
+// A match refereed by game-service: renders its snapshots in the scene of main.tsx and sends this
+// player's buttons. The result is submitted by game-service, not by the page.
+const OnlineGameCanvas: React.FC<OnlineGameCanvasProps> = ({
+  canvasRef,
+  matchId,
+  token,
+  playerNames: [p1Name, p2Name],
+  keyBinding,
+  labels,
+  onMatchEnd,
+  onError,
+}) => {
+  useEffect(() => {
+    if (!canvasRef.current) return;
+    const canvas = canvasRef.current;
+
+    const { engine, scene } = createScene(canvas);
+    const materials = createMaterials(scene);
+    const { warmYellow } = materials;
+    const objects = createObjects(scene, materials, { playerNames: [p1Name, p2Name], nameOffset: 3, nameScale: 1 });
+    const { ball, paddle1, paddle2 } = objects;
+    let undoMap: (() => void) | undefined;
+    const updateScore = objects.setScore;
+
+    const flareTexture = new Texture("../assets/game/flare.png", scene);
+    const flameTexture = new Texture("../assets/game/fire.jpg", scene);
+    const bounceSound = new Sound("bounceSound", "../assets/game/stone.mp3", scene, null, {
+      autoplay: false,
+      volume: 0.6,
+    });
+
+    createFireTrail(ball, scene, flameTexture);
+    updateFireTrail(0);
+    const startPrompt = document.getElementById("startPrompt") as HTMLElement;
+    startPrompt.textContent = labels.waiting;
+    updateStartPrompt(startPrompt, true);
+
+    // The two latest snapshots; the scene is drawn between them, one snapshot interval behind
+    let previous: Snapshot | null = null;
+    let latest: Snapshot | null = null;
+    let latestAt = 0;
+    let snapshotInterval = 1000 / 30;
+    let tickRate = 60;
+    let ended = false;
+
+    function placeShield(paddle: AbstractMesh, shield: AbstractMesh | undefined, z: number, active: boolean) {
+      if (!shield) return;
+      shield.isVisible = active;
+      if (!active) return;
+      const padBB = paddle.getBoundingInfo().boundingBox.extendSize;
+      const shBB = shield.getBoundingInfo().boundingBox.extendSize;
+      const centerDir = paddle.position.x > 0 ? -1 : 1;
+      shield.position.set(paddle.position.x + centerDir * (padBB.x + shBB.x + 0.05), 0, z);
+    }
+
+    function onSnapshot(snapshot: Snapshot) {
+      if (latest) {
+        if (snapshot.hits !== latest.hits) {
+          if (bounceSound.isPlaying) bounceSound.stop();
+          bounceSound.play();
+          spawnFlash(new Vector3(snapshot.ballX, 0, snapshot.ballZ), scene, warmYellow, flareTexture);
+          if (snapshot.lastHit === (HIT_PADDLE1 | HIT_BOOSTED)) flashPaddle(paddle1, scene);
+          if (snapshot.lastHit === (HIT_PADDLE2 | HIT_BOOSTED)) flashPaddle(paddle2, scene);
+        }
+        if (snapshot.boostLevel !== latest.boostLevel) {
+          if (snapshot.boostLevel === 0) resetFireTrail();
+          updateFireTrail(snapshot.boostLevel);
+        }
+        if (snapshot.score1 !== latest.score1 || snapshot.score2 !== latest.score2) {
+          updateScore?.(snapshot.score1, snapshot.score2);
+        }
+      }
+      // A new serve or phase jumps rather than sliding the ball back across the field
+      previous = latest && latest.phase === snapshot.phase && latest.score1 === snapshot.score1
+        && latest.score2 === snapshot.score2 ? latest : snapshot;
+      latest = snapshot;
+      latestAt = performance.now();
+
+      const [shield1, shield2] = unpackShields(snapshot.shields);
+      placeShield(paddle1, objects.shield1, snapshot.shield1Z, shield1.active);
+      placeShield(paddle2, objects.shield2, snapshot.shield2Z, shield2.active);
+      if (!ended) {
+        if (snapshot.phase === PHASE_SERVE) {
+          startPrompt.textContent = String(Math.ceil(snapshot.countdown / tickRate));
+        }
+        updateStartPrompt(startPrompt, snapshot.phase !== PHASE_PLAY);
+      }
+    }
+
+    function onMessage(message: GameMessage) {
+      if (message.type === 'welcome') {
+        undoMap = applyMap(message.map as MapKey, scene, materials, objects);
+        snapshotInterval = 1000 / message.snapshot_rate;
+        tickRate = message.tick_rate;
+      } else if (message.type === 'paused') {
+        startPrompt.textContent = labels.paused(message.username);
+        updateStartPrompt(startPrompt, true);
+      } else if (message.type === 'end') {
+        ended = true;
+        const [score1, score2] = message.score ?? [latest?.score1 ?? 0, latest?.score2 ?? 0];
+        const winner = message.winner ?? '';
+        startPrompt.textContent = labels.wins(winner);
+        updateStartPrompt(startPrompt, true);
+        setTimeout(() => {
+          onMatchEnd?.(winner, score1, score2);
+        }, 900);
+      }
+    }
+
+    const connection = new GameConnection(matchId, token, {
+      onSnapshot,
+      onMessage,
+      onClose: (code, reason) => {
+        if (!ended) onError?.(reason || String(code));
+      },
+    });
+
+    // Buttons held, as the BUTTON_* bitmask
+    const keysPressed = new Set<string>();
+    function sendButtons() {
+      let buttons = 0;
+      if (keysPressed.has(keyBinding.up)) buttons |= BUTTON_UP;
+      if (keysPressed.has(keyBinding.down)) buttons |= BUTTON_DOWN;
+      if (keysPressed.has(keyBinding.boost)) buttons |= BUTTON_BOOST;
+      if (keysPressed.has(keyBinding.shield)) buttons |= BUTTON_SHIELD;
+      connection.setButtons(buttons);
+    }
+    const onKeyDown = (e: KeyboardEvent) => {
+      if (e.repeat) return;
+      if (['ArrowUp','ArrowDown','ArrowLeft','ArrowRight','Space'].includes(e.code)) e.preventDefault();
+      keysPressed.add(e.code);
+      sendButtons();
+    };
+    const onKeyUp = (e: KeyboardEvent) => {
+      keysPressed.delete(e.code);
+      sendButtons();
+    };
+    window.addEventListener("keydown", onKeyDown);
+    window.addEventListener("keyup", onKeyUp);
+
+    scene.onBeforeRenderObservable.add(() => {
+      if (!latest || !previous) return;
+      const t = Math.min(1, (performance.now() - latestAt) / snapshotInterval);
+      const lerp = (a: number, b: number) => a + (b - a) * t;
+      ball.position.x = lerp(previous.ballX, latest.ballX);
+      ball.position.z = lerp(previous.ballZ, latest.ballZ);
+      ball.isVisible = latest.phase !== PHASE_SERVE;
+      paddle1.position.z = lerp(previous.paddle1Z, latest.paddle1Z);
+      paddle2.position.z = lerp(previous.paddle2Z, latest.paddle2Z);
+    });
+
+    const onResize = () => engine.resize();
+    engine.runRenderLoop(() => scene.render());
+    window.addEventListener("resize", onResize);
+    updateScore?.(0, 0);
+
+    return () => {
+      ended = true;
+      connection.close();
+      undoMap?.();
+      window.removeEventListener("keydown", onKeyDown);
+      window.removeEventListener("keyup", onKeyUp);
+      window.removeEventListener("resize", onResize);
+      scene.onBeforeRenderObservable.clear();
+      try { scene.dispose(); } catch {}
+      try { engine.dispose(); } catch {}
+      try { bounceSound.dispose(); } catch {}
+    };
+
+  }, [canvasRef, matchId, token, p1Name, p2Name, keyBinding]);
+
+  return null;
+};
+
+export default OnlineGameCanvas;
@@ -6,9 +6,11 @@ import { postMatchHistoryBulk, postTournamentHistory, TournamentPayload, StatsPa
 import KeyBindingsPanel, { KeyBindings, loadBindings, labelForCode } from './KeyBindings';
 import { useTournamentBracket, type Player } from './Tournament';
 import { useTranslation } from 'react-i18next';
-import { fetchEloScore } from '../../utils/Fetch';
+import { fetchEloScore, findOpponent } from '../../utils/Fetch';
+import { MatchmakingState } from '../../utils/Interfaces';
 
 const GameCanvas = React.lazy(() => import('../../game/main'));
+const OnlineGameCanvas = React.lazy(() => import('../../game/online'));
 
 type WinMode = 'bo5' | 'bo9' | 'bo19';
 const winTarget = (m: WinMode) => (m === 'bo5' ? 3 : m === 'bo9' ? 5 : 10);
@@ -22,6 +24,9 @@ const SPEED_MAP: Record<SpeedPreset, number> = {
 
 type MapKey = 'default' | 'large' | 'obstacles';
 
+type QueuedState = Extract<MatchmakingState, { status: 'queued' }>;
+type MatchedState = Extract<MatchmakingState, { status: 'matched' }>;
+
 function normalizePlayers(
   ps: Array<{ id?: string; username?: string; playername?: string; elo?: unknown }> = []
 ): Player[] {
@@ -125,7 +130,10 @@ export default function GamePage() {
     | 'prematch'
     | 'playing'
     | 'post'
-    | 'champion';
+    | 'champion'
+    | 'queue'
+    | 'matched'
+    | 'online';
 
   const initialPhase: Phase = isTournament ? 'prematch' : 'home';
   const [phase, setPhase] = useState<Phase>(initialPhase);
@@ -208,6 +216,65 @@ export default function GamePage() {
     }
   }, [navigate, resetPlayers, setIsTournament, user?.username]);
 
+  // Matchmaking queue: the status while waiting, then the match it found
+  const [queueState, setQueueState] = useState<QueuedState | null>(null);
+  const [queueFailed, setQueueFailed] = useState(false);
+  const [onlineMatch, setOnlineMatch] = useState<MatchedState | null>(null);
+  const [onlineToken, setOnlineToken] = useState<string | null>(null);
+  const queueAbort = useRef<AbortController | null>(null);
+
+  // Leave the queue if the page is left while waiting
+  useEffect(() => () => queueAbort.current?.abort(), []);
+
+  const handleFindOpponent = async () => {
+    const controller = new AbortController();
+    queueAbort.current = controller;
+    setQueueState(null);
+    setQueueFailed(false);
+    setPhase('queue');
+
+    const token = await getFreshToken();
+    const match = await findOpponent(token ?? null, controller.signal, setQueueState);
+    if (controller.signal.aborted) return;
+    queueAbort.current = null;
+    if (match?.status === 'matched') {
+      setOnlineMatch(match);
+      setPhase('matched');
+    } else {
+      setQueueFailed(true);
+      setPhase('home');
+    }
+  };
+
+  const cancelQueue = () => {
+    queueAbort.current?.abort();
+    queueAbort.current = null;
+    setPhase('home');
+  };
+
+  // The match is played on game-service, which also submits its result
+  const handlePlayOnline = async () => {
+    const token = await getFreshToken();
+    if (!token) {
+      setQueueFailed(true);
+      setPhase('home');
+      return;
+    }
+    setOnlineToken(token);
+    setPhase('online');
+  };
+
+  const handleOnlineEnd = (winner: string, s1: number, s2: number) => {
+    setPostResult({ winner, s1, s2 });
+    setPhase('post');
+  };
+
+  const handleOnlineError = (reason: string) => {
+    console.error('Game connection closed:', reason);
+    setQueueFailed(true);
+    setPhase('home');
+  };
+
   // Reset champion if new tournament
   useEffect(() => {
     if (isTournament) setChampion(null);
@@ -445,17 +512,75 @@ export default function GamePage() {
                 >
                   {t('game.startMatch')}
                 </button>
+                {user?.username && (
+                  <button
+                    onClick={handleFindOpponent}
+                    className="block mx-auto px-4 py-3 rounded-xl bg-emerald-600 hover:bg-emerald-500"
+                  >
+                    {t('game.queue.findOpponent')}
+                  </button>
+                )}
                 <button
                   onClick={openOptions}
                   className="block mx-auto px-4 py-3 rounded-xl bg-neutral-800 hover:bg-neutral-700"
                 >
                   {t('game.optionsButton')}
                 </button>
+                {queueFailed && (
+                  <div className="text-sm text-red-400">{t('game.queue.failed')}</div>
+                )}
               </div>
             </div>
           </div>
         )}
 
+      {/* Matchmaking queue */}
+      {!isTournament && phase === 'queue' && (
+        <div className="relative w-full pb-[56.25%] bg-yellow-200 p-3 rounded-3xl overflow-hidden">
+          <div className="absolute inset-0 flex items-center justify-center bg-neutral-900/90 text-neutral-100">
+            <div className="w-full max-w-md p-6 text-center space-y-4">
+              <h2 className="text-2xl font-bold mb-2">{t('game.queue.searching')}</h2>
+              {queueState && (
+                <div className="text-sm opacity-80">
+                  {t('game.queue.status', {
+                    elo: queueState.elo_score,
+                    window: queueState.window,
+                    size: queueState.queue_size,
+                    waited: formatHMS(queueState.waited_ms / 1000),
+                  })}
+                </div>
+              )}
+              <button
+                onClick={cancelQueue}
+                className="block mx-auto px-4 py-3 rounded-xl bg-neutral-800 hover:bg-neutral-700"
+              >
+                {t('game.cancel')}
+              </button>
+            </div>
+          </div>
+        </div>
+      )}
+
+      {/* Opponent found by the queue */}
+      {!isTournament && phase === 'matched' && onlineMatch && (
+        <div className="relative w-full pb-[56.25%] bg-yellow-200 p-3 rounded-3xl overflow-hidden">
+          <div className="absolute inset-0 flex items-center justify-center bg-neutral-900/90 text-neutral-100">
+            <div className="w-full max-w-md p-6 text-center">
+              <h2 className="text-2xl font-bold mb-6">{t('game.queue.found')}</h2>
+              <div className="text-xl font-semibold mb-6">
+                {onlineMatch.players.map(p => `${p.username} (${p.elo_score})`).join(` ${t('game.tournament.vs')} `)}
+              </div>
+              <button
+                onClick={handlePlayOnline}
+                className="block mx-auto px-4 py-2 rounded-xl bg-emerald-600 hover:bg-emerald-500"
+              >
+                {t('game.startMatch')}
+              </button>
+            </div>
+          </div>
+        </div>
+      )}
+
       {/* Match Options */}
       {!isTournament && phase === 'options' && (
         <div className="relative w-full pb-[56.25%] bg-yellow-200 p-3 rounded-3xl overflow-hidden">
@@ -608,20 +733,37 @@ export default function GamePage() {
         )}
 
         {/* Game Container */}
-        {(phase === 'playing') && (
+        {(phase === 'playing' || (phase === 'online' && onlineMatch && onlineToken)) && (
           <div className="relative w-full pb-[56.25%] bg-yellow-200 p-3 rounded-3xl overflow-hidden">
             <Suspense fallback={<div className="absolute inset-0 grid place-items-center">{t('game.loading')}</div>}>
-              <GameCanvas
-                canvasRef={canvasRef}
-                playerNames={[p1Name, p2Name]}
-                isTournament={isTournament}
-                baseSpeed={baseSpeed}
-                winMode={winMode}
-                winTarget={target}
-                onMatchEnd={handleMatchEnd}
-                mapKey={mapKey}
-                keyBindings={bindings}
-              />
+              {phase === 'online' && onlineMatch && onlineToken ? (
+                <OnlineGameCanvas
+                  canvasRef={canvasRef}
+                  matchId={onlineMatch.match_id}
+                  token={onlineToken}
+                  playerNames={[onlineMatch.players[0].username, onlineMatch.players[1].username]}
+                  keyBinding={bindings.p1}
+                  labels={{
+                    waiting: t('game.queue.waiting'),
+                    paused: (username) => t('game.queue.reconnecting', { username }),
+                    wins: (winner) => t('game.queue.wins', { winner }),
+                  }}
+                  onMatchEnd={handleOnlineEnd}
+                  onError={handleOnlineError}
+                />
+              ) : (
+                <GameCanvas
+                  canvasRef={canvasRef}
+                  playerNames={[p1Name, p2Name]}
+                  isTournament={isTournament}
+                  baseSpeed={baseSpeed}
+                  winMode={winMode}
+                  winTarget={target}
+                  onMatchEnd={handleMatchEnd}
+                  mapKey={mapKey}
+                  keyBindings={bindings}
+                />
+              )}
             </Suspense>
 
             {/* Babylon.js Canvas */}
@@ -35,7 +35,8 @@ export async function postMatchHistoryBulk(
   matches: StatsPayload[],
   token?: string
 ) {
-  const res = await fetch(`${API_BASE}/stats/match_history/update_all`, {
+  // wait: answer once Elo and counters include these matches, so the profile shows them right away
+  const res = await fetch(`${API_BASE}/stats/match_history/update_all?wait=true`, {
     method: "POST",
     headers: authHeaders(token),
     body: JSON.stringify({ matches }),
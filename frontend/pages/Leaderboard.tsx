@@ -6,58 +6,38 @@ import { AccessiblePageDescription } from '../components/AccessiblePageDescripti
 import { useUserContext } from '../context/UserContext';
 import { useNavigate } from 'react-router-dom';
 import MedalIcon from '../assets/icons/medal-icon-empty.svg?react';
-import { LeaderboardStats, FetchedUserData } from '../utils/Interfaces';
-import { fetchUsers, fetchUserStats } from '../utils/Fetch';
-import { DEFAULT_AVATAR } from '../utils/constants';
-import { useRequestNewToken } from '../utils/Hooks';
+import { LeaderboardEntry } from '../utils/Interfaces';
+import { fetchLeaderboard } from '../utils/Fetch';
+import { DEFAULT_AVATAR, AVATAR_SIZES, avatarVariant } from '../utils/constants';
+
+const LEADERBOARD_SIZE = 10;
 
 const LeaderboardPage = () => {
 	const { t, i18n } = useTranslation();
 	const navigate = useNavigate();
 	const { user } = useUserContext();
 	const [loading, setLoading] = useState(true);
-	const [leaderboardData, setLeaderboardData] = useState<LeaderboardStats[]>([]);
-	const requestNewToken = useRequestNewToken();
+	const [trimmedLeaderboardData, setTrimmedLeaderboardData] = useState<LeaderboardEntry[]>([]);
+	const [currentUser, setCurrentUser] = useState<LeaderboardEntry | null>(null);
 
 	useEffect(() => {
 		const getLeaderboard = async () => {
 			setLoading(true);
-			try {
-				const token = await requestNewToken();
-				if (!user || !token)
-					return ;
-				const users: FetchedUserData[] = await fetchUsers(token);
-				const leaderboard: (LeaderboardStats | null)[] = await Promise.all (
-					users.map(async u => {
-						const userStats = await fetchUserStats(u.username);
-						if (userStats?.games_played && userStats?.games_played > 0)
-						{
-							const leaderboardEntry: LeaderboardStats = {
-								userInfo: u,
-								stats: userStats,
-							}
-							return leaderboardEntry;
-						}
-						else
-							return null;
-					}
-				))
-				if (leaderboard)
-				{
-					const filteredLeaderboard = leaderboard.filter((entry): entry is LeaderboardStats => entry !== null);
-					setLeaderboardData(filteredLeaderboard);
-				}
-			}
-			catch(error) {
-				console.error('Error: ', error);
-				return null;
+			if (!user)
+				return ;
+			// top 10 and the current user's own row, ranked by stats-service
+			const leaderboard = await fetchLeaderboard(LEADERBOARD_SIZE, user.username);
+			if (leaderboard)
+			{
+				setTrimmedLeaderboardData(leaderboard.top);
+				setCurrentUser(leaderboard.around[0] ?? null);
 			}
 			setLoading(false);
 		}
 		getLeaderboard();
 	}, [])
 
-	if (!leaderboardData || leaderboardData.length == 0)
+	if (!trimmedLeaderboardData || trimmedLeaderboardData.length == 0)
     	return (
 			<>
 				<h1 id="pageTitle" className="h1 font-semibold text-center">{t('pages.leaderboard.title')}</h1>
@@ -65,9 +45,6 @@ const LeaderboardPage = () => {
 			</>
 		);
 
-  	const sortedLeaderboardData = leaderboardData.sort((a, b) => b.stats.elo_score - a.stats.elo_score) // sort by score descending
-    const trimmedLeaderboardData = 	sortedLeaderboardData.slice(0, 10); // limit to top 10
-
 	if (loading)
 		return <div className='flex justify-center'>{t('pages.leaderboard.loadingLeaderboard')}</div>;
 
@@ -87,7 +64,7 @@ const LeaderboardPage = () => {
         {t('pages.leaderboard.title')}
       </h1>
 
-      {leaderboardData.length > 0 && (
+      {trimmedLeaderboardData.length > 0 && (
         <div
           aria-label={t('pages.leaderboard.aria.table')}
           className="grid grid-cols-8 text-center font-medium min-w-md translate-y-2"
@@ -116,15 +93,15 @@ const LeaderboardPage = () => {
             </li>
           ) : (
             trimmedLeaderboardData.map((player, idx) => {
-              const isCurrentUser = player.userInfo.username === user?.username;
+              const isCurrentUser = player.player_username === user?.username;
               return (
               <li
-                key={player.userInfo.username}
-                onClick={() => navigate(`/user/${player.userInfo.username}`)}
+                key={player.player_username}
+                onClick={() => navigate(`/user/${player.player_username}`)}
                 className={`grid grid-cols-8 min-w-md items-center text-center rounded-xl h-12 mb-2 
 					${isCurrentUser ? 'bg-[#FDFBD4] ring-2' : 'bg-[#FFEE8C]'
                 } hover:cursor-pointer hover:scale-105 transform transition ease-in-out duration-300`}
-                aria-label={`Player ${player.userInfo.username} at position ${idx + 1}`}
+                aria-label={`Player ${player.player_username} at position ${player.rank}`}
               >
                 <span className="relative flex justify-center items-center w-8 h-8 mx-auto col-span-1">
 					{(idx === 0 || idx === 1 || idx === 2) && (
@@ -137,52 +114,45 @@ const LeaderboardPage = () => {
 							</span>
 						</>
 					)}
-					<span className="z-10">{idx + 1}</span>
+					<span className="z-10">{player.rank}</span>
                 </span>
                 <span className='flex justify-center col-span-1'>
 					<img
-						src={player.userInfo.avatarUrl || DEFAULT_AVATAR}
-						alt={`${player.userInfo.username}'s profile picture`}
+						src={avatarVariant(player.avatarUrl, AVATAR_SIZES.small) || DEFAULT_AVATAR}
+						alt={`${player.player_username}'s profile picture`}
 						className="h-11 w-11 rounded-full object-cover border-2"
 					/>
 				</span>
-                <span className="truncate col-span-2">{player.userInfo.username}</span>
-                <span className='col-span-2'>{player.stats.games_played}</span>
-                <span className="font-bold col-span-2 text-lg">{player.stats.elo_score}</span>
+                <span className="truncate col-span-2">{player.player_username}</span>
+                <span className='col-span-2'>{player.games_played}</span>
+                <span className="font-bold col-span-2 text-lg">{player.elo_score}</span>
               </li>
               );
             })
           )}
 
-          {!trimmedLeaderboardData.some((p) => p.userInfo.username === user?.username) && (() => {
-            const currentUser = leaderboardData.find((p) => p.userInfo.username === user?.username);
-            if (!currentUser)
-				return null;
-            const currentUserIndex = leaderboardData
-              .sort((a, b) => b.stats.elo_score - a.stats.elo_score)
-              .findIndex((p) => p.userInfo.username === user?.username);
-
+          {currentUser && !trimmedLeaderboardData.some((p) => p.player_username === currentUser.player_username) && (() => {
             return (
               <>
                 <div className="text-center text-xl text-black my-4" aria-hidden="true">
                   . . .
                 </div>
                 <li
-                  onClick={() => navigate(`/user/${currentUser.userInfo.username}`)}
+                  onClick={() => navigate(`/user/${currentUser.player_username}`)}
                   className="grid grid-cols-8 gap-x-2 items-center text-center rounded-xl h-12 mb-2 bg-[#FDFBD4] border-2 hover:cursor-pointer hover:scale-105 transform transition ease-in-out duration-300"
-                  aria-label={`Current user ${currentUser.userInfo.username} at position ${currentUserIndex + 1}`}
+                  aria-label={`Current user ${currentUser.player_username} at position ${currentUser.rank}`}
                 >
-                  <span className='col-span-1'>{currentUserIndex + 1}</span>
+                  <span className='col-span-1'>{currentUser.rank}</span>
                   <span className='col-span-1 flex justify-center'>
 					<img
-						src={currentUser.userInfo.avatarUrl || DEFAULT_AVATAR}
-						alt={`${currentUser.userInfo.username}'s profile picture`}
+						src={avatarVariant(currentUser.avatarUrl, AVATAR_SIZES.small) || DEFAULT_AVATAR}
+						alt={`${currentUser.player_username}'s profile picture`}
 						className="h-11 w-11 rounded-full object-cover border-2"
                   	/>
 				  </span>
-                  <span className="truncate col-span-2">{currentUser.userInfo.username}</span>
-                  <span className='col-span-2'>{currentUser.stats.games_played}</span>
-                  <span className="font-bold col-span-2 text-lg">{currentUser.stats.elo_score}</span>
+                  <span className="truncate col-span-2">{currentUser.player_username}</span>
+                  <span className='col-span-2'>{currentUser.games_played}</span>
+                  <span className="font-bold col-span-2 text-lg">{currentUser.elo_score}</span>
                 </li>
               </>
             );
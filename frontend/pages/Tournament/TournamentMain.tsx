@@ -8,22 +8,16 @@ import { GenericButton } from '../../components/GenericButton';
 import DownArrow from '../../assets/icons/symbols/arrow-down-icon.svg?react';
 import ModularBracketViewer from '../../components/ModularBracketViewer';
 import { useUserContext } from '../../context/UserContext';
-import { Result, TournamentHistoryRow, UITournament } from '../../utils/Interfaces';
-
-const API_BASE = 'https://localhost:8443';
-
-async function fetchAllTournamentHistory(): Promise<TournamentHistoryRow[]> {
-  const res = await fetch(`${API_BASE}/tournament_history`, { credentials: 'include' });
-  if (!res.ok) throw new Error(`GET /tournament_history ${res.status}`);
-  return res.json();
-}
+import { TournamentBracket, TournamentSummary } from '../../utils/Interfaces';
+import { fetchTournamentBracket, fetchTournamentSummaries } from '../../utils/Fetch';
 
 export default function TournamentsPage() {
   const { t } = useTranslation();
   const navigate = useNavigate();
   const { user } = useUserContext();
 
-  const [rows, setRows] = useState<TournamentHistoryRow[] | null>(null);
+  const [summaries, setSummaries] = useState<TournamentSummary[] | null>(null);
+  const [brackets, setBrackets] = useState<Record<string, TournamentBracket>>({});
   const [error, setError] = useState<string | null>(null);
   const [expandedId, setExpandedId] = useState<string | null>(null);
   const [visibleTournamentsCount, setVisibleTournamentsCount] = useState(5);
@@ -32,8 +26,8 @@ export default function TournamentsPage() {
     let cancelled = false;
     (async () => {
       try {
-        const data = await fetchAllTournamentHistory();
-        if (!cancelled) setRows(data);
+        const data = await fetchTournamentSummaries();
+        if (!cancelled) setSummaries(data);
       } catch (e: any) {
         if (!cancelled) setError(e?.message ?? 'Failed to load tournament history');
       }
@@ -41,6 +35,21 @@ export default function TournamentsPage() {
     return () => { cancelled = true; };
   }, []);
 
+  // Matches are only downloaded for the tournament that is opened, once
+  useEffect(() => {
+    if (!expandedId || brackets[expandedId]) return;
+    let cancelled = false;
+    (async () => {
+      try {
+        const bracket = await fetchTournamentBracket(expandedId);
+        if (!cancelled) setBrackets((prev) => ({ ...prev, [bracket.tournament_id]: bracket }));
+      } catch (e: any) {
+        if (!cancelled) setError(e?.message ?? 'Failed to load tournament bracket');
+      }
+    })();
+    return () => { cancelled = true; };
+  }, [expandedId]);
+
   if (error) {
     return (
       <main className="pageLayout">
@@ -48,7 +57,7 @@ export default function TournamentsPage() {
       </main>
     );
   }
-  if (rows === null) {
+  if (summaries === null) {
     return (
       <main className="pageLayout">
         <p>{t('common.loading') || 'Loading…'}</p>
@@ -56,42 +65,13 @@ export default function TournamentsPage() {
     );
   }
 
-  const grouped: Record<string, TournamentHistoryRow[]> = (Object as any).groupBy
-    ? (Object as any).groupBy(rows, (r: TournamentHistoryRow) => r.tournament_id)
-    : rows.reduce((acc, r) => {
-        (acc[r.tournament_id] ||= []).push(r);
-        return acc;
-      }, {} as Record<string, TournamentHistoryRow[]>);
-
-  const tournaments: UITournament[] = Object.entries(grouped).map(([id, matches]) => {
-    const sorted = [...matches].sort((a, b) => {
-      if (a.stage_number !== b.stage_number) return a.stage_number - b.stage_number; // 1..N
-      if (a.match_number !== b.match_number) return a.match_number - b.match_number; // 1..M
-      return new Date(a.played_at).getTime() - new Date(b.played_at).getTime();
-    });
-
-    const lastPlayed = sorted[sorted.length - 1]?.played_at ?? sorted[0]?.played_at;
-    const date = lastPlayed ? new Date(lastPlayed).toLocaleDateString(undefined) : '-';
-
-    const maxStage = sorted.reduce((m, r) => Math.max(m, r.stage_number ?? 1), 1);
-    const totalPlayers = Math.pow(2, maxStage);
-
-    // Compute winner from the final
-    const finalRow = sorted.find(r => r.stage_number === 1 && r.match_number === 1);
-    let winner: string | null = null;
-    if (finalRow) {
-      if (finalRow.result === 'win') winner = finalRow.player_name;
-      else if (finalRow.result === 'loss') winner = finalRow.opponent_name;
-      else winner = null;
-    }
-
-    return { id, date, totalPlayers, winner, matches: sorted };
-  })
-  .sort((a, b) => {
-    const ta = Date.parse(a.date) || 0;
-    const tb = Date.parse(b.date) || 0;
-    return tb - ta;
-  });
+  // Already newest first from the server
+  const tournaments = summaries.map((summary) => ({
+    id: summary.tournament_id,
+    date: summary.last_played_at ? new Date(summary.last_played_at).toLocaleDateString(undefined) : '-',
+    totalPlayers: summary.total_players,
+    winner: summary.winner,
+  }));
 
   //if no tournaments, return without category names
 
@@ -162,10 +142,9 @@ export default function TournamentsPage() {
 
                 {isExpanded && (
                   <li className="mt-2">
-                    <ModularBracketViewer
-                      matches={tournament.matches}
-                      totalPlayers={tournament.totalPlayers}
-                    />
+                    {brackets[tournament.id]
+                      ? <ModularBracketViewer bracket={brackets[tournament.id]} />
+                      : <p>{t('common.loading') || 'Loading…'}</p>}
                   </li>
                 )}
               </React.Fragment>
@@ -12,8 +12,8 @@ import { useValidationField } from '../../utils/Hooks';
 import { isValidTitle } from '../../utils/Validation';
 import { useUserContext } from '../../context/UserContext';
 import { usePlayersContext } from '../../context/PlayersContext';
-import { TournamentHistoryRow } from '../../utils/Interfaces';
-import { fetchAllTournamentHistory } from '../../utils/Fetch';
+import { TournamentSummary } from '../../utils/Interfaces';
+import { fetchTournamentSummaries } from '../../utils/Fetch';
 
 const dicebearUrl = (seed: string) =>
   `https://api.dicebear.com/6.x/initials/png?seed=${encodeURIComponent(seed)}&backgroundColor=ffee8c&textColor=000000`;
@@ -42,7 +42,7 @@ const NewTournamentPage: React.FC = () => {
 	useEffect(() => {
 		const loadOldTournaments = (async () => {
 		  try {
-			const data: TournamentHistoryRow[] = await fetchAllTournamentHistory();
+			const data: TournamentSummary[] = await fetchTournamentSummaries();
 			if (data) 
 			{
 				const tournamentNames: string[] = data.map((t) => t.tournament_id);
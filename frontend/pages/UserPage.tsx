@@ -12,7 +12,7 @@ import TournamentIcon from '../assets/icons/tournament-icon.svg';
 import RivalsIcon from '../assets/icons/rivals-icon.svg';
 import LeaderboardIcon from '../assets/icons/leaderboard-icon-v2.svg';
 import DownArrow from '../assets/icons/symbols/arrow-down-icon.svg?react';
-import { DEFAULT_AVATAR } from '../utils/constants';
+import { DEFAULT_AVATAR, AVATAR_SIZES, avatarVariant } from '../utils/constants';
 import { useTranslation } from 'react-i18next';
 
 const UserPage = () => {
@@ -97,7 +97,7 @@ const UserPage = () => {
 
 		<div className='profilePicBig'>
 			{profilePicURL ? 
-				<img src={profilePicURL} className='profilePic'/> : <img src={DEFAULT_AVATAR} className='w-full h-full object-cover'/>}
+				<img src={avatarVariant(profilePicURL, AVATAR_SIZES.big)} className='profilePic'/> : <img src={DEFAULT_AVATAR} className='w-full h-full object-cover'/>}
 		</div>
 
 		<div className='w-80 truncate'>
@@ -12,7 +12,10 @@ import {
 	RegisteredPlayerData,
 	Players,
 	ProfileMeResponse,
-	TournamentHistoryRow
+	TournamentSummary,
+	TournamentBracket,
+	LeaderboardResponse,
+	MatchmakingState
 	} from "../utils/Interfaces";
 
 export const createUser = async (player: UserProfileData): Promise<UserProfileData | null> => {
@@ -287,9 +290,10 @@ export const removeRival = async (rivalName: string, token: string | null) => {
 	}
 };
 
-export const fetchScoreHistory = async (username: string): Promise<ScoreHistory[] | null>  => {
+// The graph is a few hundred pixels wide, so ask for a downsampled series instead of every point
+export const fetchScoreHistory = async (username: string, points = 300): Promise<ScoreHistory[] | null>  => {
 	try {
-		const response = await fetch(`https://localhost:8443/stats/score_history/username/${username}`, {
+		const response = await fetch(`https://localhost:8443/stats/score_history/username/${username}?points=${points}`, {
 			method: 'GET'
 		});
 
@@ -330,6 +334,30 @@ export const fetchUserStats = async (username: string): Promise<UserStats | null
 	}
 };
 
+// The response carries an ETag, so the browser revalidates repeat loads and gets 304s
+// until the leaderboard actually changes.
+export const fetchLeaderboard = async (limit: number, username?: string): Promise<LeaderboardResponse | null> => {
+	try {
+		const params = new URLSearchParams({ limit: String(limit) });
+		if (username)
+			params.set('around', username);
+		const response = await fetch(`https://localhost:8443/stats/leaderboard?${params}`, {
+		    method: 'GET'
+		});
+
+		if (!response.ok)
+			throw new Error(`HTTP error! Status: ${response.status}`);
+
+		const leaderboard: LeaderboardResponse = await response.json();
+		return leaderboard;
+	}
+
+	catch (error) {
+		console.error('Error: ', error);
+		return null;
+	}
+};
+
 export const fetchMatchData = async (username: string): Promise<MatchData [] | null> => {
     try {
         const response = await fetch(`https://localhost:8443/stats/match_history/username/${username}`, {
@@ -381,6 +409,79 @@ export const fetchUsers = async (token: string | null) => {
 	}
 };
 
+export const searchUsers = async (token: string | null, query: string, limit = 10) => {
+	if (!token)
+		return [];
+
+	try {
+		const params = new URLSearchParams({ q: query, limit: String(limit) });
+		const response = await fetch(`https://localhost:8443/as/users/search?${params}`, {
+			method: 'GET',
+			headers: {
+				'Content-Type': 'application/json',
+				"Authorization": `Bearer ${token}`,
+			},
+		});
+
+		if (!response.ok) {
+			throw new Error(`HTTP error! Status: ${response.status}`);
+		}
+
+		const result = await response.json();
+		return result.users;
+	}
+
+	catch (error) {
+		console.error('Error:', error);
+		return [];
+	}
+};
+
+const matchmakingRequest = async (token: string, method: string, signal?: AbortSignal): Promise<MatchmakingState | null> => {
+	const response = await fetch("https://localhost:8443/stats/matchmaking/queue", {
+		method,
+		headers: {
+			"Authorization": `Bearer ${token}`,
+		},
+		signal,
+	});
+	if (!response.ok) {
+		throw new Error(`HTTP error! Status: ${response.status}`);
+	}
+	return method === 'DELETE' ? null : response.json();
+};
+
+// Joins the Elo matchmaking queue and long-polls until an opponent is found. Resolves to the
+// match, or null if it fails or `signal` is aborted, in which case the player leaves the queue.
+// `onQueued` gets the queue status each time a poll returns unmatched.
+export const findOpponent = async (
+	token: string | null,
+	signal?: AbortSignal,
+	onQueued?: (state: Extract<MatchmakingState, { status: 'queued' }>) => void
+) => {
+	if (!token)
+		return null;
+
+	try {
+		let state = await matchmakingRequest(token, 'POST', signal);
+		// Each GET is held open by the server until matched or ~25s have passed
+		while (state?.status === 'queued') {
+			onQueued?.(state);
+			state = await matchmakingRequest(token, 'GET', signal);
+		}
+		return state?.status === 'matched' ? state : null;
+	}
+
+	catch (error) {
+		if (signal?.aborted) {
+			await matchmakingRequest(token, 'DELETE').catch(() => null);
+		} else {
+			console.error('Error:', error);
+		}
+		return null;
+	}
+};
+
 export const verify2FA = async (tokenCode: string, accessToken: string) => {
   try {
     const response = await fetch("https://localhost:8443/as/2fa/verify", {
@@ -703,9 +804,15 @@ export const fetchEloScore = async (username: string): Promise<number> => {
 
 const API_BASE = 'https://localhost:8443';
 
-export async function fetchAllTournamentHistory(): Promise<TournamentHistoryRow[]> {
-  const res = await fetch(`${API_BASE}/tournament_history`, { credentials: 'include' });
-  if (!res.ok) throw new Error(`GET /tournament_history ${res.status}`);
+export async function fetchTournamentSummaries(): Promise<TournamentSummary[]> {
+  const res = await fetch(`${API_BASE}/tournament_history/summary`, { credentials: 'include' });
+  if (!res.ok) throw new Error(`GET /tournament_history/summary ${res.status}`);
+  return res.json();
+}
+
+export async function fetchTournamentBracket(tournamentId: string): Promise<TournamentBracket> {
+  const res = await fetch(`${API_BASE}/tournament_history/${encodeURIComponent(tournamentId)}/bracket`, { credentials: 'include' });
+  if (!res.ok) throw new Error(`GET /tournament_history/${tournamentId}/bracket ${res.status}`);
   return res.json();
 }
 
@@ -80,11 +80,32 @@ export interface SearchBarInputProps {
     isOpen?: boolean;
 }
 
-export interface LeaderboardStats {
-    userInfo: FetchedUserData,
-    stats: UserStats,
+export interface LeaderboardEntry {
+    rank: number;
+    player_id: string;
+    player_username: string;
+    player_name: string;
+    elo_score: number;
+    games_played: number;
+    games_won: number;
+    games_lost: number;
+    games_draw: number;
+    avatarUrl: string | null;
 }
 
+export interface LeaderboardResponse {
+    total: number;
+    top: LeaderboardEntry[];
+    around: LeaderboardEntry[];
+}
+
+// GET/POST /stats/matchmaking/queue; 'left' answers a poll cut short by leaving the queue
+export type MatchmakingState =
+    | { status: 'queued'; elo_score: number; waited_ms: number; window: number; queue_size: number }
+    | { status: 'matched'; match_id: string; matched_at: string;
+        players: { player_id: string; username: string; elo_score: number }[] }
+    | { status: 'left' };
+
 export interface UserStats {
     games_played: number;
     win_streak: number;
@@ -183,13 +204,34 @@ export interface TournamentHistoryRow {
   played_at: string;
 }
 
-export type UITournament = {
-  id: string;
-  date: string;
-  totalPlayers: number;
-  winner?: string | null;
-  matches: TournamentHistoryRow[];
-};
+// GET /tournament_history/summary: one row per tournament, newest first
+export interface TournamentSummary {
+  tournament_id: string;
+  matches: number;
+  stages: number;
+  total_players: number;
+  winner: string | null;
+  last_played_at: string;
+}
+
+export interface BracketMatchRow {
+  id: number;
+  match_number: number;
+  player_name: string;
+  opponent_name: string;
+  result: Result;
+  winner: string | null;
+  played_at: string;
+}
+
+// GET /tournament_history/:tournament_id/bracket: rounds from the first round to the final
+export interface TournamentBracket {
+  tournament_id: string;
+  total_players: number;
+  winner: string | null;
+  last_played_at: string;
+  rounds: { stage_number: number; matches: BracketMatchRow[] }[];
+}
 
 export interface DropDownButtonProps {
 	label: string;
@@ -226,8 +268,7 @@ export interface TournamentHistoryRow {
 }
 
 export interface ModularBracketViewerProps {
-  matches: TournamentHistoryRow[];
-  totalPlayers?: number;
+  bracket: TournamentBracket;
   roundGap?: number;
   matchGap?: number;
 }
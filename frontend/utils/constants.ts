@@ -1 +1,10 @@
-export const DEFAULT_AVATAR = '/assets/icons/profile-icon.svg';
\ No newline at end of file
+export const DEFAULT_AVATAR = '/assets/icons/profile-icon.svg';
+
+// Uploaded avatars are stored in fixed sizes, <hash>-<size>.webp (auth-service avatarStore.js);
+// the stored avatarUrl is the largest one.
+export const AVATAR_SIZES = { mini: 48, small: 96, big: 256 } as const;
+
+// URL of the `size` px version of an uploaded avatar (one of AVATAR_SIZES).
+// Google pictures and older uploads only have one size and are returned as-is.
+export const avatarVariant = (url: string | null | undefined, size: number) =>
+	url ? url.replace(/(\/uploads\/avatars\/[0-9a-f]{32})-\d+\.webp$/, `$1-${size}.webp`) : undefined;
@@ -18,6 +18,9 @@ dotenv.config({ path: path.resolve(process.cwd(), '.env') });
 import { initDB, models } from './db/index.js';
 import errorPlugin from './utils/errors.js';
 import validatorPlugin from './utils/validators.js';
+import metricsPlugin from './utils/metrics.js';
+import { loadUserIndex } from './services/userSearch.service.js';
+import { loadRevokedTokens, startTokenSweeper } from './services/refreshTokenStore.service.js';
 
 // Import routes
 import twoFARoutes from './routes/2fa.routes.js';
@@ -33,7 +36,8 @@ import errorResponseSchema from './schemas/errorResponse.schema.js';
 
 async function buildApp() {
   const app = Fastify({
-    logger: process.env.NODE_ENV !== 'production' ? { level: 'debug' } : { level: 'warn' }
+    // LOG_LEVEL overrides the default, e.g. LOG_LEVEL=debug to see the per-request debug lines in production
+    logger: { level: process.env.LOG_LEVEL || (process.env.NODE_ENV !== 'production' ? 'debug' : 'warn') }
   });
 
   // Add JSON schemas for validation and serialization
@@ -44,6 +48,10 @@ async function buildApp() {
   try {
     await initDB();
     app.log.info('Database initialized successfully');
+    const indexed = await loadUserIndex();
+    app.log.info(`User search index loaded (${indexed} users)`);
+    const revoked = await loadRevokedTokens();
+    app.log.info(`Revoked refresh tokens loaded (${revoked})`);
   } catch (err) {
     app.log.error('Database initialization failed:', err);
     process.exit(1);
@@ -51,6 +59,7 @@ async function buildApp() {
 
   // Decorate Fastify instance with DB models
   app.decorate('models', models);
+  startTokenSweeper(app);
 
   // Register plugins and routes with async/await to catch errors early
   app.register(multipart, {
@@ -60,6 +69,7 @@ async function buildApp() {
     }
   });
   app.register(errorPlugin);
+  await app.register(metricsPlugin);
   app.register(validatorPlugin);
 
   await app.register(authenticate);
@@ -40,6 +40,9 @@ export default (sequelize) => {
     indexes: [
       { fields: ['userId'] },
       { fields: ['tokenHash'] }, // for quick lookup of token
+      // for the sweeper (services/refreshTokenStore.service.js)
+      { fields: ['expiresAt'] },
+      { fields: ['revokedAt'] },
     ]
   });
 
@@ -59,7 +59,6 @@ export default fp(async (fastify) => {
       }
     }
   }, async (req, reply) => {
-      console.log("step 1"); // for tesing only
     try {
       // if req.user exists(not null or undefined), then take its '.id'
       // '?' optional chainning
@@ -67,34 +66,26 @@ export default fp(async (fastify) => {
       if (!userId) {
         return sendError(reply, 401, 'Unauthorized', 'Missing or invalid authentication token');
       }
-  console.log("step 2"); // for tesing only
       // If user already has 2FA enabled, return 409 Conflict
       const already = await getTwoFAStatus(userId);
       if (already) {
         return sendError(reply, 409, 'Conflict', '2FA is already enabled for this user');
       }
-      console.log("step 3"); // for tesing only
 
       // generateTwoFASetup will persist the secret and hashed backup codes and return plain backup codes
       const { secret, otpauthUrl, backupCodes } = await generateTwoFASetup(userId);
-  console.log("step 4"); // for tesing only
       // generate qr code (data URL)
       const qrCode = await generateTwoFAQrCode(otpauthUrl);
-  console.log("step 5"); // for tesing only
       // Return setup info (frontend must display QR + backup codes and prompt user to confirm)
       return reply.code(200).send({ secret, otpauthUrl, qrCode, backupCodes });
     } catch (err) {
-        console.log(err);
-        console.log("step 6"); // for tesing only
+        req.log.debug({ err }, '2FA setup failed');
       if (err instanceof NotFoundError) {
-console.log("step 7"); // for tesing only
-
         return sendError(reply, 404, 'Not Found', err.message);
       }
       if (err instanceof ValidationError) {
         // validation error from service (e.g. "2FA already enabled") -> map to 400 or 409 depending on message
         // We already check for existing 2FA above; treat as Bad Request by default
-        console.log("step 8"); // for tesing only
         return sendError(reply, 400, 'Bad Request', err.message);
       }
       // unexpected
@@ -10,6 +10,7 @@ import {
 import { InvalidCredentialsError, ConflictError, NotFoundError } from '../utils/errors.js';
 import { sendError } from '../utils/sendError.js';
 import { setRefreshTokenCookie, clearRefreshTokenCookie } from '../utils/authCookie.js';
+import { getAccessPublicKey } from '../utils/jwt.js';
 import { userLogin } from '../services/google-auth.service.js';
 
 export default fp(async (fastify) => {
@@ -184,7 +185,7 @@ export default fp(async (fastify) => {
       // Read refresh token from cookie
       const refreshToken = req.cookies?.['__Host-refreshToken'] || null;
       
-      console.log("get refreshToken:", refreshToken); //f or testing only
+      req.log.debug({ hasRefreshToken: Boolean(refreshToken) }, 'refresh token cookie read');
 
       if (!refreshToken) {
         return sendError(reply, 401, 'Unauthorized', 'Missing refresh token cookie');
@@ -201,8 +202,8 @@ export default fp(async (fastify) => {
     } catch (err) {
       if (err instanceof InvalidCredentialsError) return sendError(reply, 400, 'Bad Request', err.message);
       if (err instanceof NotFoundError) return sendError(reply, 404, 'Not Found', err.message);
-      // rotateTokens should throw for invalid/expired refresh token
-      return sendError(reply, reply.statusCode || 500, 'Internal Server Error', err.message);
+      // rotateTokens throws TokenExpiredError / TokenRevokedError (401) for expired and revoked tokens
+      return sendError(reply, err.statusCode || 500, err.statusCode ? err.name : 'Internal Server Error', err.message);
     }
   });
 
@@ -283,4 +284,24 @@ export default fp(async (fastify) => {
       role: req.user.role || 'user'
     };
   });
+
+
+  // ---------------- Public Key ----------------
+  fastify.get('/auth/public-key', {
+    schema: {
+      tags: ['Auth'],
+      summary: 'Access token public key',
+      description: `
+        RS256 public key (PEM) that verifies access tokens, so other microservices
+        can check them locally without being able to issue any.
+      `,
+      response: {
+        200: { type: 'string' },
+        500: { $ref: 'errorResponse#' },
+      }
+    }
+  }, async (req, reply) => {
+    reply.type('application/x-pem-file');
+    return getAccessPublicKey();
+  });
 });
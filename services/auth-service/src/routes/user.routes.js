@@ -2,18 +2,25 @@ import fp from 'fastify-plugin';
 import { promises as fsp } from 'fs';
 import path from 'path';
 import { Writable } from 'stream';
-import crypto from 'crypto';
 import fastifyStatic from '@fastify/static';
-import { fileTypeFromBuffer } from 'file-type';
+import { Op } from 'sequelize';
 
-import { getUserById, getUserByUsername, updatePassword, updatePinCode, updateAvatar } from '../services/auth.service.js';
+import { getUserById, getUserByUsername, getUsersByUsernames, updatePassword, updatePinCode, updateAvatar } from '../services/auth.service.js';
 import { ValidationError } from '../utils/errors.js';
 import { comparePassword } from '../utils/crypto.js';
 import { NotFoundError } from '../utils/errors.js';
-import defineUser from '../db/models/user.js';
-import { sequelize } from '../db/index.js';
+import { sendError } from '../utils/sendError.js';
+import { storeAvatar, avatarHash, removeAvatar } from '../utils/avatarStore.js';
+import { searchUsers } from '../services/userSearch.service.js';
+import { loadIngestToken } from '../../../shared/ingestToken.js';
+
+const STATS_SERVICE_URL = process.env.STATS_SERVICE_URL || 'http://stats-service:3001';
 
 export default fp(async (fastify) => {
+  // Authorizes the avatar cache invalidation on stats-service's internal route
+  const ingestToken = loadIngestToken();
+  if (!ingestToken) fastify.log.warn('No stats ingest token; stats-service avatar cache will not be invalidated');
+
   // --- Configure upload directory and static service ---
   // Treat env as uploads root (default ./uploads). Avatars are stored in uploads/avatars.
   const avatarUploadPathEnv = process.env.AVATAR_UPLOAD_PATH || './uploads/avatars';
@@ -38,7 +45,13 @@ export default fp(async (fastify) => {
   await fastify.register(fastifyStatic, {
     root: uploadsRoot, // directory for storing the avatars on local: /app/uploads/avatars
     prefix: `${uploadsPrefix}/`, // Client accesses URL prefix. e.g. request to /uploads/avatars/xxx.jpg will serve file uploadsRoot/avatars/xxx.jpg
-    decorateReply: false // Disable automatic handling
+    decorateReply: false, // Disable automatic handling
+    // Uploaded files are never rewritten (new avatars get new names), so browsers and the gateway may keep them
+    maxAge: '365d',
+    immutable: true,
+    etag: true,
+    // Uploads and resizes in progress
+    allowedPath: (pathName) => !pathName.endsWith('.tmp'),
   });
 
   // Cross-platform "black hole" writable stream to consume and discard readable streams safely
@@ -46,6 +59,31 @@ export default fp(async (fastify) => {
     write(chunk, encoding, callback) { callback(); }
   });
 
+  // Normalize uploadsPrefix: ensure leading slash, no trailing slash, single slashes
+  const normalizedUploadsPrefix = ('/' + uploadsPrefix).replace(/\/+/g, '/').replace(/\/$/, '');
+
+  // Filename of an avatar stored here, from its absolute URL; null for Google pictures and other foreign URLs
+  const storedAvatarFilename = (avatarUrl) => {
+    if (!avatarUrl) return null;
+    let pathname;
+    try {
+      pathname = new URL(avatarUrl, 'https://localhost').pathname;
+    } catch (err) {
+      return null;
+    }
+    if (!pathname.startsWith(`${normalizedUploadsPrefix}/`)) return null;
+    const filename = pathname.slice(normalizedUploadsPrefix.length + 1);
+    return filename === path.basename(filename) ? filename : null;
+  };
+
+  // Content-addressed files can be shared by several users: only delete them when nobody uses them.
+  // An upload of the same image racing with this check can still lose its files; it is re-created on the next upload.
+  const releaseAvatar = async (filename) => {
+    const key = avatarHash(filename) ?? filename;
+    const users = await fastify.models.User.count({ where: { avatarUrl: { [Op.like]: `%/${key}%` } } });
+    if (users === 0) await removeAvatar(uploadsRoot, filename);
+  };
+
   /**
    * @route   GET /users/profile/me
    * @desc    Get current user profile:id, username, avatarUrl, TwoFAStatus and registerFromGoogle.
@@ -186,6 +224,86 @@ export default fp(async (fastify) => {
     }
   });
 
+  /**
+   * Get many users' public profiles in one request (used by stats-service for rival avatars)
+   * @route   POST /users/profiles
+   * @desc    Body { usernames: [...] }. Returns the profiles that exist and the usernames that don't.
+   */
+  fastify.post('/users/profiles', {
+  schema: {
+    tags: ['User'],
+    summary: 'Get public profiles for many usernames',
+    description: 'Batch version of GET /users/profile/:username.',
+    body: {
+      type: 'object',
+      required: ['usernames'],
+      additionalProperties: false,
+      properties: {
+        usernames: {
+          type: 'array',
+          maxItems: 500,
+          items: { type: 'string' }
+        }
+      }
+    },
+    response: {
+      200: {
+        description: 'user profiles retrieved successfully',
+        type: 'object',
+        additionalProperties: false,
+        required: ['success', 'code', 'data'],
+        properties: {
+          success: { type: 'boolean' },
+          code: { type: 'string' },
+          data: {
+            type: 'object',
+            additionalProperties: false,
+            required: ['profiles', 'missing'],
+            properties: {
+              profiles: {
+                type: 'array',
+                items: {
+                  type: 'object',
+                  additionalProperties: false,
+                  required: ['id', 'username'],
+                  properties: {
+                    id: { type: 'string' },
+                    username: { type: 'string' },
+                    avatarUrl: { type: ['string', 'null'], format: 'uri' }
+                  }
+                }
+              },
+              missing: { type: 'array', items: { type: 'string' } }
+            }
+          }
+        }
+      },
+      500: { description: 'Internal server error', $ref: 'errorResponse#' },
+    }
+  }
+  }, async (req, reply) => {
+    try {
+      const usernames = [...new Set(req.body.usernames)];
+      const users = usernames.length ? await getUsersByUsernames(usernames) : [];
+      const found = new Set(users.map((user) => user.username));
+
+      return reply.send({
+        success: true,
+        code: 'USER_PROFILES_RETRIEVED',
+        data: {
+          profiles: users.map((user) => ({
+            id: user.id,
+            username: user.username,
+            avatarUrl: user.avatarUrl || null
+          })),
+          missing: usernames.filter((username) => !found.has(username))
+        }
+      });
+    } catch (err) {
+      return sendError(reply, 500, 'Internal Server Error', err.message || 'Unexpected error');
+    }
+  });
+
   /**
    * @route   PATCH /users/me/password
    * @desc    Update current user password
@@ -454,53 +572,12 @@ export default fp(async (fastify) => {
   const file = await req.file();
   if (!file) throw new ValidationError('No file uploaded');
 
-  // Read buffer (5MB limit configured earlier)
-  let buffer;
-  try {
-    buffer = await file.toBuffer();
-  } catch (err) {
-    fastify.log.warn({ err }, 'Failed to read uploaded file');
-    throw new ValidationError('Failed to process uploaded file');
-  }
-
-  // Validate using magic bytes
-  const ft = await fileTypeFromBuffer(buffer);
-  const allowedMimeTypes = new Set(['image/jpeg', 'image/png', 'image/webp', 'image/gif']);
-  if (!ft || !allowedMimeTypes.has(ft.mime)) {
-    throw new ValidationError('Unsupported image format');
-  }
-
-  // Normalize extension
-  const extMap = { jpeg: 'jpg' };
-  const ext = '.' + (extMap[ft.ext] || ft.ext);
-
   // Ensure user
   if (!req.user) throw new NotFoundError('User not found');
   const userId = req.user.id;
 
-  // Filenames & path
-  const filename = `${userId}-${Date.now()}-${crypto.randomBytes(8).toString('hex')}${ext}`;
-  const filepath = path.join(uploadsRoot, filename);
-  const resolved = path.resolve(filepath);
-
-  // Resolve uploads root once
-  const uploadsRootResolved = path.resolve(uploadsRoot);
-
-  // Safety: ensure we don't escape uploads root
-  if (!resolved.startsWith(uploadsRootResolved + path.sep) && resolved !== uploadsRootResolved) {
-    throw new ValidationError('Invalid filename / path resolution');
-  }
-
-  // Write file to disk
-  try {
-    await fsp.writeFile(resolved, buffer);
-  } catch (err) {
-    fastify.log.error({ err }, 'Failed to save uploaded avatar');
-    throw new ValidationError('Failed to save uploaded file');
-  }
-
-  // Normalize uploadsPrefix: ensure leading slash, no trailing slash, single slashes
-  const normalizedUploadsPrefix = ('/' + (uploadsPrefix || '/uploads')).replace(/\/+/g, '/').replace(/\/$/, '');
+  // Stream to disk (5MB limit configured earlier), validate, resize; identical images share one set of files
+  const { filename, reused } = await storeAvatar(file.file, uploadsRoot);
 
   // Build origin: prefer WEBSITE_ADDRESS, then fastify.config.publicOrigin, else derive from headers
   const configuredOrigin = process.env.WEBSITE_ADDRESS || fastify.config?.publicOrigin || null;
@@ -543,52 +620,39 @@ export default fp(async (fastify) => {
     fastify.log.info({ userId, avatarUrl }, 'Updating DB avatar for user');
     await updateAvatar(userId, avatarUrl);
   } catch (err) {
-    fastify.log.error({ err, avatarUrl, userId }, 'updateAvatar failed; removing uploaded file');
-    // Remove newly uploaded file to avoid orphaning
-    await fsp.unlink(resolved).catch((cleanupErr) => {
-      fastify.log.error({ cleanupErr }, 'Failed to remove new avatar after DB failure');
-    });
+    fastify.log.error({ err, avatarUrl, userId }, 'updateAvatar failed; releasing uploaded avatar');
+    if (!reused) {
+      await releaseAvatar(filename).catch((cleanupErr) => {
+        fastify.log.error({ cleanupErr }, 'Failed to remove new avatar after DB failure');
+      });
+    }
     if (err instanceof NotFoundError) throw err;
     throw new ValidationError(err.message || 'Failed to update avatar in DB');
   }
 
-  // Best-effort: delete previous avatar file if inside uploadsRoot and not the same file
-  if (previousAvatar) {
-    try {
-      let prevPathFromPrefix = null;
-
-      // Try parse absolute URL
-      try {
-        if (/^https?:\/\//i.test(previousAvatar)) {
-          const u = new URL(previousAvatar);
-          prevPathFromPrefix = u.pathname.replace(/^\/+/, '');
-        }
-      } catch (e) {
-        prevPathFromPrefix = null;
-      }
-
-      if (!prevPathFromPrefix) {
-        if (previousAvatar.startsWith(normalizedUploadsPrefix)) {
-          prevPathFromPrefix = previousAvatar.slice(normalizedUploadsPrefix.length).replace(/^\/+/, '');
-        } else {
-          prevPathFromPrefix = previousAvatar.replace(/^\/+/, '');
-        }
-      }
-
-      const prevResolved = path.resolve(uploadsRoot, prevPathFromPrefix);
-
-      if ((prevResolved.startsWith(uploadsRootResolved + path.sep) || prevResolved === uploadsRootResolved) && prevResolved !== resolved) {
-        await fsp.unlink(prevResolved).catch((e) => {
-          fastify.log.warn({ e, prevResolved }, 'Failed to delete previous avatar (non-fatal)');
-        });
-      } else {
-        fastify.log.warn({ prevResolved }, 'Previous avatar outside uploads root or same as new file - skipping delete');
-      }
-    } catch (err) {
-      fastify.log.warn({ err }, 'Failed to clean up previous avatar (non-fatal)');
-    }
+  // Best-effort: delete the previous avatar once no user points to it any more
+  const previousFilename = storedAvatarFilename(previousAvatar);
+  if (previousFilename && previousFilename !== filename) {
+    await releaseAvatar(previousFilename).catch((err) => {
+      fastify.log.warn({ err, previousFilename }, 'Failed to clean up previous avatar (non-fatal)');
+    });
   }
 
+  // Best-effort: stats-service caches avatar URLs for rival lists; drop this user's entry.
+  // Its internal route takes the service ingest token, not the user's access token.
+  fetch(`${STATS_SERVICE_URL}/internal/avatar_cache/invalidate`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Authorization: `Bearer ${ingestToken}`
+    },
+    body: JSON.stringify({ username: req.user.username })
+  }).then((res) => {
+    if (!res.ok) fastify.log.warn({ status: res.status }, 'stats-service refused the avatar cache invalidation');
+  }).catch((err) => {
+    fastify.log.warn({ err }, 'Failed to invalidate stats-service avatar cache (non-fatal)');
+  });
+
   return reply.code(200).send({ avatarUrl });
 });
 
@@ -639,11 +703,9 @@ export default fp(async (fastify) => {
     }
   },
   }, async (req, reply) => {
-    let User;
     try {
-      User = defineUser(sequelize);
       // Only select the fields the frontend needs
-      const users = await User.findAll({
+      const users = await fastify.models.User.findAll({
         attributes: ['username', 'avatarUrl'],
         order: [['username', 'ASC']],
       });
@@ -665,5 +727,52 @@ export default fp(async (fastify) => {
       });
     }
   });
-});
 
+  /**
+   * @route   get /users/search
+   * @desc    Users whose username starts with q (case-insensitive), sorted by username, one page at a time.
+   *          Served from the in-memory index in userSearch.service.js; the database is not queried.
+   */
+  fastify.get('/users/search', {
+    preHandler: [fastify.authenticate],
+    schema: {
+      tags: ['User'],
+      summary: 'Search users by username prefix',
+      querystring: {
+        type: 'object',
+        properties: {
+          q: { type: 'string', maxLength: 50, default: '', description: 'Username prefix; empty lists every user' },
+          limit: { type: 'integer', minimum: 1, maximum: 50, default: 10 },
+          offset: { type: 'integer', minimum: 0, default: 0 },
+        }
+      },
+      response: {
+        200: {
+          description: 'One page of matching users',
+          type: 'object',
+          required: ['total', 'users'],
+          properties: {
+            total: { type: 'integer', description: 'Number of users matching q, across all pages' },
+            users: {
+              type: 'array',
+              items: {
+                type: 'object',
+                properties: {
+                  username: { type: 'string' },
+                  avatarUrl: { type: ['string', 'null'], format: 'url', description: 'Url to avatar or null' },
+                }
+              },
+            },
+          }
+        },
+        400: { description: 'Bad Request', $ref: 'errorResponse#' },
+        401: { description: 'Unauthorized', $ref: 'errorResponse#' },
+      }
+    },
+  }, async (req, reply) => {
+    const { q, limit, offset } = req.query;
+    const result = searchUsers(q.trim(), { limit, offset });
+    reply.header('X-Total-Count', result.total);
+    return reply.code(200).send(result);
+  });
+});
@@ -105,8 +105,6 @@ async function consumeBackupCode(userId, code) {
     throw new ValidationError('No backup codes available');
   }
 
-  console.log('backupcode in the DB:', user.backupCodes);
-
   const hashedCodes = [...user.backupCodes];
   let matchedIndex = -1;
 
@@ -122,14 +120,11 @@ async function consumeBackupCode(userId, code) {
   }
 
   if (matchedIndex === -1) return false;
-  console.log('BEFORE delete the backupcode:', user.backupCodes);
   // remove and persist
   hashedCodes.splice(matchedIndex, 1);
   await user.update({ backupCodes: hashedCodes });
-    console.log('after delete the backupcode1:', user.backupCodes);
 // await user.update({ backupCodes: [...hashedCodes] }, { fields: ['backupCodes'] });
   await user.reload();
-  console.log('after delete the backupcode2:', user.backupCodes);
 
   return true;
 }
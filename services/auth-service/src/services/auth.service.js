@@ -132,6 +132,19 @@ async function getUserByUsername(username, includeSecrets = false) {
   return user ? user.toJSON() : null;
 }
 
+/**
+ * Look up many users by username in one query.
+ * @param {string[]} usernames
+ * @returns {Promise<Array<{id: string, username: string, avatarUrl: string|null}>>} users that exist
+ */
+async function getUsersByUsernames(usernames) {
+  const users = await User.findAll({
+    where: { username: { [Op.in]: usernames } },
+    attributes: ['id', 'username', 'avatarUrl'],
+  });
+  return users.map((user) => user.toJSON());
+}
+
 async function getUserByIdentifier(identifier, includeSecrets = false) {
   const user = await User.scope(includeSecrets ? 'withSecrets' : null).findOne({
     where: {
@@ -247,6 +260,7 @@ export {
   authenticateUser,
   getUserById,
   getUserByUsername,
+  getUsersByUsernames,
   getUserByIdentifier,
   enableTwoFA,
   disableTwoFA,
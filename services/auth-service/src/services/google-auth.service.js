@@ -16,19 +16,18 @@ import axios from 'axios';
 import jwt from 'jsonwebtoken';
 import { Op, UniqueConstraintError } from 'sequelize';
 
-import defineUser from '../db/models/user.js';
-import defineRefreshToken from '../db/models/refreshToken.js'; // <-- new import
 import { hashPassword } from '../utils/crypto.js';
 import { jwkToPem } from '../utils/jwkToPem.js';
 import { ConflictError, InvalidCredentialsError, ValidationError } from '../utils/errors.js';
 import { validateUsername, validatePincode } from '../utils/validators.js';
-import { sequelize } from '../db/index.js';
-import { generateAccessToken, generateRefreshToken, decodeToken, storeRefreshTokenHash } from '../utils/jwt.js';
+import { sequelize, models } from '../db/index.js';
+import { generateAccessToken, generateRefreshToken, storeRefreshTokenHash } from '../utils/jwt.js';
 
 const GOOGLE_CERTS_URL = process.env.GOOGLE_CERTS_URL || 'https://www.googleapis.com/oauth2/v3/certs';
 const GOOGLE_CLIENT_ID = process.env.GOOGLE_CLIENT_ID;
-const User = defineUser(sequelize);
-const RefreshToken = defineRefreshToken(sequelize); // instantiate model
+// The models registered in db/index.js: defining them again here would replace them in sequelize
+// and skip the hooks other modules add (services/userSearch.service.js)
+const { User } = models;
 
 // simple in-memory cache for certs
 let certsCache = {
@@ -69,43 +68,6 @@ async function fetchGoogleCerts() {
   return keys;
 }
 
-/**
- * Persist a refresh token in the RefreshToken table (store hashed token)
- * @param {string} token - raw refresh token (will be hashed before saving)
- * @param {string} userId
- * @param {string|null} ip
- * @param {string|null} userAgent
- */
-async function persistRefreshToken(token, userId, ip = null, userAgent = null) {
-  // decode token to get exp
-  const decoded = decodeToken(token);
-  if (!decoded || !decoded.exp) {
-    // fallback: set expiry based on env default (7 days)
-    const fallbackMs = 7 * 24 * 60 * 60 * 1000;
-    const expiresAt = new Date(Date.now() + fallbackMs);
-    const tokenHash = await hashPassword(token);
-    await RefreshToken.create({
-      token: tokenHash,
-      userId,
-      expiresAt,
-      ipAddress: ip,
-      userAgent
-    });
-    return;
-  }
-
-  const expiresAt = new Date(decoded.exp * 1000);
-  const tokenHash = await hashPassword(token);
-
-  await RefreshToken.create({
-    token: tokenHash,
-    userId,
-    expiresAt,
-    ipAddress: ip,
-    userAgent
-  });
-}
-
 /**
  * Verify Google ID token and return payload.
  * Throws InvalidCredentialsError on any verification failure.
@@ -263,12 +225,8 @@ async function googleCompleteRegistration(idToken, username, pinCode, ip = null,
     const accessToken = generateAccessToken(accessTokenPayload);
     const refreshToken = generateRefreshToken(refreshTokenPayload);
 
-    // persist refresh token
-    try {
-      await persistRefreshToken(refreshToken, newUser.id, ip, userAgent);
-    } catch (err) {
-      console.warn('Failed to persist refresh token for new user:', err.message);
-    }
+    // persist refresh token (hashed, like every other login)
+    await storeRefreshTokenHash(refreshToken, newUser.id, ip, userAgent, { transaction });
 
     await transaction.commit();
 
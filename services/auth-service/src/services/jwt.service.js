@@ -24,9 +24,17 @@ import {
   InvalidCredentialsError,
 } from '../utils/errors.js';
 import { hashToken, compareToken } from '../utils/crypto.js';
+import { markRevoked, isRevoked } from './refreshTokenStore.service.js';
+import { counter } from '../utils/metrics.js';
 
 const { User, RefreshToken } = models;
 
+// header.payload.signature, base64url; our refresh tokens are well under 1 KB
+const JWT_SHAPE_REGEX = /^[\w-]+\.[\w-]+\.[\w-]+$/;
+const MAX_TOKEN_LENGTH = 2048;
+
+const refreshChecks = counter('auth_refresh_token_checks_total', 'Refresh token validations by outcome; only db_* outcomes query the database');
+
 /**
  * Create and return new access & refresh tokens, and persist refresh token.
  * @param {object} payload - JWT payload (id, email, role, is2FAEnabled)
@@ -80,22 +88,45 @@ function validateAccessToken(token) {
  * @throws {TokenExpiredError|TokenRevokedError|NotFoundError}
  */
 async function validateRefreshToken(token) {
+  // Obviously invalid tokens are rejected before any crypto or DB work
+  if (token.length > MAX_TOKEN_LENGTH || !JWT_SHAPE_REGEX.test(token)) {
+    refreshChecks.inc({ result: 'malformed' });
+    throw new InvalidCredentialsError('Malformed refresh token');
+  }
+
   // verify signature (JWT check)
   let decoded;
   try {
     decoded = verifyRefreshToken(token);
   } catch (error) {
+    refreshChecks.inc({ result: error.name === 'TokenExpiredError' ? 'expired' : 'bad_signature' });
     if (error.name === 'TokenExpiredError') throw new TokenExpiredError();
-    throw error;
+    throw new InvalidCredentialsError('Invalid refresh token');
   }
 
   // hash incoming token before lookup
   const tokenHash = hashToken(token);
-  const stored = await RefreshToken.findOne({ where: { tokenHash } });
-  if (!stored) throw new NotFoundError('Refresh token not found');
+  // rotated or logged out: known without asking the DB
+  if (isRevoked(tokenHash)) {
+    refreshChecks.inc({ result: 'revoked_cached' });
+    throw new TokenRevokedError();
+  }
+
+  const stored = await RefreshToken.findOne({
+    attributes: ['tokenHash', 'expiresAt', 'revokedAt'],
+    where: { tokenHash },
+  });
+  if (!stored) {
+    refreshChecks.inc({ result: 'db_not_found' });
+    throw new NotFoundError('Refresh token not found');
+  }
 
   // revoked?
-  if (stored.revokedAt) throw new TokenRevokedError();
+  if (stored.revokedAt) {
+    refreshChecks.inc({ result: 'db_revoked' });
+    markRevoked(tokenHash, stored.expiresAt);
+    throw new TokenRevokedError();
+  }
 
   // expired?
   if (stored.expiresAt && stored.expiresAt < new Date()) throw new TokenExpiredError();
@@ -105,6 +136,7 @@ async function validateRefreshToken(token) {
     throw new NotFoundError('Refresh token mismatch');
   }
 
+  refreshChecks.inc({ result: 'db_valid' });
   return decoded;
 }
 
@@ -147,28 +179,19 @@ async function rotateTokens(token, opts = {}) {
   const oldHash = hashToken(token);
   const newHash = hashToken(newRefreshToken);
 
-    // Use a transaction: revoke old and insert new atomically (Sequelize example)
-  // If you don't use Sequelize or don't want a transaction, at least update replacedByToken after store
-  const sequelize = RefreshToken.sequelize || User.sequelize; // adjust for your setup
-  if (!sequelize) {
-    // fallback: do operations sequentially but still set replacedByToken to newHash after storing
-    await storeRefreshTokenHash(newRefreshToken, existingUser.id, ipToStore, userAgent);
+  // Use a transaction: revoke old and insert new atomically
+  await RefreshToken.sequelize.transaction(async (tx) => {
+    // store new token
+    await storeRefreshTokenHash(newRefreshToken, existingUser.id, ipToStore, userAgent, { transaction: tx });
+
+    // revoke old and set replacedByTokenHash to new token hash
     await RefreshToken.update(
-      { revokedAt: new Date(), replacedByToken: newHash },
-      { where: { tokenHash: oldHash } }
+      { revokedAt: new Date(), replacedByTokenHash: newHash },
+      { where: { tokenHash: oldHash }, transaction: tx }
     );
-  } else {
-    await sequelize.transaction(async (tx) => {
-      // store new token
-      await storeRefreshTokenHash(newRefreshToken, existingUser.id, ipToStore, userAgent, { transaction: tx });
-
-      // revoke old and set replacedByToken to new token hash
-      await RefreshToken.update(
-        { revokedAt: new Date(), replacedByToken: newHash },
-        { where: { tokenHash: oldHash }, transaction: tx }
-      );
-    });
-  }
+  });
+  // The DB now rejects the old token too; remembering it spares the lookup on replays
+  markRevoked(oldHash, decoded.exp * 1000);
 
   // store the new refreshToken into DB
   // await storeRefreshTokenHash(refreshToken, existingUser.id, ip, userAgent);
@@ -195,6 +218,7 @@ async function revokeRefreshToken(token) {
   const stored = await RefreshToken.findOne({ where: { tokenHash } });
   if (!stored) return;
   await stored.update({ revokedAt: new Date() });
+  markRevoked(tokenHash, stored.expiresAt);
 }
 
 /**
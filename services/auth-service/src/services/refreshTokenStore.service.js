@@ -0,0 +1,126 @@
+/**
+ * Upkeep of the RefreshTokens table.
+ * - revoked refresh tokens are remembered in memory until their JWT expires, so replays of rotated
+ *   or logged-out tokens are rejected without a DB lookup (loadRevokedTokens() refills it at startup)
+ * - startTokenSweeper(): deletes expired rows, and revoked rows once they are older than
+ *   REVOKED_RETENTION_MS, in batches, so the table stops growing with every refresh
+ */
+import { Op } from 'sequelize';
+import { models } from '../db/index.js';
+import { collector, counter } from '../utils/metrics.js';
+
+const { RefreshToken } = models;
+
+const SWEEP_INTERVAL_MS = Number(process.env.AUTH_TOKEN_SWEEP_INTERVAL_MS) || 10 * 60 * 1000;
+const SWEEP_BATCH_SIZE = Number(process.env.AUTH_TOKEN_SWEEP_BATCH_SIZE) || 1000;
+// Revoked rows are kept this long for auditing (which session replaced which) before being swept
+const REVOKED_RETENTION_MS = Number(process.env.AUTH_REVOKED_TOKEN_RETENTION_MS) || 24 * 60 * 60 * 1000;
+// Beyond this many revoked tokens the oldest are forgotten; they are still rejected, by the DB lookup
+const MAX_REVOKED_CACHE = Number(process.env.AUTH_REVOKED_CACHE_SIZE) || 100000;
+
+// tokenHash -> expiry (ms); insertion order is roughly expiry order, since every token lives as long
+const revoked = new Map();
+
+const swept = counter('auth_refresh_tokens_swept_total', 'Refresh token rows deleted by the sweeper');
+collector('auth_revoked_token_cache_size', 'Revoked refresh tokens remembered in memory', 'gauge', () => revoked.size);
+
+/**
+ * Remember a revoked token until it expires. Call after the revocation is committed.
+ * @param {string} tokenHash
+ * @param {Date|number} expiresAt
+ */
+const markRevoked = (tokenHash, expiresAt) => {
+  const expiry = new Date(expiresAt).getTime();
+  if (!(expiry > Date.now())) return; // expired tokens already fail the JWT check
+  revoked.delete(tokenHash);
+  revoked.set(tokenHash, expiry);
+  if (revoked.size > MAX_REVOKED_CACHE) revoked.delete(revoked.keys().next().value);
+};
+
+/**
+ * @param {string} tokenHash
+ * @returns {boolean} true if the token is known to be revoked; false means "ask the DB"
+ */
+const isRevoked = (tokenHash) => revoked.has(tokenHash);
+
+/**
+ * Fill the revocation cache from the table. Call once after initDB().
+ * @returns {Promise<number>} number of revoked, unexpired tokens
+ */
+async function loadRevokedTokens() {
+  const rows = await RefreshToken.findAll({
+    attributes: ['tokenHash', 'expiresAt'],
+    where: { revokedAt: { [Op.ne]: null }, expiresAt: { [Op.gt]: new Date() } },
+    order: [['expiresAt', 'DESC']],
+    limit: MAX_REVOKED_CACHE,
+    raw: true,
+  });
+  revoked.clear();
+  // Soonest-expiring first, so they are the first to go when the cache is full
+  for (let i = rows.length - 1; i >= 0; i--) revoked.set(rows[i].tokenHash, new Date(rows[i].expiresAt).getTime());
+  return revoked.size;
+}
+
+const pruneRevokedCache = () => {
+  const now = Date.now();
+  for (const [tokenHash, expiry] of revoked) {
+    if (expiry <= now) revoked.delete(tokenHash);
+  }
+};
+
+/**
+ * Delete expired and long-revoked rows, SWEEP_BATCH_SIZE at a time so no single write holds
+ * the SQLite lock for long.
+ * @returns {Promise<number>} rows deleted
+ */
+async function sweepRefreshTokens() {
+  const now = new Date();
+  const where = {
+    [Op.or]: [
+      { expiresAt: { [Op.lt]: now } },
+      { revokedAt: { [Op.lt]: new Date(now.getTime() - REVOKED_RETENTION_MS) } },
+    ]
+  };
+  let total = 0;
+  for (;;) {
+    const rows = await RefreshToken.findAll({ attributes: ['id'], where, limit: SWEEP_BATCH_SIZE, raw: true });
+    if (rows.length === 0) break;
+    total += await RefreshToken.destroy({ where: { id: rows.map((row) => row.id) } });
+    if (rows.length < SWEEP_BATCH_SIZE) break;
+    // Let queued requests in between batches
+    await new Promise((resolve) => setImmediate(resolve));
+  }
+  pruneRevokedCache();
+  swept.inc({}, total);
+  return total;
+}
+
+/**
+ * Sweep now and every SWEEP_INTERVAL_MS until the server closes.
+ * @param {*} fastify
+ */
+function startTokenSweeper(fastify) {
+  let running = null;
+  const run = () => {
+    if (running) return;
+    running = sweepRefreshTokens()
+      .then((n) => { if (n > 0) fastify.log.info(`Swept ${n} expired or revoked refresh tokens`); })
+      .catch((err) => fastify.log.error({ err }, 'Refresh token sweep failed'))
+      .finally(() => { running = null; });
+  };
+  const timer = setInterval(run, SWEEP_INTERVAL_MS);
+  timer.unref();
+  run();
+  fastify.addHook('onClose', async () => {
+    clearInterval(timer);
+    await running;
+  });
+}
+
+export {
+  markRevoked,
+  isRevoked,
+  loadRevokedTokens,
+  sweepRefreshTokens,
+  startTokenSweeper,
+};
@@ -0,0 +1,79 @@
+/**
+ * Username search for GET /users/search.
+ * - loadUserIndex(): reads every username once at startup into an in-memory prefix index
+ * - User model hooks keep it fresh on registration, Google sign-up, username/avatar changes and deletes
+ * - searchUsers(): case-insensitive prefix match, paginated, without touching the database
+ */
+import { models } from '../db/index.js';
+import { createPrefixIndex } from '../utils/prefixIndex.js';
+
+const { User } = models;
+
+const index = createPrefixIndex();
+
+// Fields that show up in search results; other updates (2FA, passwords, ...) leave the index alone
+const INDEXED_FIELDS = ['username', 'avatarUrl'];
+
+const indexUser = (user) => {
+  // Google sign-ups have no username until they pick one
+  if (!user.username) {
+    index.remove(user.id);
+    return;
+  }
+  index.set(user.id, user.username, { username: user.username, avatarUrl: user.avatarUrl ?? null });
+};
+
+// Inside a transaction (Google sign-up), wait for the commit so a rollback leaves no phantom user
+const afterCommit = (options, apply) => {
+  if (options.transaction) options.transaction.afterCommit(apply);
+  else apply();
+};
+
+const reloadIndex = async () => {
+  const users = await User.findAll({ attributes: ['id', 'username', 'avatarUrl'] });
+  index.load(users
+    .filter((user) => user.username)
+    .map((user) => ({
+      id: user.id,
+      key: user.username,
+      value: { username: user.username, avatarUrl: user.avatarUrl ?? null },
+    })));
+};
+
+/**
+ * Build the index and register the hooks. Call once, after initDB().
+ * @returns {Promise<number>} number of indexed users
+ */
+async function loadUserIndex() {
+  User.addHook('afterCreate', 'userSearchIndex', (user, options) => afterCommit(options, () => indexUser(user)));
+  User.addHook('afterUpdate', 'userSearchIndex', (user, options) => {
+    if (!options.fields || options.fields.some((field) => INDEXED_FIELDS.includes(field))) {
+      afterCommit(options, () => indexUser(user));
+    }
+  });
+  User.addHook('afterDestroy', 'userSearchIndex', (user, options) => afterCommit(options, () => index.remove(user.id)));
+  // Model-level writes have no instances to look at; they are rare, so rebuild
+  User.addHook('afterBulkUpdate', 'userSearchIndex', (options) => {
+    if (INDEXED_FIELDS.some((field) => field in (options.attributes ?? {}))) return reloadIndex();
+  });
+  User.addHook('afterBulkDestroy', 'userSearchIndex', () => reloadIndex());
+  User.addHook('afterBulkCreate', 'userSearchIndex', () => reloadIndex());
+
+  await reloadIndex();
+  return index.size;
+}
+
+/**
+ * @param {string} prefix - matched case-insensitively against the start of usernames; '' matches everyone
+ * @param {{limit: number, offset: number}} page
+ * @returns {{total: number, users: Array<{username: string, avatarUrl: string|null}>}} users sorted by username
+ */
+function searchUsers(prefix, { limit, offset }) {
+  const { total, values } = index.search(prefix, { limit, offset });
+  return { total, users: values };
+}
+
+export {
+  loadUserIndex,
+  searchUsers,
+};
@@ -0,0 +1,128 @@
+/**
+ * Content-addressed avatar storage.
+ * - storeAvatar(): streams an upload to a temp file while hashing it, then resizes it into AVATAR_SIZES
+ * - files are named <sha256 prefix>-<size>.webp, so identical uploads are stored once and a name never
+ *   changes content: they can be cached as immutable by browsers and the gateway
+ * - removeAvatar(): deletes every size of a stored avatar (or a legacy single-file upload)
+ */
+import { createWriteStream, promises as fsp } from 'fs';
+import path from 'path';
+import crypto from 'crypto';
+import { Transform } from 'stream';
+import { pipeline } from 'stream/promises';
+import { fileTypeFromFile } from 'file-type';
+import sharp from 'sharp';
+
+import { ValidationError } from './errors.js';
+import { histogram, startTimer } from './metrics.js';
+
+// Square sizes, in px: 2x of the 24px search results, the 44px rows/navbar icons and the 128px profile picture.
+// The stored avatarUrl points to the largest one; clients swap the size for the one they draw.
+const AVATAR_SIZES = [48, 96, 256];
+const AVATAR_NAME_REGEX = /^([0-9a-f]{32})-(\d+)\.webp$/;
+
+const ALLOWED_MIME_TYPES = new Set(['image/jpeg', 'image/png', 'image/webp', 'image/gif']);
+// Anything bigger than this once decoded is rejected before resizing (decompression bombs)
+const MAX_INPUT_PIXELS = 40_000_000;
+
+const resizeDuration = histogram('auth_avatar_resize_duration_seconds', 'Time to resize one upload into every avatar size');
+
+const avatarFilename = (hash, size) => `${hash}-${size}.webp`;
+
+// Write to a temp name and rename, so a reader never sees a half-written file
+const writeVariant = async (source, dir, hash, size) => {
+  const target = path.join(dir, avatarFilename(hash, size));
+  const tmp = `${target}.${crypto.randomBytes(6).toString('hex')}.tmp`;
+  try {
+    await sharp(source, { limitInputPixels: MAX_INPUT_PIXELS })
+      .rotate() // apply the EXIF orientation before it is stripped
+      .resize(size, size, { fit: 'cover' })
+      .webp({ quality: 82 })
+      .toFile(tmp);
+    await fsp.rename(tmp, target);
+  } catch (err) {
+    await fsp.unlink(tmp).catch(() => {});
+    throw err;
+  }
+};
+
+/**
+ * Store an uploaded image under dir.
+ * @param {import('stream').Readable} stream - the multipart file stream; fails if it hits the upload size limit
+ * @param {string} dir - avatars directory
+ * @returns {Promise<{filename: string, reused: boolean}>} filename of the largest size; reused if this
+ *          exact image was already stored
+ */
+const storeAvatar = async (stream, dir) => {
+  const tmp = path.join(dir, `upload-${crypto.randomBytes(8).toString('hex')}.tmp`);
+  const hash = crypto.createHash('sha256');
+  try {
+    // Hash while writing, so the upload is never held in memory
+    try {
+      await pipeline(
+        stream,
+        new Transform({
+          transform(chunk, encoding, callback) {
+            hash.update(chunk);
+            callback(null, chunk);
+          }
+        }),
+        createWriteStream(tmp)
+      );
+    } catch (err) {
+      throw new ValidationError(err.code === 'FST_REQ_FILE_TOO_LARGE' ? 'File too large' : 'Failed to process uploaded file');
+    }
+
+    // Validate using magic bytes
+    const ft = await fileTypeFromFile(tmp);
+    if (!ft || !ALLOWED_MIME_TYPES.has(ft.mime)) {
+      throw new ValidationError('Unsupported image format');
+    }
+
+    const digest = hash.digest('hex').slice(0, 32);
+    const filename = avatarFilename(digest, AVATAR_SIZES[AVATAR_SIZES.length - 1]);
+    const exists = await fsp.access(path.join(dir, filename)).then(() => true, () => false);
+    if (exists) return { filename, reused: true };
+
+    const elapsed = startTimer();
+    try {
+      // Largest last: its presence marks the set as complete for the check above
+      for (const size of AVATAR_SIZES) await writeVariant(tmp, dir, digest, size);
+    } catch (err) {
+      throw new ValidationError('Failed to process uploaded image');
+    } finally {
+      resizeDuration.observe({}, elapsed());
+    }
+    return { filename, reused: false };
+  } finally {
+    await fsp.unlink(tmp).catch(() => {});
+  }
+};
+
+/**
+ * Content hash of a stored avatar filename, or null for legacy uploads and foreign URLs.
+ * @param {string} filename
+ */
+const avatarHash = (filename) => filename.match(AVATAR_NAME_REGEX)?.[1] ?? null;
+
+/**
+ * Delete a stored avatar: every size for content-addressed names, the single file otherwise.
+ * Only touches plain filenames directly inside dir.
+ * @param {string} dir - avatars directory
+ * @param {string} filename
+ */
+const removeAvatar = async (dir, filename) => {
+  if (!filename || filename !== path.basename(filename)) return;
+  const hash = avatarHash(filename);
+  const names = hash ? AVATAR_SIZES.map((size) => avatarFilename(hash, size)) : [filename];
+  await Promise.all(names.map((name) => fsp.unlink(path.join(dir, name)).catch((err) => {
+    if (err.code !== 'ENOENT') throw err;
+  })));
+};
+
+export {
+  AVATAR_SIZES,
+  storeAvatar,
+  avatarHash,
+  removeAvatar,
+};
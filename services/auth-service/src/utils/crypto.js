@@ -8,11 +8,24 @@ import { scryptSync, randomBytes, createCipheriv, createDecipheriv } from 'crypt
 import {
   InvalidCredentialsError,
 } from '../utils/errors.js';
+import { histogram, startTimer } from './metrics.js';
 
 const SALT_ROUNDS = 12;
 
-const hashPassword = (password) => bcrypt.hash(password, SALT_ROUNDS);
-const comparePassword = (password, hash) => bcrypt.compare(password, hash);
+// bcrypt at cost 12 is the most expensive thing login/register do, so it gets its own histogram
+const bcryptDuration = histogram('auth_bcrypt_duration_seconds', 'bcrypt hash/compare time (passwords, PIN codes, backup codes)');
+
+const timedBcrypt = async (op, run) => {
+  const elapsed = startTimer();
+  try {
+    return await run();
+  } finally {
+    bcryptDuration.observe({ op }, elapsed());
+  }
+};
+
+const hashPassword = (password) => timedBcrypt('hash', () => bcrypt.hash(password, SALT_ROUNDS));
+const comparePassword = (password, hash) => timedBcrypt('compare', () => bcrypt.compare(password, hash));
 
 // HASH for refresh tokens (SHA-256)
 function hashToken(token) {
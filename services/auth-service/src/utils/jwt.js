@@ -4,18 +4,52 @@
  * Possibly decode tokens for user identification
  */
 
+import fs from 'fs';
+import path from 'path';
 import jwt from 'jsonwebtoken';
+import { randomUUID, createPrivateKey, createPublicKey, generateKeyPairSync } from 'crypto';
 
 import { models } from '../db/index.js';
 import { InvalidCredentialsError } from './errors.js'
 import { hashToken } from './crypto.js';
 
-const JWT_SECRET = process.env.JWT_SECRET;
 const JWT_REFRESH_SECRET = process.env.JWT_REFRESH_SECRET;
 const ACCESS_EXPIRATION = process.env.JWT_ACCESS_EXPIRATION || '15m';
 const REFRESH_EXPIRATION = process.env.JWT_REFRESH_EXPIRATION || '7d';
 const { RefreshToken } = models;
 
+// Access tokens are signed with RS256, so the other services verify them with the public key
+// alone (GET /auth/public-key) and nothing outside auth-service can sign one. The private key
+// lives in JWT_ACCESS_KEY_FILE (on the data volume by default) and is generated on first use.
+const DEFAULT_ACCESS_KEY_FILE = './data/jwt_access_key.pem';
+let accessKeys = null;
+
+function getAccessKeys() {
+  if (!accessKeys) {
+    const keyFile = process.env.JWT_ACCESS_KEY_FILE || DEFAULT_ACCESS_KEY_FILE;
+    let privateKey;
+    try {
+      privateKey = createPrivateKey(fs.readFileSync(keyFile));
+    } catch (err) {
+      if (err.code !== 'ENOENT') throw err;
+      ({ privateKey } = generateKeyPairSync('rsa', { modulusLength: 2048 }));
+      fs.mkdirSync(path.dirname(keyFile), { recursive: true });
+      fs.writeFileSync(keyFile, privateKey.export({ type: 'pkcs8', format: 'pem' }), { mode: 0o600 });
+    }
+    accessKeys = { privateKey, publicKey: createPublicKey(privateKey) };
+  }
+  return accessKeys;
+}
+
+/**
+ * Public key that verifies access tokens, for the other services.
+ * @returns {string} SPKI PEM.
+ */
+
+function getAccessPublicKey() {
+  return getAccessKeys().publicKey.export({ type: 'spki', format: 'pem' });
+}
+
 /**
  * Generate Access JWT token(short-lived).
  * @param {object} payload - Data to encode in the token(e.g., { id: userId }).
@@ -23,7 +57,7 @@ const { RefreshToken } = models;
  */
 
 function generateAccessToken(payload) {
-  return jwt.sign(payload, JWT_SECRET, { expiresIn: ACCESS_EXPIRATION });
+  return jwt.sign(payload, getAccessKeys().privateKey, { algorithm: 'RS256', expiresIn: ACCESS_EXPIRATION });
 }
 
 /**
@@ -33,7 +67,8 @@ function generateAccessToken(payload) {
  */
 
 function generateRefreshToken(payload) {
-  return jwt.sign(payload, JWT_REFRESH_SECRET, { expiresIn: REFRESH_EXPIRATION });
+  // jwtid: tokens issued to the same user within one second would otherwise be identical, and share a tokenHash
+  return jwt.sign(payload, JWT_REFRESH_SECRET, { expiresIn: REFRESH_EXPIRATION, jwtid: randomUUID() });
 }
 
 /**
@@ -45,7 +80,7 @@ function generateRefreshToken(payload) {
  */
 
 function verifyAccessToken(token) {
-  return jwt.verify(token, JWT_SECRET);
+  return jwt.verify(token, getAccessKeys().publicKey, { algorithms: ['RS256'] });
 }
 
 /**
@@ -78,9 +113,10 @@ function decodeToken(token) {
  * @param {string} userId
  * @param {string|null} ip
  * @param {string|null} userAgent
+ * @param {object} [options] - Sequelize options for the insert, e.g. { transaction }
  * @returns {Promise<Object>} created RefreshToken row
  */
-async function storeRefreshTokenHash(rawRefreshToken, userId, ip = null, userAgent = null) {
+async function storeRefreshTokenHash(rawRefreshToken, userId, ip = null, userAgent = null, options = {}) {
   if (!rawRefreshToken || !userId) {
     throw new InvalidCredentialsError('Token and userId are required');
   }
@@ -105,7 +141,7 @@ async function storeRefreshTokenHash(rawRefreshToken, userId, ip = null, userAge
     expiresAt,
     ipAddress: ip,
     userAgent
-  });
+  }, options);
 
   return created;
 }
@@ -127,7 +163,7 @@ async function validateRefreshToken(rawRefreshToken) {
 
   if (!tokenRow) throw new Error('Refresh token not found');            // invalid
   if (tokenRow.revokedAt) throw new Error('Refresh token revoked');     // revoked
-  if (tokenRow.replacedByToken) throw new Error('Refresh token rotated'); // rotated/replaced
+  if (tokenRow.replacedByTokenHash) throw new Error('Refresh token rotated'); // rotated/replaced
   if (tokenRow.expiresAt && new Date() > tokenRow.expiresAt) throw new Error('Refresh token expired');
 
   // return both decoded payload and DB row for further processing
@@ -151,6 +187,7 @@ export {
   generateRefreshToken,
   verifyAccessToken,
   verifyRefreshToken,
+  getAccessPublicKey,
   decodeToken,
   storeRefreshTokenHash,
   validateRefreshToken,
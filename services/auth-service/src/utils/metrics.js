@@ -0,0 +1,44 @@
+/**
+ * Prometheus metrics of auth-service, on the registry shared by every service (services/shared/metrics.js).
+ * - histogram()/counter(): updated on the hot paths (routes, SQL queries, bcrypt)
+ * - collector(): read at scrape time, for values that already live elsewhere
+ * - observeSql(): the Sequelize query timings
+ */
+import fp from 'fastify-plugin';
+import { counter, histogram, collector, startTimer, registerMetrics } from '../../../shared/metrics.js';
+
+const sqlDuration = histogram('auth_sql_query_duration_seconds', 'Sequelize query time by statement verb and table');
+
+// "Executed (default): SELECT `id`, ... FROM `Users` AS `User` WHERE ..." -> { verb: 'SELECT', table: 'Users' }
+const SQL_VERB_REGEX = /:\s*(\w+)/;
+const SQL_TABLE_REGEX = /\b(?:FROM|INTO|UPDATE|TABLE)\s+[`"']?(\w+)/i;
+
+/**
+ * Sequelize `logging` callback; with `benchmark: true` it receives the query time in ms.
+ */
+const observeSql = (sql, ms) => {
+  if (typeof ms !== 'number') return;
+  sqlDuration.observe({
+    verb: (sql.match(SQL_VERB_REGEX)?.[1] ?? 'unknown').toUpperCase(),
+    table: sql.match(SQL_TABLE_REGEX)?.[1] ?? 'none',
+  }, ms / 1000);
+};
+
+/**
+ * Per-route latency hooks and GET /metrics.
+ * Registered with fastify-plugin so the hooks apply to every route, not just this plugin's scope.
+ * @param {*} fastify
+ */
+async function metricsPlugin(fastify) {
+  registerMetrics(fastify);
+}
+
+export {
+  counter,
+  histogram,
+  collector,
+  startTimer,
+  observeSql,
+};
+
+export default fp(metricsPlugin);
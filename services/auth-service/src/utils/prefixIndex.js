@@ -0,0 +1,80 @@
+/**
+ * Sorted in-memory index for case-insensitive prefix search.
+ * - entries are kept sorted by their lowercased key, so a prefix is one binary search away
+ * - set()/remove() keep the order with a splice: O(n) per change, O(log n + results) per search
+ * - entries are looked up by id too, so a renamed user drops its old key
+ */
+
+const byKey = (a, b) => (a.key < b.key ? -1 : a.key > b.key ? 1 : 0);
+
+const createPrefixIndex = () => {
+  const sorted = [];
+  const byId = new Map();
+
+  // First position whose key is >= key
+  const lowerBound = (key) => {
+    let lo = 0;
+    let hi = sorted.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >>> 1;
+      if (sorted[mid].key < key) lo = mid + 1;
+      else hi = mid;
+    }
+    return lo;
+  };
+
+  const remove = (id) => {
+    const entry = byId.get(id);
+    if (!entry) return;
+    byId.delete(id);
+    // Keys are not unique across ids in general, so find this exact entry among equal keys
+    for (let i = lowerBound(entry.key); i < sorted.length && sorted[i].key === entry.key; i++) {
+      if (sorted[i] === entry) {
+        sorted.splice(i, 1);
+        return;
+      }
+    }
+  };
+
+  // value is whatever search() should return for this id; key is matched case-insensitively
+  const set = (id, key, value) => {
+    remove(id);
+    const entry = { id, key: key.toLowerCase(), value };
+    byId.set(id, entry);
+    let i = lowerBound(entry.key);
+    while (i < sorted.length && sorted[i].key === entry.key) i++;
+    sorted.splice(i, 0, entry);
+  };
+
+  const load = (items) => {
+    sorted.length = 0;
+    byId.clear();
+    for (const { id, key, value } of items) {
+      const entry = { id, key: key.toLowerCase(), value };
+      byId.set(id, entry);
+      sorted.push(entry);
+    }
+    sorted.sort(byKey);
+  };
+
+  /**
+   * @param {string} prefix
+   * @param {{limit: number, offset: number}} page
+   * @returns {{total: number, values: Array}} total is every match, values the requested page
+   */
+  const search = (prefix, { limit, offset }) => {
+    const key = prefix.toLowerCase();
+    const start = lowerBound(key);
+    // Every key that starts with `key` sorts before key + U+FFFF
+    const end = key ? lowerBound(`${key}\uffff`) : sorted.length;
+    const from = Math.min(start + offset, end);
+    return {
+      total: end - start,
+      values: sorted.slice(from, Math.min(from + limit, end)).map((entry) => entry.value),
+    };
+  };
+
+  return { set, remove, load, search, get size() { return sorted.length; } };
+};
+
+export { createPrefixIndex };
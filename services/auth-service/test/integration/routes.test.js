@@ -121,3 +121,68 @@ describe('Auth Routes', () => {
     });
   });
 });
+
+describe('GET /users/search', () => {
+  const fs = require('fs');
+  const os = require('os');
+  const path = require('path');
+  const Fastify = require('fastify');
+  const usernames = ['alice', 'Alfred', 'albert', 'bob'];
+  let server;
+  let uploads;
+
+  beforeAll(async () => {
+    // The search index is loaded from these users instead of the database
+    jest.doMock('../../src/db/index.js', () => ({
+      models: {
+        User: {
+          addHook: jest.fn(),
+          findAll: jest.fn(async () => usernames.map((username, id) => ({ id, username, avatarUrl: null })))
+        }
+      }
+    }));
+    let loadUserIndex, userRoutes, errorResponseSchema;
+    jest.isolateModules(() => {
+      ({ loadUserIndex } = require('../../src/services/userSearch.service.js'));
+      userRoutes = require('../../src/routes/user.routes.js').default;
+      errorResponseSchema = require('../../src/schemas/errorResponse.schema.js').default;
+    });
+    await loadUserIndex();
+
+    uploads = fs.mkdtempSync(path.join(os.tmpdir(), 'avatars-'));
+    process.env.AVATAR_UPLOAD_PATH = uploads;
+    server = Fastify();
+    server.addSchema(errorResponseSchema);
+    server.decorate('authenticate', async (req) => {
+      req.user = { id: 'u1', username: 'tester', email: 't@example.com', role: 'user' };
+    });
+    await server.register(userRoutes);
+    await server.ready();
+  });
+
+  afterAll(async () => {
+    await server.close();
+    fs.rmSync(uploads, { recursive: true, force: true });
+    jest.dontMock('../../src/db/index.js');
+  });
+
+  test('should return one page of prefix matches and the total across pages', async () => {
+    const response = await server.inject({
+      method: 'GET',
+      url: '/users/search',
+      query: { q: 'AL', limit: '1' }
+    });
+    expect(response.statusCode).toBe(200);
+    expect(response.headers['x-total-count']).toBe('3');
+    expect(response.json()).toEqual({ total: 3, users: [{ username: 'albert', avatarUrl: null }] });
+  });
+
+  test('should reject a page larger than 50', async () => {
+    const response = await server.inject({
+      method: 'GET',
+      url: '/users/search',
+      query: { q: 'AL', limit: '51' }
+    });
+    expect(response.statusCode).toBe(400);
+  });
+});
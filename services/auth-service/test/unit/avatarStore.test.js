@@ -0,0 +1,50 @@
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { AVATAR_SIZES, storeAvatar, avatarHash, removeAvatar } from "../../src/utils/avatarStore";
+
+describe('Content-addressed avatar storage', () => {
+   const fixture = (name) => fs.createReadStream(path.join(__dirname, '..', 'avatars', name));
+   let dir;
+
+   beforeEach(() => {
+      dir = fs.mkdtempSync(path.join(os.tmpdir(), 'avatars-'));
+   });
+
+   afterEach(() => {
+      fs.rmSync(dir, { recursive: true, force: true });
+   });
+
+   test('Test1: storeAvatar should write every size under a content-hash name and no temp files', async () => {
+      const { filename, reused } = await storeAvatar(fixture('valid-avatar.png'), dir);
+      const hash = avatarHash(filename);
+
+      expect(reused).toBe(false);
+      expect(hash).toMatch(/^[0-9a-f]{32}$/);
+      expect(filename).toBe(`${hash}-${AVATAR_SIZES[AVATAR_SIZES.length - 1]}.webp`);
+      expect(fs.readdirSync(dir).sort()).toEqual(AVATAR_SIZES.map((size) => `${hash}-${size}.webp`).sort());
+   });
+
+   test('Test2: storing the same image twice should reuse the existing files', async () => {
+      const first = await storeAvatar(fixture('valid-avatar.png'), dir);
+      const second = await storeAvatar(fixture('valid-avatar.png'), dir);
+
+      expect(second).toEqual({ filename: first.filename, reused: true });
+      expect(fs.readdirSync(dir)).toHaveLength(AVATAR_SIZES.length);
+   });
+
+   test('Test3: storeAvatar should reject unsupported formats and leave nothing behind', async () => {
+      await expect(storeAvatar(fixture('invalid-ext.avif'), dir)).rejects.toThrow('Unsupported image format');
+      expect(fs.readdirSync(dir)).toEqual([]);
+   });
+
+   test('Test4: removeAvatar should delete every size and ignore paths outside the directory', async () => {
+      const { filename } = await storeAvatar(fixture('valid-avatar.png'), dir);
+
+      await removeAvatar(dir, `../${filename}`);
+      expect(fs.readdirSync(dir)).toHaveLength(AVATAR_SIZES.length);
+
+      await removeAvatar(dir, filename);
+      expect(fs.readdirSync(dir)).toEqual([]);
+   });
+});
@@ -1,16 +1,24 @@
 import dotenv from 'dotenv';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
 import jwt from 'jsonwebtoken';
 import {
    generateAccessToken,
    generateRefreshToken,
    verifyAccessToken,
    verifyRefreshToken,
+   getAccessPublicKey,
    decodeToken,
  } from '../../src/utils/jwt.js';
 
 // Load environment variables
 dotenv.config();
 
+// A key pair of the test's own, generated on first use
+const keyDir = fs.mkdtempSync(path.join(os.tmpdir(), 'jwt-test-'));
+process.env.JWT_ACCESS_KEY_FILE = path.join(keyDir, 'access.pem');
+
 decribe('JWT Service Functions', () => {
    const payload = {
       id: 'dfs1444211',
@@ -21,7 +29,7 @@ decribe('JWT Service Functions', () => {
       const token = generateAccessToken(payload);
       expect(typeof token).toBe('string');
 
-      const decoded = jwt.verify(token, process.env.JWT_SECRET);
+      const decoded = jwt.verify(token, getAccessPublicKey(), { algorithms: ['RS256'] });
       expect(decoded.id).toBe(payload.id);
       expect(decoded.email).toBe(payload.email);
    });
@@ -47,6 +55,17 @@ decribe('JWT Service Functions', () => {
       expect(() => verifyAccessToken('invalid-token')).toThrow();
    });
 
+   test('Test4b: verifyAccessToken should reject a token not signed with the private key', () => {
+      const forged = jwt.sign(payload, 'some-shared-secret', { algorithm: 'HS256' });
+      expect(() => verifyAccessToken(forged)).toThrow();
+   });
+
+   test('Test4c: the key pair is kept in JWT_ACCESS_KEY_FILE', () => {
+      generateAccessToken(payload);
+      expect(fs.existsSync(process.env.JWT_ACCESS_KEY_FILE)).toBe(true);
+      expect(getAccessPublicKey()).toMatch(/^-----BEGIN PUBLIC KEY-----/);
+   });
+
    test('Test5: verifyRefreshToken should return payload for valid Refresh token', () => {
       const token = generateRefreshToken(payload);
       const decoded = verifyRefreshToken(token);
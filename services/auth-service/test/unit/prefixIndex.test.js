@@ -0,0 +1,51 @@
+import { createPrefixIndex } from "../../src/utils/prefixIndex";
+
+describe('Prefix index for user search', () => {
+   const user = (username) => ({ username });
+   let index;
+
+   beforeEach(() => {
+      index = createPrefixIndex();
+      index.load([
+         { id: 1, key: 'alice', value: user('alice') },
+         { id: 2, key: 'Alfred', value: user('Alfred') },
+         { id: 3, key: 'bob', value: user('bob') },
+         { id: 4, key: 'albert', value: user('albert') },
+      ]);
+   });
+
+   test('Test1: search should return case-insensitive prefix matches sorted by key', () => {
+      const { total, values } = index.search('AL', { limit: 10, offset: 0 });
+
+      expect(total).toBe(3);
+      expect(values.map((v) => v.username)).toEqual(['albert', 'Alfred', 'alice']);
+   });
+
+   test('Test2: limit and offset should page through the matches, total should count all of them', () => {
+      const page = index.search('al', { limit: 2, offset: 2 });
+
+      expect(page.total).toBe(3);
+      expect(page.values.map((v) => v.username)).toEqual(['alice']);
+      expect(index.search('al', { limit: 2, offset: 5 }).values).toEqual([]);
+   });
+
+   test('Test3: an empty prefix should match every entry', () => {
+      expect(index.search('', { limit: 10, offset: 0 }).total).toBe(4);
+   });
+
+   test('Test4: set should replace the old key of a renamed entry', () => {
+      index.set(3, 'alberta', user('alberta'));
+
+      expect(index.search('b', { limit: 10, offset: 0 }).total).toBe(0);
+      expect(index.search('alb', { limit: 10, offset: 0 }).values.map((v) => v.username)).toEqual(['albert', 'alberta']);
+      expect(index.size).toBe(4);
+   });
+
+   test('Test5: remove should drop the entry and ignore unknown ids', () => {
+      index.remove(1);
+      index.remove(42);
+
+      expect(index.search('ali', { limit: 10, offset: 0 }).total).toBe(0);
+      expect(index.size).toBe(3);
+   });
+});
@@ -0,0 +1,65 @@
+import { sequelize, models, initDB } from "../../src/db/index.js";
+import {
+   markRevoked,
+   isRevoked,
+   loadRevokedTokens,
+   sweepRefreshTokens,
+} from "../../src/services/refreshTokenStore.service.js";
+
+describe('Refresh token sweeper and revocation cache', () => {
+   const { User, RefreshToken } = models;
+   const HOUR = 60 * 60 * 1000;
+   const ago = (ms) => new Date(Date.now() - ms);
+   const fromNow = (ms) => new Date(Date.now() + ms);
+   let userId;
+
+   const token = (tokenHash, expiresAt, revokedAt = null) =>
+      RefreshToken.create({ tokenHash, userId, expiresAt, revokedAt });
+
+   beforeAll(async () => {
+      process.env.DB_PATH = ':memory:';
+      await initDB();
+      const user = await User.create({ email: 'sweeper@example.com', passwordHash: 'hashedpassword' });
+      userId = user.id;
+   });
+
+   afterAll(async () => {
+      await sequelize.close();
+   });
+
+   beforeEach(async () => {
+      await RefreshToken.destroy({ where: {} });
+   });
+
+   test('Test1: sweepRefreshTokens should delete expired and long-revoked rows only', async () => {
+      await token('expired', ago(HOUR));
+      await token('revoked-long-ago', fromNow(HOUR), ago(48 * HOUR));
+      await token('revoked-recently', fromNow(HOUR), ago(HOUR));
+      await token('live', fromNow(HOUR));
+
+      const deleted = await sweepRefreshTokens();
+      const left = await RefreshToken.findAll({ attributes: ['tokenHash'], order: [['tokenHash', 'ASC']], raw: true });
+
+      expect(deleted).toBe(2);
+      expect(left.map((row) => row.tokenHash)).toEqual(['live', 'revoked-recently']);
+   });
+
+   test('Test2: loadRevokedTokens should remember revoked tokens that have not expired', async () => {
+      await token('revoked', fromNow(HOUR), ago(HOUR));
+      await token('revoked-expired', ago(HOUR), ago(2 * HOUR));
+      await token('live', fromNow(HOUR));
+
+      expect(await loadRevokedTokens()).toBe(1);
+      expect(isRevoked('revoked')).toBe(true);
+      expect(isRevoked('revoked-expired')).toBe(false);
+      expect(isRevoked('live')).toBe(false);
+   });
+
+   test('Test3: markRevoked should ignore tokens that have already expired', () => {
+      markRevoked('just-revoked', fromNow(HOUR));
+      markRevoked('already-expired', ago(1000));
+
+      expect(isRevoked('just-revoked')).toBe(true);
+      expect(isRevoked('already-expired')).toBe(false);
+   });
+});
@@ -0,0 +1,65 @@
+import Fastify from 'fastify';
+import dotenv from 'dotenv';
+import fastifyJwt from '@fastify/jwt';
+import fastifyWebsocket from '@fastify/websocket';
+import gameRoutes from './routes/game.js';
+import { startTicker } from './game/rooms.js';
+import { startResultSubmitter } from './utils/stats.js';
+import { loadAccessPublicKey, accessKeyJwtOptions } from '../shared/accessKey.js';
+
+dotenv.config();
+
+const fastify = Fastify({
+  logger: true,
+  ignoreTrailingSlash: true,
+});
+
+// Players' access tokens are verified with auth-service's public key
+const publicKey = await loadAccessPublicKey(fastify.log);
+if (!publicKey) {
+  console.error('❌ The access token public key is required');
+  process.exit(1);
+}
+fastify.register(fastifyJwt, accessKeyJwtOptions(publicKey));
+// Input messages are 6 bytes; anything much larger is not a client of ours
+fastify.register(fastifyWebsocket, { options: { maxPayload: 1024 } });
+fastify.register(gameRoutes);
+
+startResultSubmitter(fastify);
+startTicker(fastify);
+
+const start = async () => {
+    try
+    {
+        const port = process.env.PORT || 3001;
+
+        await fastify.ready();
+        console.log(fastify.printRoutes());
+
+        await fastify.listen({ port, host: '0.0.0.0' });
+        console.log("✅ Server is running!");
+    }
+    catch (err)
+    {
+        fastify.log.error(err);
+        console.error("❌ Server failed to start:", err);
+        process.exit(1);
+    }
+};
+
+start();
+
+const gracefullShutdown = async (signal) => {
+    fastify.log.info(`Received ${signal}, shutting down gracefully...`);
+    try {
+      await fastify.close();
+      fastify.log.info('Server closed successfully');
+    } catch (err) {
+      fastify.log.error('Error during shutdown:', err);
+      process.exit(1);
+    }
+    process.exit(0);
+  };
+
+  process.on('SIGINT', gracefullShutdown);
+  process.on('SIGTERM', gracefullShutdown);
@@ -0,0 +1,249 @@
+// Server-side port of the Pong loop in frontend/game/main.tsx. Units are the client's: positions
+// in world units on the x/z floor plane, speeds in units per 60 Hz frame, so one tick here is one
+// frame there. Paddle 1 is on the +x side and paddle 2 on the -x side; "up" moves towards -z.
+export const TICK_RATE = 60;
+
+export const BUTTON_UP = 1;
+export const BUTTON_DOWN = 2;
+export const BUTTON_BOOST = 4;
+export const BUTTON_SHIELD = 8;
+
+export const PHASE_WAITING = 0;
+export const PHASE_SERVE = 1;
+export const PHASE_PLAY = 2;
+export const PHASE_ENDED = 3;
+
+// What the ball last bounced off, sent to clients for sounds and flashes
+export const HIT_WALL = 0;
+export const HIT_PADDLE1 = 1;
+export const HIT_PADDLE2 = 2;
+export const HIT_SHIELD1 = 3;
+export const HIT_SHIELD2 = 4;
+export const HIT_OBSTACLE = 5;
+export const HIT_BOOSTED = 0x80;
+
+export const MAX_SHIELD_HP = 3;
+
+const BALL_RADIUS = 0.2;
+const PADDLE_HALF_X = 0.15;
+const PADDLE_SPEED = 0.2;
+const SHIELD_HALF_X = 0.1;
+const SHIELD_HALF_Z = 0.75;
+const SHIELD_GAP = 0.05;
+const WALL_HALF_X = 50;
+const WALL_HALF_Z = 0.25;
+const BOOST_MULTIPLIER = 1.25;
+// The ball is out once it is this far behind a paddle
+const OUT_MARGIN = 1.5;
+// Covers the client's explode and gather animations (500 ms + gather) before the next serve
+const SERVE_TICKS = Math.round(1.2 * TICK_RATE);
+// At most this many bounces are resolved in one tick
+const MAX_BOUNCES = 4;
+
+// frontend/game/objects.tsx and maps.tsx; the large maps scale the field by 2 and paddles by 1.5
+const LARGE_WALL_Z = 6.2 * 2;
+export const FIELDS = {
+  default: { paddleDistance: 8, paddleHalfZ: 1, wallZ: 6.2, speedMultiplier: 1, obstacles: [] },
+  large: { paddleDistance: 8 * 2.3, paddleHalfZ: 1.5, wallZ: LARGE_WALL_Z, speedMultiplier: 2, obstacles: [] },
+  obstacles: {
+    paddleDistance: 8 * 2.3,
+    paddleHalfZ: 1.5,
+    wallZ: LARGE_WALL_Z,
+    speedMultiplier: 2,
+    obstacles: [
+      { x: 0, z: LARGE_WALL_Z * 0.4, halfX: 6, halfZ: 0.1 },
+      { x: 0, z: -LARGE_WALL_Z * 0.4, halfX: 6, halfZ: 0.1 }
+    ]
+  }
+};
+
+// baseSpeed is one of the client's SPEED_MAP presets (0.12 - 0.22)
+export function createGame(mapKey, baseSpeed, winTarget) {
+  const field = FIELDS[mapKey] ?? FIELDS.default;
+  const paddle = (x) => ({
+    x,
+    z: 0,
+    buttons: 0,
+    shield: { hp: MAX_SHIELD_HP, active: false, held: false, x: 0, z: 0 }
+  });
+  const game = {
+    field,
+    speed: baseSpeed * field.speedMultiplier,
+    winTarget,
+    limitZ: field.wallZ - WALL_HALF_Z - field.paddleHalfZ,
+    ball: { x: 0, z: 0, vx: 0, vz: 0 },
+    paddles: [paddle(field.paddleDistance), paddle(-field.paddleDistance)],
+    score: [0, 0],
+    boostLevel: 0,
+    phase: PHASE_WAITING,
+    countdown: 0,
+    // Wrapping counter of bounces, so a client that missed a snapshot still sees that one happened
+    hits: 0,
+    lastHit: HIT_WALL,
+    tick: 0
+  };
+  game.walls = [
+    { x: 0, z: field.wallZ, halfX: WALL_HALF_X, halfZ: WALL_HALF_Z, hit: HIT_WALL },
+    { x: 0, z: -field.wallZ, halfX: WALL_HALF_X, halfZ: WALL_HALF_Z, hit: HIT_WALL },
+    ...field.obstacles.map((o) => ({ ...o, hit: HIT_OBSTACLE }))
+  ];
+  return game;
+}
+
+// resetBall() in main.tsx: centre the ball and paddles, restore the shields, count down to the serve
+export function serve(game) {
+  const nx = 0.07;
+  const nz = 0.04;
+  const s = game.speed / Math.hypot(nx, nz);
+  game.ball.x = 0;
+  game.ball.z = 0;
+  game.ball.vx = (Math.random() < 0.5 ? -1 : 1) * nx * s;
+  game.ball.vz = (Math.random() < 0.5 ? -1 : 1) * nz * s;
+  game.boostLevel = 0;
+  for (const p of game.paddles) {
+    p.z = 0;
+    p.shield.hp = MAX_SHIELD_HP;
+    p.shield.active = false;
+  }
+  game.phase = PHASE_SERVE;
+  game.countdown = SERVE_TICKS;
+}
+
+export function setButtons(game, side, buttons) {
+  game.paddles[side].buttons = buttons;
+}
+
+// Shields can only be raised while the ball is in play, as on the client
+function movePaddles(game, allowShield) {
+  const speed = PADDLE_SPEED * game.field.speedMultiplier;
+  for (const p of game.paddles) {
+    if (p.buttons & BUTTON_UP) p.z -= speed;
+    if (p.buttons & BUTTON_DOWN) p.z += speed;
+    p.z = Math.min(Math.max(p.z, -game.limitZ), game.limitZ);
+
+    // The shield goes up in front of the paddle where it is when pressed, and stays there while held
+    const shield = p.shield;
+    const pressed = (p.buttons & BUTTON_SHIELD) !== 0;
+    if (pressed && !shield.held && shield.hp > 0 && allowShield) {
+      const centerDir = p.x > 0 ? -1 : 1;
+      shield.x = p.x + centerDir * (PADDLE_HALF_X + SHIELD_HALF_X + SHIELD_GAP);
+      shield.z = p.z;
+      shield.active = true;
+    } else if (!pressed) {
+      shield.active = false;
+    }
+    shield.held = pressed;
+  }
+}
+
+function colliders(game) {
+  const [p1, p2] = game.paddles;
+  const boxes = [
+    ...game.walls,
+    { x: p1.x, z: p1.z, halfX: PADDLE_HALF_X, halfZ: game.field.paddleHalfZ, hit: HIT_PADDLE1, side: 0 },
+    { x: p2.x, z: p2.z, halfX: PADDLE_HALF_X, halfZ: game.field.paddleHalfZ, hit: HIT_PADDLE2, side: 1 }
+  ];
+  game.paddles.forEach((p, side) => {
+    if (p.shield.active) {
+      boxes.push({ x: p.shield.x, z: p.shield.z, halfX: SHIELD_HALF_X, halfZ: SHIELD_HALF_Z, hit: side === 0 ? HIT_SHIELD1 : HIT_SHIELD2, side });
+    }
+  });
+  return boxes;
+}
+
+// First box the ball (a circle) touches moving `length` along (dx, dz), by the slab test against
+// each box grown by the ball radius. Boxes the ball already overlaps are ignored, so it cannot stick.
+function firstHit(ball, dx, dz, length, boxes) {
+  let best = null;
+  for (const box of boxes) {
+    const hx = box.halfX + BALL_RADIUS;
+    const hz = box.halfZ + BALL_RADIUS;
+    let tEnter = -Infinity;
+    let tExit = Infinity;
+    let axis = null;
+    for (const [o, d, min, max, name] of [[ball.x, dx, box.x - hx, box.x + hx, 'x'], [ball.z, dz, box.z - hz, box.z + hz, 'z']]) {
+      if (d === 0) {
+        if (o < min || o > max) { tEnter = Infinity; break; }
+        continue;
+      }
+      let t1 = (min - o) / d;
+      let t2 = (max - o) / d;
+      if (t1 > t2) [t1, t2] = [t2, t1];
+      if (t1 > tEnter) { tEnter = t1; axis = name; }
+      tExit = Math.min(tExit, t2);
+    }
+    if (tEnter < 0 || tEnter > tExit || tEnter > length) continue;
+    if (!best || tEnter < best.t) best = { t: tEnter, axis, box };
+  }
+  return best;
+}
+
+function bounce(game, hit) {
+  const ball = game.ball;
+  if (hit.axis === 'x') ball.vx = -ball.vx;
+  else ball.vz = -ball.vz;
+
+  let code = hit.box.hit;
+  if (code === HIT_SHIELD1 || code === HIT_SHIELD2) {
+    const shield = game.paddles[hit.box.side].shield;
+    shield.hp -= 1;
+    if (shield.hp <= 0) shield.active = false;
+  } else if ((code === HIT_PADDLE1 || code === HIT_PADDLE2) && (game.paddles[hit.box.side].buttons & BUTTON_BOOST)) {
+    ball.vx *= BOOST_MULTIPLIER;
+    ball.vz *= BOOST_MULTIPLIER;
+    game.boostLevel++;
+    code |= HIT_BOOSTED;
+  }
+  game.lastHit = code;
+  game.hits = (game.hits + 1) & 0xff;
+}
+
+function moveBall(game) {
+  const ball = game.ball;
+  const boxes = colliders(game);
+  let remaining = Math.hypot(ball.vx, ball.vz);
+  for (let i = 0; i < MAX_BOUNCES && remaining > 0; i++) {
+    const speed = Math.hypot(ball.vx, ball.vz);
+    const dx = ball.vx / speed;
+    const dz = ball.vz / speed;
+    const hit = firstHit(ball, dx, dz, remaining, boxes);
+    if (!hit) {
+      ball.x += dx * remaining;
+      ball.z += dz * remaining;
+      return;
+    }
+    ball.x += dx * hit.t;
+    ball.z += dz * hit.t;
+    remaining -= hit.t;
+    // A boost speeds up the rest of this tick's travel too, as on the client
+    const before = speed;
+    bounce(game, hit);
+    remaining *= Math.hypot(ball.vx, ball.vz) / before;
+  }
+}
+
+// One tick. Returns the side (0 or 1) that scored, or -1.
+export function step(game) {
+  game.tick++;
+  if (game.phase === PHASE_SERVE) {
+    movePaddles(game, false);
+    if (--game.countdown <= 0) game.phase = PHASE_PLAY;
+    return -1;
+  }
+  if (game.phase !== PHASE_PLAY) return -1;
+
+  movePaddles(game, true);
+  moveBall(game);
+
+  const out = game.field.paddleDistance + OUT_MARGIN;
+  if (Math.abs(game.ball.x) <= out) return -1;
+  // Past paddle 1 (+x) is a point for player 2
+  const scorer = game.ball.x > out ? 1 : 0;
+  game.score[scorer]++;
+  if (game.score[scorer] >= game.winTarget) {
+    game.phase = PHASE_ENDED;
+  } else {
+    serve(game);
+  }
+  return scorer;
+}
@@ -0,0 +1,102 @@
+import { MAX_SHIELD_HP } from './physics.js';
+
+// Binary WebSocket protocol, mirrored by frontend/game/netcode.ts. All numbers little-endian.
+//
+// Server -> client snapshot:
+//   u8 kind (SNAPSHOT_FULL | SNAPSHOT_DELTA), u32 tick,
+//   delta only: u32 base tick, u16 mask of the fields that differ from the base snapshot,
+//   then each present field in FIELDS order.
+// A delta is taken against the last snapshot the client acknowledged, so a lost or skipped
+// snapshot never corrupts the client's state; it just makes the next delta a little larger.
+//
+// Client -> server input: u8 INPUT, u8 buttons (physics.js BUTTON_*), u32 last snapshot tick received.
+//
+// Rare events (welcome, paused, end) are JSON text frames.
+export const SNAPSHOT_FULL = 1;
+export const SNAPSHOT_DELTA = 2;
+export const INPUT = 1;
+export const INPUT_SIZE = 6;
+
+// Positions to 1/1000 unit, velocities to 1/10000 unit per tick
+const POSITION_SCALE = 1000;
+const VELOCITY_SCALE = 10000;
+
+// [name, byte size (2 = i16, 1 = u8)]
+const FIELDS = [
+  ['ballX', 2], ['ballZ', 2], ['ballVx', 2], ['ballVz', 2],
+  ['paddle1Z', 2], ['paddle2Z', 2], ['shield1Z', 2], ['shield2Z', 2],
+  ['score1', 1], ['score2', 1], ['phase', 1], ['countdown', 1],
+  ['shields', 1], ['boostLevel', 1], ['hits', 1], ['lastHit', 1]
+];
+export const FIELD_COUNT = FIELDS.length;
+const FULL_SIZE = 5 + FIELDS.reduce((n, [, size]) => n + size, 0);
+
+const i16 = (v) => Math.max(-32768, Math.min(32767, Math.round(v)));
+const u8 = (v) => Math.max(0, Math.min(255, v));
+
+// Shield state of both sides in one byte: per side 2 bits of hp and 1 bit raised
+function packShields(paddles) {
+  let bits = 0;
+  paddles.forEach((p, side) => {
+    bits |= (Math.min(p.shield.hp, MAX_SHIELD_HP) | (p.shield.active ? 4 : 0)) << (side * 3);
+  });
+  return bits;
+}
+
+// The game as FIELD_COUNT integers, once per snapshot; deltas compare these
+export function quantize(game) {
+  const [p1, p2] = game.paddles;
+  return Int32Array.of(
+    i16(game.ball.x * POSITION_SCALE), i16(game.ball.z * POSITION_SCALE),
+    i16(game.ball.vx * VELOCITY_SCALE), i16(game.ball.vz * VELOCITY_SCALE),
+    i16(p1.z * POSITION_SCALE), i16(p2.z * POSITION_SCALE),
+    i16(p1.shield.z * POSITION_SCALE), i16(p2.shield.z * POSITION_SCALE),
+    u8(game.score[0]), u8(game.score[1]), game.phase, u8(game.countdown),
+    packShields(game.paddles), u8(game.boostLevel), game.hits, game.lastHit
+  );
+}
+
+function writeField(buf, offset, i, value) {
+  if (FIELDS[i][1] === 2) {
+    buf.writeInt16LE(value, offset);
+    return offset + 2;
+  }
+  buf.writeUInt8(value, offset);
+  return offset + 1;
+}
+
+export function encodeFull(tick, values) {
+  const buf = Buffer.allocUnsafe(FULL_SIZE);
+  buf.writeUInt8(SNAPSHOT_FULL, 0);
+  buf.writeUInt32LE(tick, 1);
+  let offset = 5;
+  for (let i = 0; i < FIELD_COUNT; i++) offset = writeField(buf, offset, i, values[i]);
+  return buf;
+}
+
+export function encodeDelta(tick, values, baseTick, base) {
+  let mask = 0;
+  let size = 11;
+  for (let i = 0; i < FIELD_COUNT; i++) {
+    if (values[i] !== base[i]) {
+      mask |= 1 << i;
+      size += FIELDS[i][1];
+    }
+  }
+  const buf = Buffer.allocUnsafe(size);
+  buf.writeUInt8(SNAPSHOT_DELTA, 0);
+  buf.writeUInt32LE(tick, 1);
+  buf.writeUInt32LE(baseTick, 5);
+  buf.writeUInt16LE(mask, 9);
+  let offset = 11;
+  for (let i = 0; i < FIELD_COUNT; i++) {
+    if (mask & (1 << i)) offset = writeField(buf, offset, i, values[i]);
+  }
+  return buf;
+}
+
+// { buttons, ack } or null for anything that is not an input message
+export function decodeInput(data) {
+  if (!Buffer.isBuffer(data) || data.length !== INPUT_SIZE || data[0] !== INPUT) return null;
+  return { buttons: data[1] & 0x0f, ack: data.readUInt32LE(2) };
+}
@@ -0,0 +1,262 @@
+import {
+  TICK_RATE, PHASE_WAITING, PHASE_ENDED, createGame, serve, setButtons, step
+} from './physics.js';
+import { quantize, encodeFull, encodeDelta, decodeInput } from './protocol.js';
+import { fetchMatch, submitResult } from '../utils/stats.js';
+
+// Every room in the process is stepped by one fixed-rate loop (startTicker), TICK_RATE times a
+// second, and snapshots go out every SNAPSHOT_EVERY ticks. A room is a matchmaking match: it is
+// opened by the first of its two players to connect and closed when the match ends.
+const SNAPSHOT_RATE = Number(process.env.GAME_SNAPSHOT_RATE) || 20;
+const SNAPSHOT_EVERY = Math.max(1, Math.round(TICK_RATE / SNAPSHOT_RATE));
+// Snapshots kept per room as delta bases; a client whose last ack is older gets a full snapshot
+const HISTORY_SIZE = 32;
+// A client that has this much unsent data skips snapshots until it catches up
+const MAX_BUFFERED_BYTES = 64 * 1024;
+// Catch-up ticks per timer callback; beyond that an overloaded process runs slow instead of spiralling
+const MAX_CATCH_UP_TICKS = 5;
+const MAX_ROOMS = Number(process.env.GAME_MAX_ROOMS) || 5000;
+const JOIN_TIMEOUT_MS = 30000;
+// A player who drops out has this long to reconnect before the match is forfeited
+const RECONNECT_GRACE_MS = Number(process.env.GAME_RECONNECT_GRACE_MS) || 15000;
+// Finished matches are remembered for longer than stats-service keeps them, so they cannot be replayed
+const FINISHED_TTL_MS = 5 * 60 * 1000;
+
+const MAP_KEY = process.env.GAME_MAP || 'default';
+const BASE_SPEED = Number(process.env.GAME_BASE_SPEED) || 0.16;
+const WIN_TARGET = Number(process.env.GAME_WIN_TARGET) || 3;
+
+// Closes the socket with `closeCode` when thrown from joinRoom
+class JoinError extends Error {
+  constructor(closeCode, message) {
+    super(message);
+    this.closeCode = closeCode;
+  }
+}
+
+const rooms = new Map();
+// match_id -> promise of the room, while its match is being looked up
+const opening = new Map();
+// match_id -> when it finished
+const finished = new Map();
+const stats = { ticks: 0, lateTicks: 0, snapshots: 0, skippedSnapshots: 0, bytesSent: 0 };
+
+export function getRoomStats() {
+  let players = 0;
+  for (const room of rooms.values()) {
+    for (const p of room.players) if (p.socket) players++;
+  }
+  return { ...stats, rooms: rooms.size, players, maxRooms: MAX_ROOMS, tickRate: TICK_RATE, snapshotRate: SNAPSHOT_RATE };
+}
+
+function sendJson(socket, message) {
+  if (socket.readyState === socket.OPEN) socket.send(JSON.stringify(message));
+}
+
+function broadcast(room, message) {
+  for (const p of room.players) if (p.socket) sendJson(p.socket, message);
+}
+
+function createRoom(match) {
+  return {
+    id: match.match_id,
+    game: createGame(MAP_KEY, BASE_SPEED, WIN_TARGET),
+    players: match.players.map(({ player_id, username, elo_score }) => ({
+      player_id, username, elo_score, socket: null, ack: -1, disconnectedAt: null
+    })),
+    // tick -> quantized snapshot, oldest first
+    history: new Map(),
+    lastSnapshotTick: -1,
+    createdAt: Date.now(),
+    startedAt: null
+  };
+}
+
+function openRoom(matchId) {
+  let pending = opening.get(matchId);
+  if (!pending) {
+    pending = fetchMatch(matchId)
+      .then((match) => {
+        if (!match) throw new JoinError(4004, 'Match not found');
+        if (rooms.has(matchId)) return rooms.get(matchId);
+        if (rooms.size >= MAX_ROOMS) throw new JoinError(1013, 'Game server is full, try again later');
+        const room = createRoom(match);
+        rooms.set(matchId, room);
+        return room;
+      })
+      .finally(() => opening.delete(matchId));
+    opening.set(matchId, pending);
+  }
+  return pending;
+}
+
+// Seats an authenticated player in their match's room, replacing any earlier connection of theirs.
+// The match starts once both players are connected, and resumes when a dropped player returns.
+export async function joinRoom(matchId, user, socket) {
+  if (finished.has(matchId)) throw new JoinError(4009, 'Match is over');
+  const room = rooms.get(matchId) ?? await openRoom(matchId);
+  const side = room.players.findIndex((p) => p.username === user.username);
+  if (side < 0) throw new JoinError(4003, 'Not a player in this match');
+  if (socket.readyState !== socket.OPEN) return;
+
+  const player = room.players[side];
+  if (player.socket) player.socket.close(4000, 'Replaced by a new connection');
+  player.socket = socket;
+  // Not in the history, so the first snapshot is a full one
+  player.ack = -1;
+  player.disconnectedAt = null;
+
+  socket.on('message', (data, isBinary) => {
+    const input = isBinary ? decodeInput(data) : null;
+    if (!input || player.socket !== socket) return;
+    setButtons(room.game, side, input.buttons);
+    if (room.history.has(input.ack)) player.ack = input.ack;
+  });
+  socket.on('close', () => {
+    if (player.socket !== socket) return;
+    player.socket = null;
+    player.disconnectedAt = Date.now();
+    setButtons(room.game, side, 0);
+    if (rooms.get(room.id) === room && room.startedAt) {
+      broadcast(room, { type: 'paused', username: player.username, reconnect_ms: RECONNECT_GRACE_MS });
+    }
+  });
+
+  sendJson(socket, {
+    type: 'welcome',
+    match_id: room.id,
+    side,
+    players: room.players.map(({ username, elo_score }) => ({ username, elo_score })),
+    map: MAP_KEY,
+    win_target: WIN_TARGET,
+    tick_rate: TICK_RATE,
+    snapshot_rate: SNAPSHOT_RATE
+  });
+
+  if (room.players.every((p) => p.socket)) {
+    if (room.game.phase === PHASE_WAITING) {
+      room.startedAt = Date.now();
+      serve(room.game);
+    } else {
+      broadcast(room, { type: 'resumed' });
+    }
+  }
+}
+
+function sendSnapshots(room) {
+  const { game } = room;
+  // A paused room has nothing new to say
+  if (game.tick === room.lastSnapshotTick) return;
+  room.lastSnapshotTick = game.tick;
+  const values = quantize(game);
+  room.history.set(game.tick, values);
+  if (room.history.size > HISTORY_SIZE) room.history.delete(room.history.keys().next().value);
+
+  for (const player of room.players) {
+    const socket = player.socket;
+    if (!socket || socket.readyState !== socket.OPEN) continue;
+    if (socket.bufferedAmount > MAX_BUFFERED_BYTES) {
+      stats.skippedSnapshots++;
+      continue;
+    }
+    const base = room.history.get(player.ack);
+    const frame = base ? encodeDelta(game.tick, values, player.ack, base) : encodeFull(game.tick, values);
+    socket.send(frame);
+    stats.snapshots++;
+    stats.bytesSent += frame.length;
+  }
+}
+
+function formatDuration(ms) {
+  const s = Math.floor(ms / 1000);
+  return [Math.floor(s / 3600), Math.floor(s / 60) % 60, s % 60].map((n) => String(n).padStart(2, '0')).join(':');
+}
+
+function closeRoom(room, end) {
+  rooms.delete(room.id);
+  finished.set(room.id, Date.now());
+  for (const p of room.players) {
+    if (!p.socket) continue;
+    sendJson(p.socket, { type: 'end', ...end });
+    p.socket.close(1000, 'Match over');
+  }
+}
+
+// The result goes to stats-service from player 1's side, as the client's POST /match_history did
+function finish(room, winner, reason) {
+  const { game } = room;
+  game.phase = PHASE_ENDED;
+  sendSnapshots(room);
+  const [p1, p2] = room.players;
+  submitResult({
+    player_id: String(p1.player_id),
+    player_username: p1.username,
+    player_name: p1.username,
+    opponent_id: String(p2.player_id),
+    opponent_username: p2.username,
+    opponent_name: p2.username,
+    player_score: game.score[0],
+    opponent_score: game.score[1],
+    result: winner === 0 ? 'win' : 'loss',
+    duration: formatDuration(Date.now() - room.startedAt),
+    played_at: new Date(room.startedAt).toISOString(),
+    is_guest_opponent: 0
+  });
+  closeRoom(room, { reason, winner: room.players[winner].username, score: game.score });
+}
+
+function tickRoom(room, now) {
+  const { game } = room;
+  if (game.phase === PHASE_WAITING) {
+    // No result when a player never showed up
+    if (now - room.createdAt > JOIN_TIMEOUT_MS) closeRoom(room, { reason: 'no_show' });
+    return;
+  }
+  const absent = room.players.findIndex((p) => !p.socket);
+  if (absent >= 0) {
+    if (now - room.players[absent].disconnectedAt > RECONNECT_GRACE_MS) finish(room, 1 - absent, 'forfeit');
+    return;
+  }
+  const scorer = step(game);
+  if (game.phase === PHASE_ENDED) finish(room, scorer, 'score');
+}
+
+function tickAll() {
+  stats.ticks++;
+  const now = Date.now();
+  const snapshot = stats.ticks % SNAPSHOT_EVERY === 0;
+  for (const room of rooms.values()) {
+    tickRoom(room, now);
+    if (snapshot && rooms.has(room.id) && room.game.phase !== PHASE_WAITING) sendSnapshots(room);
+  }
+  if (stats.ticks % TICK_RATE === 0) {
+    for (const [matchId, at] of finished) {
+      if (now - at <= FINISHED_TTL_MS) break;
+      finished.delete(matchId);
+    }
+  }
+}
+
+// Runs every room at TICK_RATE until the server closes; open matches then end without a result
+export function startTicker(fastify) {
+  const tickMs = 1000 / TICK_RATE;
+  let next = performance.now();
+  let timer = null;
+  const loop = () => {
+    const now = performance.now();
+    for (let i = 0; next <= now && i < MAX_CATCH_UP_TICKS; i++) {
+      tickAll();
+      next += tickMs;
+    }
+    if (next <= now) {
+      stats.lateTicks++;
+      next = now + tickMs;
+    }
+    timer = setTimeout(loop, next - performance.now());
+  };
+  loop();
+  fastify.addHook('onClose', async () => {
+    clearTimeout(timer);
+    for (const room of [...rooms.values()]) closeRoom(room, { reason: 'shutdown' });
+  });
+}
@@ -0,0 +1,27 @@
+import { joinRoom, getRoomStats } from '../game/rooms.js';
+import { getPendingResults } from '../utils/stats.js';
+
+export default async function gameRoutes(fastify) {
+  // /ws/:match_id?token=<access token>
+  // Browsers cannot set headers on a WebSocket, so the access token comes in the query string.
+  // Protocol: game/protocol.js. Close codes: 4001 bad token, 4003 not a player in the match,
+  // 4004 unknown match, 4009 match already played, 1013 server full.
+  fastify.get('/ws/:match_id', { websocket: true }, async (socket, request) => {
+    let user;
+    try {
+      user = fastify.jwt.verify(request.query.token ?? '');
+    } catch (err) {
+      socket.close(4001, 'Unauthorized');
+      return;
+    }
+    try {
+      await joinRoom(request.params.match_id, user, socket);
+    } catch (err) {
+      if (!err.closeCode) request.log.error({ err }, 'Could not open a game room');
+      socket.close(err.closeCode ?? 1011, err.closeCode ? err.message : 'Game server error');
+    }
+  });
+
+  // /rooms/stats: room and pending-result counts, on the internal network only (the gateway answers 404)
+  fastify.get('/rooms/stats', () => ({ ...getRoomStats(), pendingResults: getPendingResults() }));
+}
@@ -0,0 +1,64 @@
+import { test } from 'node:test';
+import assert from 'node:assert/strict';
+import { TICK_RATE, PHASE_SERVE, PHASE_PLAY, PHASE_ENDED, createGame, serve, step } from '../game/physics.js';
+
+// A game in play with the ball about to leave the field past paddle `side`, clear of both paddles
+function aboutToScore(side) {
+  const game = createGame('default', 0.16, 3);
+  serve(game);
+  game.phase = PHASE_PLAY;
+  const out = game.field.paddleDistance + 1.5;
+  game.ball.x = side === 0 ? out - 0.1 : -(out - 0.1);
+  game.ball.z = 4;
+  game.ball.vx = side === 0 ? 0.2 : -0.2;
+  game.ball.vz = 0;
+  return game;
+}
+
+test('the serve countdown ends in play', () => {
+  const game = createGame('default', 0.16, 3);
+  serve(game);
+  assert.equal(game.phase, PHASE_SERVE);
+  let ticks = 0;
+  while (game.phase === PHASE_SERVE) {
+    assert.equal(step(game), -1);
+    ticks++;
+  }
+  assert.equal(game.phase, PHASE_PLAY);
+  assert.ok(ticks > TICK_RATE / 2, `serve took ${ticks} ticks`);
+});
+
+test('a ball past paddle 1 is a point for player 2, then a new serve', () => {
+  const game = aboutToScore(0);
+  assert.equal(step(game), 1);
+  assert.deepEqual(game.score, [0, 1]);
+  assert.equal(game.phase, PHASE_SERVE);
+  assert.equal(game.ball.x, 0);
+});
+
+test('a ball past paddle 2 is a point for player 1', () => {
+  const game = aboutToScore(1);
+  assert.equal(step(game), 0);
+  assert.deepEqual(game.score, [1, 0]);
+});
+
+test('reaching the win target ends the game', () => {
+  const game = aboutToScore(1);
+  game.score = [2, 2];
+  assert.equal(step(game), 0);
+  assert.deepEqual(game.score, [3, 2]);
+  assert.equal(game.phase, PHASE_ENDED);
+  // Nothing moves once it is over
+  const ball = { ...game.ball };
+  assert.equal(step(game), -1);
+  assert.deepEqual(game.ball, ball);
+});
+
+test('the ball in front of a paddle bounces back instead of scoring', () => {
+  const game = aboutToScore(0);
+  game.ball.x = game.field.paddleDistance - 1;
+  game.ball.z = game.paddles[0].z;
+  for (let i = 0; i < 10; i++) assert.equal(step(game), -1);
+  assert.ok(game.ball.vx < 0);
+  assert.deepEqual(game.score, [0, 0]);
+});
@@ -0,0 +1,110 @@
+import { test } from 'node:test';
+import assert from 'node:assert/strict';
+import { existsSync, readFileSync } from 'fs';
+import { createGame, serve } from '../game/physics.js';
+import { quantize, encodeFull, encodeDelta, decodeInput, FIELD_COUNT, SNAPSHOT_FULL, SNAPSHOT_DELTA } from '../game/protocol.js';
+
+// The client's field table, read from frontend/game/netcode.ts so the two cannot drift apart unnoticed
+const NETCODE_PATH = new URL('../../../frontend/game/netcode.ts', import.meta.url);
+const hasNetcode = existsSync(NETCODE_PATH);
+const clientFields = hasNetcode
+  ? [...readFileSync(NETCODE_PATH, 'utf8').matchAll(/\['(\w+)', (\d), \w+\]/g)].map(([, name, size]) => [name, Number(size)])
+  : [];
+
+// GameConnection.receive() in netcode.ts: the raw field values of a snapshot, or null when it
+// is a delta against a tick the client no longer has
+function decodeSnapshot(buf, history) {
+  const view = new DataView(buf.buffer, buf.byteOffset, buf.length);
+  const kind = view.getUint8(0);
+  const tick = view.getUint32(1, true);
+  let values;
+  let mask = 0xffff;
+  let offset = 5;
+  if (kind === SNAPSHOT_DELTA) {
+    const base = history.get(view.getUint32(5, true));
+    if (!base) return null;
+    values = base.slice();
+    mask = view.getUint16(9, true);
+    offset = 11;
+  } else {
+    values = new Int32Array(clientFields.length);
+  }
+  clientFields.forEach(([, size], i) => {
+    if (!(mask & (1 << i))) return;
+    values[i] = size === 2 ? view.getInt16(offset, true) : view.getUint8(offset);
+    offset += size;
+  });
+  assert.equal(offset, buf.length, 'the client reads exactly the bytes that were sent');
+  history.set(tick, values);
+  return { tick, values };
+}
+
+function servedGame() {
+  const game = createGame('default', 0.16, 3);
+  serve(game);
+  return game;
+}
+
+test('the client decodes the same fields as the server encodes', { skip: !hasNetcode && 'frontend not checked out' }, () => {
+  assert.equal(clientFields.length, FIELD_COUNT);
+});
+
+test('a full snapshot decodes to the quantized game', { skip: !hasNetcode && 'frontend not checked out' }, () => {
+  const game = servedGame();
+  game.paddles[0].z = -1.234;
+  game.paddles[1].shield.active = true;
+  game.score = [2, 1];
+  const values = quantize(game);
+  const frame = encodeFull(42, values);
+  assert.equal(frame[0], SNAPSHOT_FULL);
+
+  const decoded = decodeSnapshot(frame, new Map());
+  assert.equal(decoded.tick, 42);
+  assert.deepEqual(decoded.values, values);
+});
+
+test('a delta carries only the changed fields, in its mask', { skip: !hasNetcode && 'frontend not checked out' }, () => {
+  const game = servedGame();
+  const base = quantize(game);
+  const history = new Map();
+  decodeSnapshot(encodeFull(10, base), history);
+
+  game.ball.x += 0.5;
+  game.score[0]++;
+  const values = quantize(game);
+  const frame = encodeDelta(13, values, 10, base);
+  assert.equal(frame[0], SNAPSHOT_DELTA);
+  // ballX (i16) and score1 (u8)
+  assert.equal(frame.readUInt16LE(9), (1 << 0) | (1 << 8));
+  assert.equal(frame.length, 11 + 2 + 1);
+  assert.deepEqual(decodeSnapshot(frame, history).values, values);
+
+  const unchanged = encodeDelta(14, values, 13, values);
+  assert.equal(unchanged.readUInt16LE(9), 0);
+  assert.equal(unchanged.length, 11);
+  assert.deepEqual(decodeSnapshot(unchanged, history).values, values);
+});
+
+test('a delta against a tick the client does not have is dropped', { skip: !hasNetcode && 'frontend not checked out' }, () => {
+  const values = quantize(servedGame());
+  assert.equal(decodeSnapshot(encodeDelta(20, values, 19, values), new Map()), null);
+});
+
+test('positions and velocities out of i16 range are clamped, not wrapped', { skip: !hasNetcode && 'frontend not checked out' }, () => {
+  const game = servedGame();
+  game.ball.x = 1000;
+  game.ball.z = -1000;
+  game.ball.vx = 10;
+  game.ball.vz = -10;
+  const values = quantize(game);
+  assert.deepEqual([...values.slice(0, 4)], [32767, -32768, 32767, -32768]);
+  assert.deepEqual(decodeSnapshot(encodeFull(1, values), new Map()).values, values);
+});
+
+test('decodeInput accepts only well-formed input messages', () => {
+  const input = Buffer.from([1, 0xff, 7, 0, 0, 0]);
+  assert.deepEqual(decodeInput(input), { buttons: 0x0f, ack: 7 });
+  assert.equal(decodeInput(input.subarray(0, 5)), null);
+  assert.equal(decodeInput(Buffer.from([2, 1, 0, 0, 0, 0])), null);
+  assert.equal(decodeInput('hello!'), null);
+});
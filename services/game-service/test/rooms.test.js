@@ -0,0 +1,106 @@
+import { test, after } from 'node:test';
+import assert from 'node:assert/strict';
+import { EventEmitter } from 'events';
+import { setTimeout as sleep } from 'timers/promises';
+
+// Read when the modules load
+process.env.GAME_RECONNECT_GRACE_MS = '50';
+process.env.STATS_INGEST_TOKEN = 'test-ingest-token';
+
+const { joinRoom, startTicker } = await import('../game/rooms.js');
+const { startResultSubmitter, flushResults, getPendingResults } = await import('../utils/stats.js');
+
+const MATCH = {
+  match_id: 'm-1',
+  players: [
+    { player_id: 1, username: 'alice', elo_score: 1000 },
+    { player_id: 2, username: 'bob', elo_score: 1000 }
+  ]
+};
+
+// stats-service: the match lookup, and the result submissions it receives
+const submitted = [];
+globalThis.fetch = async (url, options = {}) => {
+  if (String(url).endsWith('/internal/match_results')) {
+    submitted.push({ authorization: options.headers.Authorization, ...JSON.parse(options.body) });
+    return new Response(JSON.stringify({ inserted: 1, errors: [] }));
+  }
+  if (String(url).endsWith(`/internal/matches/${MATCH.match_id}`)) {
+    assert.equal(options.headers.Authorization, 'Bearer test-ingest-token');
+    return new Response(JSON.stringify(MATCH));
+  }
+  return new Response('{}', { status: 404 });
+};
+
+// What the routes hand to joinRoom: a ws socket, here just recording what it is sent
+class FakeSocket extends EventEmitter {
+  OPEN = 1;
+  readyState = 1;
+  bufferedAmount = 0;
+  messages = [];
+  closed = null;
+
+  send(data) {
+    if (typeof data === 'string') this.messages.push(JSON.parse(data));
+  }
+
+  close(code, reason) {
+    if (this.closed) return;
+    this.closed = { code, reason };
+    this.readyState = 3;
+    this.emit('close');
+  }
+}
+
+const onClose = [];
+const fastify = {
+  log: { warn() {}, error() {} },
+  addHook: (name, hook) => onClose.push(hook)
+};
+startResultSubmitter(fastify);
+startTicker(fastify);
+after(async () => {
+  for (const hook of onClose) await hook();
+});
+
+async function until(condition, timeoutMs = 2000) {
+  for (const start = Date.now(); !condition(); await sleep(10)) {
+    if (Date.now() - start > timeoutMs) throw new Error('timed out');
+  }
+}
+
+test('a player who does not come back forfeits, and the match cannot be replayed', async () => {
+  const alice = new FakeSocket();
+  const bob = new FakeSocket();
+  await joinRoom(MATCH.match_id, { username: 'alice' }, alice);
+  await joinRoom(MATCH.match_id, { username: 'bob' }, bob);
+  assert.equal(alice.messages[0].type, 'welcome');
+  assert.equal(alice.messages[0].side, 0);
+  assert.equal(bob.messages[0].side, 1);
+
+  // bob drops out and stays away past the reconnect grace
+  bob.readyState = 3;
+  bob.emit('close');
+  assert.deepEqual(alice.messages.at(-1), { type: 'paused', username: 'bob', reconnect_ms: 50 });
+  await until(() => alice.closed);
+
+  assert.deepEqual(alice.messages.at(-1), { type: 'end', reason: 'forfeit', winner: 'alice', score: [0, 0] });
+  assert.equal(alice.closed.code, 1000);
+
+  // Its result goes to the internal route under the ingest token, not a user's access token
+  assert.equal(getPendingResults(), 1);
+  await flushResults();
+  assert.equal(submitted.length, 1);
+  assert.equal(submitted[0].authorization, 'Bearer test-ingest-token');
+  assert.equal(submitted[0].matches[0].player_username, 'alice');
+  assert.equal(submitted[0].matches[0].result, 'win');
+
+  await assert.rejects(joinRoom(MATCH.match_id, { username: 'alice' }, new FakeSocket()), { closeCode: 4009 });
+});
+
+test('only the two players of a match get a seat', async () => {
+  await assert.rejects(joinRoom('m-unknown', { username: 'alice' }, new FakeSocket()), { closeCode: 4004 });
+
+  MATCH.match_id = 'm-2';
+  await assert.rejects(joinRoom('m-2', { username: 'mallory' }, new FakeSocket()), { closeCode: 4003 });
+});
@@ -0,0 +1,91 @@
+import { loadIngestToken } from '../../shared/ingestToken.js';
+
+// Everything game-service asks of stats-service, on its internal routes under the ingest token:
+// who is in a match, and the results of finished matches. Results are queued and sent
+// RESULT_BATCH_SIZE at a time to /internal/match_results (or every RESULT_FLUSH_MS), so
+// thousands of matches ending per minute cost a few requests.
+const STATS_URL = process.env.STATS_URL || 'http://stats-service:3001';
+const RESULT_BATCH_SIZE = Number(process.env.GAME_RESULT_BATCH_SIZE) || 100;
+const RESULT_FLUSH_MS = Number(process.env.GAME_RESULT_FLUSH_MS) || 2000;
+// Results held while stats-service is unreachable; beyond this the oldest are dropped
+const MAX_PENDING_RESULTS = 10000;
+const REQUEST_TIMEOUT_MS = 10000;
+
+let fastify;
+let ingestToken = null;
+const pending = [];
+let flushing = null;
+
+// The match stats-service paired, { match_id, players: [{ player_id, username, elo_score }] }, or null
+export async function fetchMatch(matchId) {
+  const response = await fetch(`${STATS_URL}/internal/matches/${encodeURIComponent(matchId)}`, {
+    headers: { 'Authorization': `Bearer ${ingestToken}` },
+    signal: AbortSignal.timeout(REQUEST_TIMEOUT_MS)
+  });
+  if (response.status === 404) return null;
+  if (!response.ok) throw new Error(`stats-service answered ${response.status}`);
+  return response.json();
+}
+
+async function postResults(batch) {
+  const response = await fetch(`${STATS_URL}/internal/match_results`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Authorization': `Bearer ${ingestToken}`
+    },
+    body: JSON.stringify({ matches: batch }),
+    signal: AbortSignal.timeout(REQUEST_TIMEOUT_MS)
+  });
+  if (!response.ok) throw new Error(`stats-service answered ${response.status}`);
+  const { errors = [] } = await response.json();
+  for (const { index, error } of errors) {
+    fastify.log.error({ match: batch[index], error }, 'stats-service rejected a match result');
+  }
+}
+
+// Sends the oldest batch; on failure it goes back to the front of the queue for the next flush.
+// A batch that timed out after stats-service stored it is sent again, so it may be recorded twice.
+export function flushResults() {
+  if (flushing || pending.length === 0) return flushing ?? Promise.resolve();
+  const batch = pending.splice(0, RESULT_BATCH_SIZE);
+  flushing = postResults(batch)
+    .catch((err) => {
+      pending.unshift(...batch);
+      fastify.log.warn(`Could not send ${batch.length} match results, retrying: ${err.message}`);
+    })
+    .finally(() => {
+      flushing = null;
+      if (pending.length >= RESULT_BATCH_SIZE) flushResults();
+    });
+  return flushing;
+}
+
+export function submitResult(match) {
+  pending.push(match);
+  if (pending.length > MAX_PENDING_RESULTS) {
+    fastify.log.error({ match: pending.shift() }, 'Dropped a match result, stats-service has been unreachable for too long');
+  }
+  if (pending.length >= RESULT_BATCH_SIZE) flushResults();
+}
+
+export function getPendingResults() {
+  return pending.length;
+}
+
+// Call before the server is ready; results left on close are sent before it exits
+export function startResultSubmitter(instance) {
+  fastify = instance;
+  ingestToken = loadIngestToken();
+  if (!ingestToken) throw new Error('STATS_INGEST_TOKEN is required to send match results');
+  const timer = setInterval(flushResults, RESULT_FLUSH_MS);
+  timer.unref();
+  fastify.addHook('onClose', async () => {
+    clearInterval(timer);
+    const batches = Math.ceil(pending.length / RESULT_BATCH_SIZE) + 1;
+    for (let i = 0; i < batches && (flushing || pending.length > 0); i++) {
+      await flushing;
+      await flushResults();
+    }
+  });
+}
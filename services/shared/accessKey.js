@@ -0,0 +1,35 @@
+import { readFile } from 'fs/promises';
+import { setTimeout as sleep } from 'timers/promises';
+
+// auth-service signs access tokens with RS256 and publishes the public key on GET /auth/public-key.
+// The other services verify tokens with that key alone, so none of them holds anything that could
+// sign one. JWT_PUBLIC_KEY (PEM) or JWT_PUBLIC_KEY_FILE pin the key; otherwise it is fetched from
+// auth-service at startup, retrying while auth-service is still starting.
+const AUTH_URL = process.env.AUTH_URL || 'http://auth-service:3001';
+const FETCH_ATTEMPTS = 10;
+const FETCH_RETRY_MS = 1000;
+const FETCH_TIMEOUT_MS = 5000;
+
+// The PEM, or null when auth-service could not be reached
+export async function loadAccessPublicKey(log) {
+  if (process.env.JWT_PUBLIC_KEY) return process.env.JWT_PUBLIC_KEY;
+  if (process.env.JWT_PUBLIC_KEY_FILE) return readFile(process.env.JWT_PUBLIC_KEY_FILE, 'utf8');
+  for (let attempt = 1; ; attempt++) {
+    try {
+      const response = await fetch(`${AUTH_URL}/auth/public-key`, { signal: AbortSignal.timeout(FETCH_TIMEOUT_MS) });
+      if (!response.ok) throw new Error(`auth-service answered ${response.status}`);
+      return await response.text();
+    } catch (err) {
+      if (attempt >= FETCH_ATTEMPTS) {
+        log.warn(`Could not fetch the access token public key: ${err.message}`);
+        return null;
+      }
+      await sleep(FETCH_RETRY_MS);
+    }
+  }
+}
+
+// @fastify/jwt options that verify access tokens and cannot sign anything
+export function accessKeyJwtOptions(publicKey) {
+  return { secret: { public: publicKey }, verify: { algorithms: ['RS256'] } };
+}
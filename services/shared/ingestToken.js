@@ -0,0 +1,18 @@
+import { readFileSync } from 'fs';
+
+// Credential game-service and auth-service present to stats-service's internal routes
+// (/internal/*, which the gateway does not route). It is the stats_ingest_token compose secret,
+// given to those three services only (docker-compose.yml); STATS_INGEST_TOKEN overrides it
+// outside compose.
+const DEFAULT_TOKEN_FILE = '/run/secrets/stats_ingest_token';
+
+// The token, or null when none is configured
+export function loadIngestToken() {
+  if (process.env.STATS_INGEST_TOKEN) return process.env.STATS_INGEST_TOKEN;
+  try {
+    return readFileSync(process.env.STATS_INGEST_TOKEN_FILE || DEFAULT_TOKEN_FILE, 'utf8').trim() || null;
+  } catch (err) {
+    if (err.code === 'ENOENT') return null;
+    throw err;
+  }
+}
@@ -0,0 +1,125 @@
+import { monitorEventLoopDelay } from 'perf_hooks';
+
+// Prometheus text-format metrics kept in process and served on GET /metrics, shared by every
+// service so they expose the same format and the same metric names. Counters and histograms are
+// updated on the hot paths; collectors are read at scrape time for values that already live
+// elsewhere (cache sizes, pool queue depth). /metrics is for the internal network only; the
+// gateway does not route it.
+const DEFAULT_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5];
+
+const registry = new Map();
+
+function labelString(labels) {
+  const parts = Object.entries(labels).map(([k, v]) => `${k}="${String(v).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n')}"`);
+  return parts.length ? `{${parts.join(',')}}` : '';
+}
+
+function register(name, help, type, metric) {
+  if (registry.has(name)) return registry.get(name);
+  metric.header = `# HELP ${name} ${help}\n# TYPE ${name} ${type}\n`;
+  registry.set(name, metric);
+  return metric;
+}
+
+export function counter(name, help) {
+  const values = new Map();
+  return register(name, help, 'counter', {
+    inc(labels = {}, n = 1) {
+      const key = labelString(labels);
+      values.set(key, (values.get(key) ?? 0) + n);
+    },
+    render() {
+      let out = '';
+      for (const [key, value] of values) out += `${name}${key} ${value}\n`;
+      return out;
+    }
+  });
+}
+
+export function histogram(name, help, buckets = DEFAULT_BUCKETS) {
+  const series = new Map();
+  return register(name, help, 'histogram', {
+    observe(labels, seconds) {
+      const key = labelString(labels);
+      let s = series.get(key);
+      if (!s) {
+        s = { labels, counts: new Array(buckets.length).fill(0), sum: 0, count: 0 };
+        series.set(key, s);
+      }
+      for (let i = 0; i < buckets.length; i++) {
+        if (seconds <= buckets[i]) s.counts[i]++;
+      }
+      s.sum += seconds;
+      s.count++;
+    },
+    render() {
+      let out = '';
+      for (const [key, s] of series) {
+        buckets.forEach((le, i) => {
+          out += `${name}_bucket${labelString({ ...s.labels, le })} ${s.counts[i]}\n`;
+        });
+        out += `${name}_bucket${labelString({ ...s.labels, le: '+Inf' })} ${s.count}\n`;
+        out += `${name}_sum${key} ${s.sum}\n${name}_count${key} ${s.count}\n`;
+      }
+      return out;
+    }
+  });
+}
+
+// collect() returns a number, or a list of [labels, value] pairs
+export function collector(name, help, type, collect) {
+  return register(name, help, type, {
+    render() {
+      const value = collect();
+      const samples = typeof value === 'number' ? [[{}, value]] : value;
+      return samples.map(([labels, v]) => `${name}${labelString(labels)} ${v}\n`).join('');
+    }
+  });
+}
+
+export function startTimer() {
+  const start = process.hrtime.bigint();
+  return () => Number(process.hrtime.bigint() - start) / 1e9;
+}
+
+export function renderMetrics() {
+  let out = '';
+  for (const metric of registry.values()) {
+    const body = metric.render();
+    if (body) out += metric.header + body;
+  }
+  return out;
+}
+
+const httpDuration = histogram('http_request_duration_seconds', 'Time from request received to response sent, by route');
+
+// Event-loop delay, sampled every 10 ms. Quantiles cover the time since the previous scrape.
+const loopDelay = monitorEventLoopDelay({ resolution: 10 });
+collector('nodejs_eventloop_lag_seconds', 'Event-loop delay since the last scrape', 'gauge', () => {
+  const samples = loopDelay.count
+    ? [0.5, 0.9, 0.99].map((q) => [{ quantile: q }, loopDelay.percentile(q * 100) / 1e9])
+      .concat([[{ quantile: 1 }, loopDelay.max / 1e9]])
+    : [];
+  loopDelay.reset();
+  return samples;
+});
+
+// Per-route latency hooks and GET /metrics
+export function registerMetrics(fastify) {
+  loopDelay.enable();
+  fastify.decorateRequest('metricsTimer', null);
+  fastify.addHook('onRequest', async (request) => {
+    request.metricsTimer = startTimer();
+  });
+  fastify.addHook('onResponse', async (request, reply) => {
+    httpDuration.observe({
+      method: request.method,
+      route: request.routeOptions.url ?? 'unmatched',
+      status: reply.statusCode
+    }, request.metricsTimer());
+  });
+  fastify.get('/metrics', { schema: { hide: true } }, (request, reply) => {
+    reply.type('text/plain; version=0.0.4').send(renderMetrics());
+  });
+  fastify.addHook('onClose', async () => loopDelay.disable());
+}
@@ -0,0 +1,142 @@
+import { createHash, timingSafeEqual } from 'crypto';
+import { collector, histogram, startTimer } from './metrics.js';
+import { loadIngestToken } from './ingestToken.js';
+
+// requireAuth, the preHandler of every user route in stats-service and tournament-service.
+// Access tokens are RS256 JWTs signed by auth-service. With its public key registered as
+// @fastify/jwt (accessKey.js) they are verified in-process; otherwise we fall back to asking auth-service.
+// Either way a verified token is remembered (keyed by its hash) until it expires, so repeat
+// requests with the same token skip both the signature check and the network hop.
+const AUTH_CACHE_SIZE = Number(process.env.AUTH_CACHE_SIZE) || 10000;
+
+const verifiedTokens = new Map();
+const authCacheStats = { hits: 0, misses: 0, evictions: 0 };
+
+export function getAuthCacheStats() {
+  return { ...authCacheStats, size: verifiedTokens.size, max: AUTH_CACHE_SIZE };
+}
+
+const verifyDuration = histogram('auth_verify_duration_seconds', 'Access token verification on a cache miss, local (public key) or by auth-service');
+collector('auth_cache_requests_total', 'Verified-token cache lookups', 'counter',
+  () => [[{ result: 'hit' }, authCacheStats.hits], [{ result: 'miss' }, authCacheStats.misses]]);
+collector('auth_cache_evictions_total', 'Tokens evicted from the verified-token cache', 'counter', () => authCacheStats.evictions);
+collector('auth_cache_entries', 'Tokens in the verified-token cache', 'gauge', () => verifiedTokens.size);
+
+function tokenKey(token) {
+  return createHash('sha256').update(token).digest('base64');
+}
+
+function getCachedUser(key) {
+  const entry = verifiedTokens.get(key);
+  if (!entry) return null;
+  verifiedTokens.delete(key);
+  if (entry.expiresAt <= Date.now()) return null;
+  // Re-insert so the Map's insertion order doubles as the LRU order
+  verifiedTokens.set(key, entry);
+  return entry.user;
+}
+
+function cacheUser(key, user, exp) {
+  if (!exp) return;
+  verifiedTokens.set(key, { user, expiresAt: exp * 1000 });
+  if (verifiedTokens.size > AUTH_CACHE_SIZE) {
+    verifiedTokens.delete(verifiedTokens.keys().next().value);
+    authCacheStats.evictions++;
+  }
+}
+
+function decodePayload(token) {
+  try {
+    return JSON.parse(Buffer.from(token.split('.')[1], 'base64url').toString());
+  } catch {
+    return {};
+  }
+}
+
+async function verifyRemotely(authHeader) {
+  const response = await fetch('http://auth-service:3001/auth/verify-token', {
+    method: 'POST',
+    headers: {
+      'Authorization': authHeader
+    }
+  });
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({ error: 'Authentication failed' }));
+    return { status: response.status, errorData };
+  }
+  return { user: await response.json() };
+}
+
+export const requireAuth = async (request, reply) => {
+  try {
+    const authHeader = request.headers.authorization;
+    if (!authHeader || !authHeader.startsWith('Bearer ')) {
+      return reply.status(401).send({ error: 'Missing or invalid authorization header' });
+    }
+    const token = authHeader.slice('Bearer '.length);
+    const key = tokenKey(token);
+
+    let userData = getCachedUser(key);
+    if (userData) {
+      authCacheStats.hits++;
+    } else {
+      authCacheStats.misses++;
+      const elapsed = startTimer();
+      if (request.server.jwt) {
+        let decoded;
+        try {
+          decoded = request.server.jwt.verify(token);
+        } catch (err) {
+          return reply.status(401).send({ error: 'Unauthorized', message: err.message });
+        } finally {
+          verifyDuration.observe({ method: 'local' }, elapsed());
+        }
+        userData = {
+          id: decoded.id,
+          username: decoded.username,
+          email: decoded.email,
+          role: decoded.role || 'user'
+        };
+        cacheUser(key, userData, decoded.exp);
+      } else {
+        const result = await verifyRemotely(authHeader);
+        verifyDuration.observe({ method: 'remote' }, elapsed());
+        if (!result.user) {
+          return reply.status(result.status).send(result.errorData);
+        }
+        userData = result.user;
+        // auth-service has just checked the signature, so the unverified exp is safe to trust
+        cacheUser(key, userData, decodePayload(token).exp);
+      }
+    }
+
+    request.id = userData.id;
+    request.email = userData.email;
+    request.username = userData.username;
+  } catch (error) {
+    console.error('🚨 Auth service connection error:', error.message);
+    return reply.status(503).send({
+      error: 'Authentication service unavailable',
+      details: error.message
+    });
+  }
+};
+
+// The preHandler of internal routes (/internal/*, not routed by the gateway): they accept only
+// the ingest token (ingestToken.js), never a user's access token. Both sides are hashed so the
+// comparison is constant-time whatever the lengths.
+let ingestTokenHash;
+
+export const requireService = async (request, reply) => {
+  if (ingestTokenHash === undefined) {
+    const ingestToken = loadIngestToken();
+    ingestTokenHash = ingestToken ? createHash('sha256').update(ingestToken).digest() : null;
+    if (!ingestTokenHash) console.warn('No STATS_INGEST_TOKEN, the internal routes will refuse every request');
+  }
+  const authHeader = request.headers.authorization ?? '';
+  const token = authHeader.startsWith('Bearer ') ? authHeader.slice('Bearer '.length) : '';
+  const tokenHash = createHash('sha256').update(token).digest();
+  if (!ingestTokenHash || !timingSafeEqual(tokenHash, ingestTokenHash)) {
+    return reply.status(401).send({ error: 'Unauthorized' });
+  }
+};
@@ -1,10 +1,21 @@
 import Fastify from 'fastify';
 import dotenv from 'dotenv';
+import fastifyJwt from '@fastify/jwt';
 import { initDB, db } from './db/init.js';
+import { startReadPool, stopReadPool } from './db/readPool.js';
+import { startOutboxApplier } from './utils/outbox.js';
 import scoreHistoryRoutes from './routes/scoreHistory.js';
 import matchHistoryRoutes from './routes/matchHistory.js';
 import rivalsRoutes from './routes/rivals.js';
 import userMatchDataRoutes from './routes/userMatchData.js';
+import leaderboardRoutes from './routes/leaderboard.js';
+import matchmakingRoutes from './routes/matchmaking.js';
+import internalRoutes from './routes/internal.js';
+import { getAuthCacheStats } from '../shared/requireAuth.js';
+import { registerMetrics } from '../shared/metrics.js';
+import { loadAccessPublicKey, accessKeyJwtOptions } from '../shared/accessKey.js';
+import { isHttpWorker, isWriterProcess } from './utils/cluster.js';
+import { startWriter } from './utils/writes.js';
 
 dotenv.config();
 
@@ -13,20 +24,46 @@ const fastify = Fastify({
   ignoreTrailingSlash: true,
 });
 
-// Init the database
-initDB(fastify);
+// Init the database, then the read-only workers that serve the GET routes. In cluster mode
+// (utils/cluster.js) the primary is the writer and only the HTTP workers serve the routes.
+if (!isHttpWorker) {
+    initDB(fastify);
+    startOutboxApplier(fastify);
+}
+if (isWriterProcess) {
+    startWriter(fastify);
+} else {
+    startReadPool(fastify);
+}
 
-fastify.register(scoreHistoryRoutes, { prefix: '/score_history'});
-fastify.register(matchHistoryRoutes, { prefix: '/match_history'});
-fastify.register(rivalsRoutes, { prefix: '/rivals'});
-fastify.register(userMatchDataRoutes, { prefix: '/user_match_data'})
+if (!isWriterProcess) {
+    // With auth-service's public key, requireAuth verifies access tokens locally
+    const publicKey = await loadAccessPublicKey(fastify.log);
+    if (publicKey) {
+        fastify.register(fastifyJwt, accessKeyJwtOptions(publicKey));
+    } else {
+        fastify.log.warn('No access token public key, access tokens will be verified by auth-service');
+    }
+
+    fastify.register(scoreHistoryRoutes, { prefix: '/score_history'});
+    fastify.register(matchHistoryRoutes, { prefix: '/match_history'});
+    fastify.register(rivalsRoutes, { prefix: '/rivals'});
+    fastify.register(userMatchDataRoutes, { prefix: '/user_match_data'})
+    fastify.register(leaderboardRoutes, { prefix: '/leaderboard'})
+    fastify.register(matchmakingRoutes, { prefix: '/matchmaking'})
+    fastify.register(internalRoutes, { prefix: '/internal'})
+
+    fastify.get('/auth_cache', () => getAuthCacheStats());
+}
+// The writer serves only /metrics (outbox, ingest and write timings), on its own internal port
+registerMetrics(fastify);
 
 
 
 const start = async () => {
     try
     {
-        const port = process.env.PORT || 3001;
+        const port = isWriterProcess ? (process.env.STATS_WRITER_PORT || 3002) : (process.env.PORT || 3001);
 
         await fastify.ready();
         console.log(fastify.printRoutes());
@@ -48,7 +85,8 @@ const gracefullShutdown = async (signal) => {
     fastify.log.info(`Received ${signal}, shutting down gracefully...`);
     try {
       await fastify.close();
-      db.close();
+      await stopReadPool();
+      db?.close();
       fastify.log.info('Server and database closed successfully');
     } catch (err) {
       fastify.log.error('Error during shutdown:', err);
@@ -59,3 +97,5 @@ const gracefullShutdown = async (signal) => {
   
   process.on('SIGINT', gracefullShutdown);
   process.on('SIGTERM', gracefullShutdown);
+  // A cluster worker is stopped by the writer disconnecting it
+  if (isHttpWorker) process.on('disconnect', () => gracefullShutdown('disconnect'));
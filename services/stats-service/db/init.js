@@ -1,13 +1,110 @@
 import Database from 'better-sqlite3'
+import { lookupQueries, writeQueries } from './queries.js';
 
 export let db;
 
-export function initDB(fastify) {
-    const dbPath = "./data/stats.db";
+const dbPath = "./data/stats.db";
+
+// Separate read-only handle for long-running reads such as streamed exports. An open
+// better-sqlite3 iterator keeps its connection busy, so these must not share `db`.
+export function openReadOnlyDB() {
+    return new Database(dbPath, { readonly: true, fileMustExist: true });
+}
+
+// Statements on the writer connection `db`. Those in lookupQueries and writeQueries are prepared
+// by initDB(); anything else is prepared on first use. Only pass constant SQL; the cache is
+// keyed by the SQL text.
+const statements = new Map();
+export function prepared(sql) {
+    let stmt = statements.get(sql);
+    if (!stmt) {
+        stmt = db.prepare(sql);
+        statements.set(sql, stmt);
+    }
+    return stmt;
+}
+
+// (Re)fill head_to_head from match_history: one row per direction of every pair of players.
+// A match against oneself has no rival side and is left out.
+export const HEAD_TO_HEAD_BACKFILL = `
+  INSERT INTO head_to_head (player_username, rival_username, games, wins, losses, draws)
+  SELECT player_username, rival_username, COUNT(*), SUM(won), SUM(lost), SUM(drawn)
+  FROM (
+    SELECT player_username, opponent_username AS rival_username,
+           result = 'win' AS won, result = 'loss' AS lost, result = 'draw' AS drawn
+    FROM match_history WHERE player_username <> opponent_username
+    UNION ALL
+    SELECT opponent_username, player_username,
+           result = 'loss', result = 'win', result = 'draw'
+    FROM match_history WHERE player_username <> opponent_username
+  )
+  GROUP BY player_username, rival_username
+`;
+
+// Schema changes for stats.db files created by older builds. Each entry runs once, in order,
+// inside its own transaction; PRAGMA user_version records how many have been applied.
+const migrations = [
+  // 1: participant indexes so per-player and head-to-head match lookups are index range scans
+  (db) => {
+    db.exec(`
+      CREATE INDEX IF NOT EXISTS idx_match_history_player_id ON match_history (player_id, opponent_id, played_at);
+      CREATE INDEX IF NOT EXISTS idx_match_history_opponent_id ON match_history (opponent_id, played_at);
+      CREATE INDEX IF NOT EXISTS idx_match_history_player_username ON match_history (player_username, opponent_username, played_at);
+      CREATE INDEX IF NOT EXISTS idx_match_history_opponent_username ON match_history (opponent_username, played_at);
+    `);
+  },
+  // 2: per-pair totals kept up to date by applyMatches, so rival stats are a primary key lookup
+  (db) => {
+    db.exec(`
+      CREATE TABLE IF NOT EXISTS head_to_head (
+        player_username TEXT NOT NULL,
+        rival_username TEXT NOT NULL,
+        games INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        losses INTEGER NOT NULL DEFAULT 0,
+        draws INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (player_username, rival_username)
+      ) WITHOUT ROWID;
+    `);
+    db.exec(HEAD_TO_HEAD_BACKFILL);
+  },
+  // 3: a player's Elo series in time order, for the score history routes and graph buckets
+  (db) => {
+    db.exec(`
+      CREATE INDEX IF NOT EXISTS idx_score_history_player_id ON score_history (player_id, played_at);
+      CREATE INDEX IF NOT EXISTS idx_score_history_player_username ON score_history (player_username, played_at);
+    `);
+  },
+  // 4: matches whose derived updates (Elo, counters, head-to-head, rivals, score_history) are still
+  // to be applied by utils/outbox.js. AUTOINCREMENT keeps ids growing after the table is emptied.
+  (db) => {
+    db.exec(`
+      CREATE TABLE IF NOT EXISTS match_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        match_id INTEGER NOT NULL,
+        queued_at INTEGER NOT NULL
+      );
+    `);
+  },
+];
+
+function runMigrations(fastify) {
+  const applied = db.pragma('user_version', { simple: true });
+  for (let version = applied; version < migrations.length; version++) {
+    db.transaction(() => {
+      migrations[version](db);
+      db.pragma(`user_version = ${version + 1}`);
+    })();
+    fastify.log.info(`Applied stats.db migration ${version + 1}`);
+  }
+}
 
+export function initDB(fastify) {
     try 
     {
         db = new Database(dbPath);
+        // WAL lets streamed exports read from their own connection without blocking match writes
+        db.pragma('journal_mode = WAL');
         fastify.log.info('Database opened: ' + dbPath);
     } 
         catch (err) 
@@ -60,6 +157,12 @@ db.prepare(`
       rank INTEGER NOT NULL DEFAULT 0
     )
   `).run();
+
+// rank is no longer written on every match; it is counted on read from this index
+db.prepare(`
+    CREATE INDEX IF NOT EXISTS idx_user_match_data_elo
+    ON user_match_data (elo_score DESC, player_id)
+  `).run();
   
 
 db.prepare(`
@@ -77,4 +180,8 @@ db.prepare(`
       UNIQUE(player_username, rival_username)
     )
   `).run();
-}
\ No newline at end of file
+
+runMigrations(fastify);
+
+for (const sql of [...Object.values(lookupQueries), ...Object.values(writeQueries)]) prepared(sql);
+}
@@ -0,0 +1,209 @@
+// Every query the public GET routes run. Each read worker (db/readWorker.js) prepares all of
+// them once on its own read-only connection; routes refer to them by name through readQuery().
+// mode is the better-sqlite3 statement method used to run it; run(stmt, params), when given,
+// replaces it for queries whose rows are post-processed in the worker.
+import { downsampleScoreHistory } from '../utils/downsample.js';
+
+// Rank of a single row: its position when ordered by elo_score DESC, ties broken by player_id,
+// counted on idx_user_match_data_elo (see calculateRank in utils/calculations.js).
+const RANK = `
+  (SELECT COUNT(*) FROM user_match_data WHERE elo_score > u.elo_score) +
+  (SELECT COUNT(*) FROM user_match_data WHERE elo_score = u.elo_score AND player_id < u.player_id) + 1`;
+
+// Start of the hour/day/week (Monday) each score_history point falls in, for graph buckets
+const SCORE_BUCKETS = {
+  hour: "strftime('%Y-%m-%d %H:00:00', played_at)",
+  day: 'date(played_at)',
+  week: "date(played_at, 'weekday 0', '-6 days')",
+};
+
+// One row per bucket: the min and max Elo in it and the last point (elo_score, played_at),
+// newest bucket first. Reads the player's points off idx_score_history_*.
+function scoreBuckets(column, bucket) {
+  return {
+    mode: 'all',
+    sql: `
+      SELECT bucket, MAX(CASE WHEN newest = 1 THEN elo_score END) AS elo_score,
+             MIN(elo_score) AS min_elo_score, MAX(elo_score) AS max_elo_score,
+             MAX(CASE WHEN newest = 1 THEN played_at END) AS played_at, COUNT(*) AS points
+      FROM (
+        SELECT elo_score, played_at, ${SCORE_BUCKETS[bucket]} AS bucket,
+               ROW_NUMBER() OVER (PARTITION BY ${SCORE_BUCKETS[bucket]} ORDER BY played_at DESC, id DESC) AS newest
+        FROM score_history WHERE ${column} = ?
+      )
+      GROUP BY bucket
+      ORDER BY bucket DESC`
+  };
+}
+
+// The whole series oldest first, reduced in the worker so only `points` rows cross to the main thread
+function scoreDownsampled(column) {
+  return {
+    sql: `SELECT * FROM score_history WHERE ${column} = ? ORDER BY played_at, id`,
+    run: (stmt, [key, points]) => downsampleScoreHistory(stmt.all(key), points)
+  };
+}
+
+const PUBLIC_USER_COLUMNS = `player_id, player_username, player_name, elo_score, games_played, games_won,
+  games_lost, games_draw, win_streak, longest_win_streak`;
+
+export const readQueries = {
+  matchHistoryPage: {
+    mode: 'all',
+    sql: 'SELECT * FROM match_history WHERE id > ? ORDER BY id LIMIT ?'
+  },
+  matchHistoryByPlayerId: {
+    mode: 'all',
+    sql: `
+      SELECT * FROM match_history WHERE player_id = ?
+      UNION SELECT * FROM match_history WHERE opponent_id = ?
+      ORDER BY played_at DESC`
+  },
+  matchHistoryByUsername: {
+    mode: 'all',
+    sql: `
+      SELECT * FROM match_history WHERE player_username = ?
+      UNION SELECT * FROM match_history WHERE opponent_username = ?
+      ORDER BY played_at DESC`
+  },
+
+  scoreHistoryPage: {
+    mode: 'all',
+    sql: 'SELECT * FROM score_history WHERE id > ? ORDER BY id LIMIT ?'
+  },
+  scoreHistoryByPlayerId: {
+    mode: 'all',
+    sql: 'SELECT * FROM score_history WHERE player_id = ? ORDER BY played_at DESC'
+  },
+  scoreHistoryByUsername: {
+    mode: 'all',
+    sql: 'SELECT * FROM score_history WHERE player_username = ? ORDER BY played_at DESC'
+  },
+  scoreHistoryByPlayerIdHour: scoreBuckets('player_id', 'hour'),
+  scoreHistoryByPlayerIdDay: scoreBuckets('player_id', 'day'),
+  scoreHistoryByPlayerIdWeek: scoreBuckets('player_id', 'week'),
+  scoreHistoryByUsernameHour: scoreBuckets('player_username', 'hour'),
+  scoreHistoryByUsernameDay: scoreBuckets('player_username', 'day'),
+  scoreHistoryByUsernameWeek: scoreBuckets('player_username', 'week'),
+  scoreHistoryByPlayerIdDownsampled: scoreDownsampled('player_id'),
+  scoreHistoryByUsernameDownsampled: scoreDownsampled('player_username'),
+
+  rivalsByPlayerId: {
+    mode: 'all',
+    sql: 'SELECT * FROM rivals WHERE player_id = ?'
+  },
+  rivalsByUsername: {
+    mode: 'all',
+    sql: 'SELECT * FROM rivals WHERE player_username = ?'
+  },
+
+  // Ranks of the whole table in one pass over idx_user_match_data_elo, rather than two counts per row
+  userMatchDataPage: {
+    mode: 'all',
+    sql: `
+      WITH ranked AS (
+        SELECT ${PUBLIC_USER_COLUMNS}, ROW_NUMBER() OVER (ORDER BY elo_score DESC, player_id) AS rank
+        FROM user_match_data
+      )
+      SELECT * FROM ranked
+      WHERE player_id > ? ORDER BY player_id LIMIT ?`
+  },
+  // The stored rank column is legacy and deliberately not selected
+  userMatchDataByPlayerId: {
+    mode: 'get',
+    sql: `SELECT ${PUBLIC_USER_COLUMNS}, ${RANK} AS rank FROM user_match_data u WHERE player_id = ?`
+  },
+  userMatchDataByUsername: {
+    mode: 'get',
+    sql: `SELECT ${PUBLIC_USER_COLUMNS}, ${RANK} AS rank FROM user_match_data u WHERE player_username = ?`
+  },
+  // Source of the in-memory leaderboard in utils/leaderboard.js; walks idx_user_match_data_elo
+  leaderboard: {
+    mode: 'all',
+    sql: `
+      SELECT player_id, player_username, player_name, elo_score, games_played, games_won, games_lost, games_draw
+      FROM user_match_data
+      WHERE games_played > 0
+      ORDER BY elo_score DESC, player_id`
+  },
+  eloScoreByUsername: {
+    mode: 'get',
+    sql: 'SELECT elo_score FROM user_match_data WHERE player_username = ?'
+  },
+};
+
+// Statements of the main connection that initDB() prepares up front, so prepared() only ever
+// finds them in its cache. Kept here so test/test_stats_query_plans.py checks the plans of the
+// statements that actually run.
+
+// Lookups of utils/calculations.js, run while applying matches
+export const lookupQueries = {
+  // identifier may be either a player id or a username. Each UNION arm is a range scan on
+  // one of the match_history participant indexes; UNION also drops rows matched by several arms.
+  matchHistoryForPlayer: `
+    SELECT * FROM match_history WHERE player_id = ?
+    UNION SELECT * FROM match_history WHERE opponent_id = ?
+    UNION SELECT * FROM match_history WHERE player_username = ?
+    UNION SELECT * FROM match_history WHERE opponent_username = ?
+    ORDER BY played_at DESC`,
+  // calculateRank(); the parameters are (elo_score, elo_score, player_id)
+  rank: `
+    SELECT
+      (SELECT COUNT(*) FROM user_match_data WHERE elo_score > ?) +
+      (SELECT COUNT(*) FROM user_match_data WHERE elo_score = ? AND player_id < ?) + 1 AS rank`,
+  headToHead: `
+    SELECT games, wins, losses, draws FROM head_to_head
+    WHERE player_username = ? AND rival_username = ?`,
+  rivalPair: 'SELECT * FROM rivals WHERE player_username = ? AND rival_username = ?',
+};
+
+// Every match goes through these: appended by ingestMatches, applied by the outbox applier
+export const writeQueries = {
+  insertMatch: `
+    INSERT INTO match_history (
+      player_username, opponent_username, played_at, duration, player_score, opponent_score, opponent_id, player_id, player_name, opponent_name, result, is_guest_opponent
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)`,
+  insertOutbox: 'INSERT INTO match_outbox (match_id, queued_at) VALUES (?, ?)',
+  // LEFT JOIN: an outbox row whose match has been deleted is dropped without applying anything
+  outboxBatch: `
+    SELECT o.id AS outbox_id, o.queued_at, m.*
+    FROM match_outbox o LEFT JOIN match_history m ON m.id = o.match_id
+    ORDER BY o.id
+    LIMIT ?`,
+  deleteOutboxThrough: 'DELETE FROM match_outbox WHERE id <= ?',
+  outboxPending: 'SELECT COUNT(*) AS n FROM match_outbox',
+  selectPlayer: `
+    SELECT elo_score, games_played, games_won, games_lost, games_draw, win_streak, longest_win_streak
+    FROM user_match_data WHERE player_id = ?`,
+  addScorePoint: `
+    INSERT INTO score_history (player_username, player_id, elo_score, played_at)
+    VALUES (?, ?, ?, ?)`,
+  upsertPlayer: `
+    INSERT INTO user_match_data (player_username, player_id, player_name, elo_score, games_played, games_lost, games_won, longest_win_streak, games_draw, win_streak)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(player_id) DO UPDATE SET
+    player_name = excluded.player_name,
+    elo_score = excluded.elo_score,
+    games_played = excluded.games_played,
+    games_lost = excluded.games_lost,
+    games_won = excluded.games_won,
+    games_draw = excluded.games_draw,
+    longest_win_streak = excluded.longest_win_streak,
+    player_username = excluded.player_username,
+    win_streak = excluded.win_streak`,
+  updateRival: `
+    UPDATE rivals
+    SET games_played_against_rival = ?,
+        wins_against_rival = ?,
+        loss_against_rival = ?,
+        rival_elo_score = ?
+    WHERE player_username = ? AND rival_username = ?`,
+  addHeadToHead: `
+    INSERT INTO head_to_head (player_username, rival_username, games, wins, losses, draws)
+    VALUES (?, ?, 1, ?, ?, ?)
+    ON CONFLICT(player_username, rival_username) DO UPDATE SET
+    games = games + 1,
+    wins = wins + excluded.wins,
+    losses = losses + excluded.losses,
+    draws = draws + excluded.draws`,
+};
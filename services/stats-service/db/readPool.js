@@ -0,0 +1,95 @@
+import { Worker } from 'worker_threads';
+import os from 'os';
+import { histogram, collector } from '../../shared/metrics.js';
+import { isHttpWorker } from '../utils/cluster.js';
+
+// better-sqlite3 is synchronous, so the public GET routes run their queries on a pool of
+// worker threads (db/readWorker.js) instead of the event loop. The main thread keeps the single
+// writer connection from db/init.js; with WAL the readers never block it, nor it them.
+// In cluster mode every HTTP worker process has its own pool, and one thread each already covers the cores.
+const POOL_SIZE = Number(process.env.STATS_READ_POOL_SIZE) || (isHttpWorker ? 1 : Math.min(4, os.availableParallelism()));
+// Requests waiting for a free worker. Beyond this readQuery fails fast with a 503 rather
+// than letting latency grow without bound.
+const QUEUE_DEPTH = Number(process.env.STATS_READ_QUEUE_DEPTH) || 1000;
+
+const RESPAWN_DELAY_MS = 1000;
+
+const queryDuration = histogram('stats_sqlite_query_duration_seconds', 'SQLite execution time by query name, measured where it runs');
+const queueWait = histogram('stats_read_queue_wait_seconds', 'Time a read query waited for a free worker');
+
+const workers = [];
+const queue = [];
+collector('stats_read_queue_depth', 'Read queries waiting for a worker', 'gauge', () => queue.length);
+collector('stats_read_workers_busy', 'Read workers running a query', 'gauge', () => workers.filter((slot) => slot.job).length);
+let log = console;
+let stopping = false;
+
+function spawnWorker() {
+  const slot = { worker: new Worker(new URL('./readWorker.js', import.meta.url)), job: null };
+  slot.worker.on('message', ({ rows, seconds, error }) => {
+    const { job } = slot;
+    slot.job = null;
+    if (seconds !== undefined) queryDuration.observe({ query: job.name }, seconds);
+    if (error) {
+      job.reject(new Error(error));
+    } else {
+      job.resolve(rows);
+    }
+    dispatch();
+  });
+  slot.worker.on('error', (err) => {
+    log.error(`Read worker failed: ${err.message}`);
+  });
+  // A worker only exits on its own if it crashed; fail its query and replace it. The delay keeps
+  // a worker that can't even open the database from restarting in a tight loop.
+  slot.worker.on('exit', () => {
+    workers.splice(workers.indexOf(slot), 1);
+    if (slot.job) slot.job.reject(new Error('Read worker exited'));
+    if (!stopping) {
+      setTimeout(() => {
+        if (stopping) return;
+        workers.push(spawnWorker());
+        dispatch();
+      }, RESPAWN_DELAY_MS);
+    }
+  });
+  return slot;
+}
+
+function dispatch() {
+  for (const slot of workers) {
+    if (queue.length === 0) return;
+    if (slot.job) continue;
+    slot.job = queue.shift();
+    queueWait.observe({}, (Date.now() - slot.job.queuedAt) / 1000);
+    slot.worker.postMessage({ name: slot.job.name, params: slot.job.params });
+  }
+}
+
+// Start the workers. Call after initDB() so the schema and migrations are in place.
+export function startReadPool(fastify) {
+  log = fastify.log;
+  for (let i = 0; i < POOL_SIZE; i++) {
+    workers.push(spawnWorker());
+  }
+  log.info(`Read pool started with ${POOL_SIZE} workers`);
+}
+
+export async function stopReadPool() {
+  stopping = true;
+  await Promise.all(workers.map((slot) => slot.worker.terminate()));
+}
+
+// Run a named query from db/queries.js on the pool. Resolves to the rows (or row, for 'get' queries).
+// Rejects with statusCode 503 when the queue is full.
+export function readQuery(name, ...params) {
+  if (queue.length >= QUEUE_DEPTH) {
+    const err = new Error('Stats service is busy, try again later');
+    err.statusCode = 503;
+    return Promise.reject(err);
+  }
+  return new Promise((resolve, reject) => {
+    queue.push({ name, params, resolve, reject, queuedAt: Date.now() });
+    dispatch();
+  });
+}
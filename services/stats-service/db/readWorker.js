@@ -0,0 +1,21 @@
+import { parentPort } from 'worker_threads';
+import { openReadOnlyDB } from './init.js';
+import { readQueries } from './queries.js';
+
+// One read-only connection per worker, with every public read prepared once up front.
+const db = openReadOnlyDB();
+const statements = {};
+for (const [name, { sql, mode, run }] of Object.entries(readQueries)) {
+  const stmt = db.prepare(sql);
+  statements[name] = run ? (params) => run(stmt, params) : (params) => stmt[mode](...params);
+}
+
+parentPort.on('message', ({ name, params }) => {
+  try {
+    const start = process.hrtime.bigint();
+    const rows = statements[name](params);
+    parentPort.postMessage({ rows, seconds: Number(process.hrtime.bigint() - start) / 1e9 });
+  } catch (err) {
+    parentPort.postMessage({ error: err.message });
+  }
+});
@@ -0,0 +1,76 @@
+import { requireService } from '../../shared/requireAuth.js';
+import { bulkMatchSchema, ingestMatchList } from './matchHistory.js';
+import { writer } from '../utils/writes.js';
+
+// Routes for the other services (game-service, auth-service) and the maintenance scripts,
+// authenticated with the ingest token instead of a user's access token. The gateway does not route /stats/internal/, so they are reachable on the internal network only.
+export default async function internalRoutes(fastify) {
+  // post /internal/match_results
+  // Results of the matches game-service refereed, as in /match_history/update_all
+  fastify.post('/match_results', {
+    preHandler: requireService,
+    schema: {
+      hide: true,
+      body: {
+        type: 'object',
+        required: ['matches'],
+        properties: {
+          matches: { type: 'array', minItems: 1, items: bulkMatchSchema }
+        }
+      }
+    }
+  }, async (request, reply) => {
+    try {
+      const { inserted, errors } = await ingestMatchList(request.body.matches);
+      reply.send({ inserted, errors });
+    } catch (err) {
+      reply.status(err.statusCode || 500).send({ error: err.message });
+    }
+  });
+
+  // post /internal/avatar_cache/invalidate
+  // auth-service calls this after a user changes their avatar (utils/avatarCache.js)
+  fastify.post('/avatar_cache/invalidate', {
+    preHandler: requireService,
+    schema: {
+      hide: true,
+      body: {
+        type: 'object',
+        required: ['username'],
+        properties: {
+          username: { type: 'string', minLength: 1 }
+        }
+      }
+    }
+  }, async (request, reply) => {
+    await writer.invalidateAvatar(request.body.username);
+    reply.send({ message: 'Avatar cache invalidated' });
+  });
+
+  // post /internal/ratings/invalidate
+  // scripts/replayElo.js calls this after rewriting every rating, so the leaderboard and the
+  // gateway's cached profiles do not keep serving the old ones
+  fastify.post('/ratings/invalidate', { preHandler: requireService, schema: { hide: true } }, async (request, reply) => {
+    try {
+      const players = await writer.invalidateRatings();
+      reply.send({ players });
+    } catch (err) {
+      reply.status(err.statusCode || 500).send({ error: err.message });
+    }
+  });
+
+  // get /internal/matches/:match_id
+  // game-service asks this which two players may join the room of a match (fetchMatch in its utils/stats.js)
+  fastify.get('/matches/:match_id', { preHandler: requireService, schema: { hide: true } }, async (request, reply) => {
+    try {
+      const match = await writer.getMatch(request.params.match_id);
+      if (match) {
+        reply.header('Cache-Control', 'no-store').send(match);
+      } else {
+        reply.status(404).send({ error: 'Match not found' });
+      }
+    } catch (err) {
+      reply.status(err.statusCode || 500).send({ error: err.message });
+    }
+  });
+}
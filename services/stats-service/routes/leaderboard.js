@@ -0,0 +1,66 @@
+import { getLeaderboard, leaderboardTag } from '../utils/leaderboard.js';
+import { getAvatarUrls, getAvatarGeneration } from '../utils/avatarCache.js';
+
+const leaderboardQuerySchema = {
+  type: 'object',
+  properties: {
+    limit: { type: 'integer', minimum: 1, maximum: 100, default: 10 },
+    // username whose neighbourhood is returned in `around`
+    around: { type: 'string' },
+    radius: { type: 'integer', minimum: 0, maximum: 50, default: 0 }
+  }
+};
+
+// If-None-Match wins over If-Modified-Since when both are sent (RFC 9110)
+function isNotModified(request, etag, lastModified) {
+  const ifNoneMatch = request.headers['if-none-match'];
+  if (ifNoneMatch) {
+    return ifNoneMatch.split(',').some((tag) => {
+      const t = tag.trim();
+      return t === '*' || t.replace(/^W\//, '') === etag;
+    });
+  }
+  const ifModifiedSince = Date.parse(request.headers['if-modified-since']);
+  return !Number.isNaN(ifModifiedSince)
+    && Math.floor(lastModified.getTime() / 1000) <= Math.floor(ifModifiedSince / 1000);
+}
+
+export default async function leaderboardRoutes(fastify) {
+  // /leaderboard?limit=10&around=<username>&radius=2
+  // Top `limit` players, plus `radius` players either side of `around` when given.
+  // Clients should revalidate with If-None-Match; the answer is 304 until a match is ingested
+  // or an avatar changes.
+  fastify.get('/', { schema: { querystring: leaderboardQuerySchema } }, async (request, reply) => {
+    try {
+      const board = await getLeaderboard();
+      const avatars = getAvatarGeneration();
+      const etag = leaderboardTag(board.version, avatars.generation);
+      const lastModified = new Date(Math.max(board.modifiedAt, avatars.changedAt));
+      reply
+        .header('ETag', etag)
+        .header('Last-Modified', lastModified.toUTCString())
+        .header('Cache-Control', 'no-cache');
+      if (isNotModified(request, etag, lastModified)) {
+        return reply.status(304).send();
+      }
+
+      const { limit, around, radius } = request.query;
+      const top = board.entries.slice(0, limit);
+      let nearby = [];
+      const index = around === undefined ? undefined : board.indexByUsername.get(around);
+      if (index !== undefined) {
+        nearby = board.entries.slice(Math.max(0, index - radius), index + radius + 1);
+      }
+
+      const avatarUrls = await getAvatarUrls([...top, ...nearby].map((entry) => entry.player_username));
+      const withAvatar = (entry) => ({ ...entry, avatarUrl: avatarUrls.get(entry.player_username) ?? null });
+      return {
+        total: board.entries.length,
+        top: top.map(withAvatar),
+        around: nearby.map(withAvatar)
+      };
+    } catch (err) {
+      reply.status(err.statusCode || 500).send({ error: err.message });
+    }
+  });
+}
@@ -1,110 +1,125 @@
-import { calculateEloScore, calculateGamesLost, calculateGamesPlayed, calculateGamesWon, calculateCurrentWinStreak, calculateLongestWinStreak, calculateGamesDraw, checkIfRivals, calculateGamesPlayedAgainstRival, calculateWinsAgainstRival, calculateLossAgainstRival} from '../utils/calculations.js'
-import { updateUserMatchDataTable, updateScoreHistoryTable, updateRivalsDataTable } from '../utils/updateFunctions.js';
-import { db } from '../db/init.js';
-import { requireAuth } from '../utils/auth.js';
+import readline from 'readline';
+import { readQuery } from '../db/readPool.js';
+import { requireAuth } from '../../shared/requireAuth.js';
+import { INGEST_BATCH_SIZE } from '../utils/matchIngest.js';
+import { writer } from '../utils/writes.js';
+import { listQuerySchema, parseIdCursor, sendList } from '../utils/listQuery.js';
 
-function handleSingleMatch(match, request) {
-    const {
-        player_username, opponent_username, played_at, duration, player_score, opponent_score,
-        opponent_id, player_id, player_name, opponent_name, result, is_guest_opponent = 0
-    } = match;
-
-    const missing =
-        opponent_username == null ||
-        played_at == null ||
-        duration == null ||
-        player_id == null ||
-        opponent_id == null ||
-        player_name == null ||
-        opponent_name == null ||
-        result == null ||
-        !['win', 'loss', 'draw'].includes(result) ||
-        typeof player_score !== 'number' ||
-        typeof opponent_score !== 'number';
+// ?wait=true: answer only once the submitted matches have been applied (read-your-writes)
+const waitQuerySchema = {
+    type: 'object',
+    properties: {
+        wait: { type: 'boolean', default: false }
+    }
+};
 
-    if (missing) {
-        throw new Error('player/opponent names, ids, duration, played_at, result, and numeric scores are required');
+async function handleSingleMatch(match, request) {
+    const { errors, outboxId } = await writer.ingestMatches([match], 0);
+    if (errors.length > 0) {
+        throw new Error(errors[0].error);
     }
+    return outboxId;
+}
 
-    const stmt = db.prepare(`
-        INSERT INTO match_history (
-            player_username, opponent_username, played_at, duration, player_score, opponent_score, opponent_id, player_id, player_name, opponent_name, result, is_guest_opponent
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    `);
-    stmt.run(player_username, opponent_username, played_at, duration, player_score, opponent_score, opponent_id, player_id, player_name, opponent_name, result, is_guest_opponent);
+// Applying has already started; with wait, resolve to whether everything up to outboxId was applied in time
+async function settle(outboxId, wait) {
+    return wait ? writer.waitForOutbox(outboxId) : outboxId === null;
+}
 
-    let outcome;
-    if (result === 'win')
-        outcome = 1;
-    else if (result === 'loss')
-        outcome = 0;
-    else
-        outcome = 0.5;
+// One match of a bulk upload (/update_all, and game-service's /internal/match_results)
+export const bulkMatchSchema = {
+    type: 'object',
+    required: [
+        'opponent_username', 'player_score', 'opponent_score', 'duration',
+        'player_name', 'opponent_name', 'result', 'played_at'
+    ],
+    properties: {
+        opponent_username: { type: 'string'},
+        opponent_id: { type: 'string' },
+        player_score: { type: 'integer' },
+        opponent_score: { type: 'integer'},
+        duration: { type: 'string', pattern: '^\\d{2}:\\d{2}:\\d{2}$'},
+        player_name: { type: 'string'},
+        opponent_name: {type: 'string'},
+        result: {type: 'string', enum: ['win', 'draw', 'loss']},
+        played_at: { type: 'string' },
+        is_guest_opponent: { type: 'integer', enum: [0, 1], default: 0}
+    }
+};
 
-    let eloChanges = null;
-    let playerElo = 0;
-    if (!is_guest_opponent) {
-        eloChanges = calculateEloScore(player_id, opponent_id, outcome, player_name, opponent_name);
-        playerElo = eloChanges.player1.new;
-    } else {
-        const userData = db.prepare('SELECT elo_score FROM user_match_data WHERE player_id = ?').get(player_id);
-        playerElo = userData ? userData.elo_score : 1000;
+// Hand an already parsed array to ingestMatches in INGEST_BATCH_SIZE slices
+export async function ingestMatchList(matches) {
+    let inserted = 0;
+    let outboxId = null;
+    const errors = [];
+    for (let start = 0; start < matches.length; start += INGEST_BATCH_SIZE) {
+        const res = await writer.ingestMatches(matches.slice(start, start + INGEST_BATCH_SIZE), start);
+        inserted += res.inserted;
+        errors.push(...res.errors);
+        outboxId = res.outboxId ?? outboxId;
     }
+    return { inserted, errors, outboxId };
+}
 
-    const gamesPlayed = calculateGamesPlayed(player_id);
-    const gamesLost = calculateGamesLost(player_id);
-    const gamesWon = calculateGamesWon(player_id);
-    const longestWinStreak = calculateLongestWinStreak(player_id);
-    const currentWinStreak = calculateCurrentWinStreak(player_id);
-    const gamesDraw = calculateGamesDraw(player_id);
+// Feed newline-delimited matches to ingestMatches in fixed-size batches, so a large
+// backfill is never held in memory at once. Unparseable lines are reported per index.
+async function ingestNdjson(stream) {
+    const lines = readline.createInterface({ input: stream, crlfDelay: Infinity });
+    const errors = [];
+    let inserted = 0;
+    let outboxId = null;
+    let batch = [];
+    let batchStart = 0;
+    let index = 0;
 
-    if (!is_guest_opponent) {
-        const opponentGamesPlayed = calculateGamesPlayed(opponent_id);
-        const opponentGamesLost = calculateGamesLost(opponent_id);
-        const opponentGamesWon = calculateGamesWon(opponent_id);
-        const opponentlongestWinStreak = calculateLongestWinStreak(opponent_id);
-        const opponentGamesDraw = calculateGamesDraw(opponent_id);
-        const opponentWinStreak = calculateCurrentWinStreak(opponent_id);
-        updateUserMatchDataTable(opponent_id, eloChanges.player2.new, opponent_name, opponentGamesPlayed, opponentGamesLost, opponentGamesWon, opponentlongestWinStreak, opponentGamesDraw, opponent_username, opponentWinStreak);
-        updateScoreHistoryTable(opponent_id, eloChanges.player2.new, played_at, opponent_username);
-    }
+    // each flushed batch can be applied while the rest of the body is still streaming in
+    const flush = async () => {
+        const res = await writer.ingestMatches(batch, batchStart);
+        inserted += res.inserted;
+        errors.push(...res.errors);
+        outboxId = res.outboxId ?? outboxId;
+        batch = [];
+        batchStart = index;
+    };
 
-    console.log("Updating rivals.. checkIfRivals was false");
-    if (checkIfRivals(player_username, opponent_username) && !is_guest_opponent) {
-        console.log("Updating rivals.. checkIfRivals was true");
-        const playedagainstRival1 = calculateGamesPlayedAgainstRival(player_username, opponent_username);
-        const gamesWonRival1 = calculateWinsAgainstRival(player_username, opponent_username);
-        const gamesLostRival1 = calculateLossAgainstRival(player_username, opponent_username);
-        updateRivalsDataTable(player_username, opponent_username, playedagainstRival1, gamesWonRival1, gamesLostRival1, eloChanges.player1.new);
-        const playedagainstRival2 = calculateGamesPlayedAgainstRival(opponent_username, player_username);
-        const gamesWonRival2 = calculateWinsAgainstRival(opponent_username, player_username);
-        const gamesLostRival2 = calculateLossAgainstRival(opponent_username, player_username);
-        updateRivalsDataTable(opponent_username, player_username, playedagainstRival2, gamesWonRival2, gamesLostRival2, eloChanges.player2.new);
+    for await (const line of lines) {
+        if (!line.trim()) continue;
+        try {
+            batch.push(JSON.parse(line));
+        } catch (err) {
+            // keep the slot so later indexes still line up with the input lines
+            batch.push(null);
+        }
+        index++;
+        if (batch.length >= INGEST_BATCH_SIZE) await flush();
     }
+    if (batch.length > 0) await flush();
 
-    updateUserMatchDataTable(player_id, playerElo, player_name, gamesPlayed, gamesLost, gamesWon, longestWinStreak, gamesDraw, player_username, currentWinStreak);
-    updateScoreHistoryTable(player_id, playerElo, played_at, player_username);
+    return { inserted, errors, outboxId };
 }
 
 export default async function matchHistoryRoutes(fastify) {
-    fastify.get('/', (request, reply) => {
+    // Hand NDJSON bodies to the route as the raw stream; /update_all consumes them line by line.
+    fastify.addContentTypeParser('application/x-ndjson', (request, payload, done) => {
+        done(null, payload);
+    });
+
+    fastify.get('/', { schema: { querystring: listQuerySchema } }, async (request, reply) => {
+        const after = parseIdCursor(request.query.after);
+        if (after === null) {
+            return reply.status(400).send({ error: 'after must be a match id' });
+        }
         try {
-            const rows = db.prepare('SELECT * FROM match_history').all();
-            reply.send(rows);
+            return sendList(reply, request.query, 'matchHistoryPage', after, (row) => row.id);
         } catch (err) {
-            reply.status(500).send({ error: err.message });
+            reply.status(err.statusCode || 500).send({ error: err.message });
         }
     });
     
-    fastify.get('/:player_id', (request, reply) => {
+    fastify.get('/:player_id', async (request, reply) => {
         const { player_id } = request.params
         try {
-            const stmt = db.prepare(`
-                SELECT * FROM match_history
-                WHERE player_id = ? OR opponent_id = ?
-                ORDER BY played_at DESC
-            `);
-            const rows = stmt.all(player_id, player_id);
+            const rows = await readQuery('matchHistoryByPlayerId', player_id, player_id);
             if (rows && rows.length > 0)
             {
                 reply.send(rows);
@@ -114,19 +129,14 @@ export default async function matchHistoryRoutes(fastify) {
                 reply.status(404).send({ error: 'Player id was not found' });
             }
         } catch (err) {
-            reply.status(500).send({ error: err.message });
+            reply.status(err.statusCode || 500).send({ error: err.message });
         }
     });
 
-    fastify.get('/username/:player_username', (request, reply) => {
+    fastify.get('/username/:player_username', async (request, reply) => {
         const { player_username } = request.params
         try {
-            const stmt = db.prepare(`
-                SELECT * FROM match_history
-                WHERE player_username = ? OR opponent_username = ?
-                ORDER BY played_at DESC
-            `);
-            const rows = stmt.all(player_username, player_username);
+            const rows = await readQuery('matchHistoryByUsername', player_username, player_username);
             if (rows && rows.length > 0)
             {
                 reply.send(rows);
@@ -136,7 +146,7 @@ export default async function matchHistoryRoutes(fastify) {
                 reply.status(404).send({ error: 'Player username was not found' });
             }
         } catch (err) {
-            reply.status(500).send({ error: err.message });
+            reply.status(err.statusCode || 500).send({ error: err.message });
         }
     });
 
@@ -146,6 +156,7 @@ export default async function matchHistoryRoutes(fastify) {
         schema: {
             tags: ['MatchHistory'],
             summary: 'Add a match to history',
+            querystring: waitQuerySchema,
             body: {
                 type: 'object',
                 required: [
@@ -169,14 +180,16 @@ export default async function matchHistoryRoutes(fastify) {
                 200: {
                     type: 'object',
                     properties: {
-                        message: { type: 'string' }
+                        message: { type: 'string' },
+                        // false until Elo, counters and rivals include this match
+                        applied: { type: 'boolean' }
                     }
                 },
                 400: {type: 'object', properties: { error: {type: 'string'} } },
                 500: {type: 'object', properties: { error: {type: 'string' } } }
             }
         }
-     }, (request, reply) => {
+     }, async (request, reply) => {
         const player_id = request.id;
         const player_username = request.username;
         const { opponent_username, opponent_id, player_score, opponent_score, duration, player_name, opponent_name, result, played_at, is_guest_opponent = 0 } = request.body;  // Display name voi vaihtua
@@ -201,16 +214,18 @@ export default async function matchHistoryRoutes(fastify) {
           });
         }
     
+        let outboxId;
         try {
-            handleSingleMatch({
+            outboxId = await handleSingleMatch({
                 player_username, opponent_username, played_at, duration, player_score, opponent_score,
                 opponent_id, player_id, player_name, opponent_name, result, is_guest_opponent
             }, request);
-            reply.send({ message: 'Match added to history successfully' });
         } catch (err) {
             console.error('Error when trying to add match history', err)
-            reply.status(500).send({ error: err.message });
+            return reply.status(err.statusCode || 500).send({ error: err.message });
         }
+        const applied = await settle(outboxId, request.query.wait);
+        return reply.send({ message: 'Match added to history successfully', applied });
     });
 
     fastify.post('/update_all', { 
@@ -218,33 +233,24 @@ export default async function matchHistoryRoutes(fastify) {
         schema: {
             tags: ['MatchHistory'],
             summary: 'Bulk add matches to history',
+            querystring: waitQuerySchema,
             body: {
-                type: 'object',
-                required: ['matches'],
-                properties: {
-                    matches: {
-                        type: 'array',
-                        minItems: 1,
-                        items: {
+                content: {
+                    'application/json': {
+                        schema: {
                             type: 'object',
-                            required: [
-                                'opponent_username', 'player_score', 'opponent_score', 'duration',
-                                'player_name', 'opponent_name', 'result', 'played_at'
-                            ],
+                            required: ['matches'],
                             properties: {
-                                opponent_username: { type: 'string'},
-                                opponent_id: { type: 'string' },
-                                player_score: { type: 'integer' },
-                                opponent_score: { type: 'integer'},
-                                duration: { type: 'string', pattern: '^\\d{2}:\\d{2}:\\d{2}$'},
-                                player_name: { type: 'string'},
-                                opponent_name: {type: 'string'},
-                                result: {type: 'string', enum: ['win', 'draw', 'loss']},
-                                played_at: { type: 'string' },
-                                is_guest_opponent: { type: 'integer', enum: [0, 1], default: 0}
+                                matches: {
+                                    type: 'array',
+                                    minItems: 1,
+                                    items: bulkMatchSchema
+                                }
                             }
                         }
-                    }
+                    },
+                    // one match object per line, validated item by item while streaming
+                    'application/x-ndjson': { schema: {} }
                 }
             },
             response: {
@@ -252,6 +258,7 @@ export default async function matchHistoryRoutes(fastify) {
                     type: 'object',
                     properties: {
                         inserted: {type: 'number'},
+                        applied: { type: 'boolean' },
                         errors: {
                             type: 'array',
                             items: {
@@ -268,21 +275,20 @@ export default async function matchHistoryRoutes(fastify) {
                 500: { type: 'object', properties: { error: { type: 'string' } } }
             }
         }
-     }, (request, reply) => {
+     }, async (request, reply) => {
+        if (request.headers['content-type']?.startsWith('application/x-ndjson')) {
+            const { inserted, errors, outboxId } = await ingestNdjson(request.body);
+            const applied = await settle(outboxId, request.query.wait);
+            return reply.send({ inserted, applied, errors });
+        }
+
         const { matches } = request.body ?? {};
         if (!Array.isArray(matches) || matches.length === 0) {
             return reply.status(400).send({ error: 'matches (array) required' });
         }
 
-        const errors = [];
-        for (let i = 0; i < matches.length; i++) {
-            try {
-                handleSingleMatch(matches[i], request);
-            } catch (err) {
-                errors.push({ index: i, error: err.message });
-            }
-        }
-
-        reply.send({ inserted: matches.length - errors.length, errors });
+        const { inserted, errors, outboxId } = await ingestMatchList(matches);
+        const applied = await settle(outboxId, request.query.wait);
+        return reply.send({ inserted, applied, errors });
     });
 }
@@ -0,0 +1,54 @@
+import { requireAuth } from '../../shared/requireAuth.js';
+import { writer } from '../utils/writes.js';
+import { MM_POLL_MS } from '../utils/matchmaking.js';
+
+const pollQuerySchema = {
+  type: 'object',
+  properties: {
+    // milliseconds to hold the request open while no match is found
+    wait: { type: 'integer', minimum: 0, maximum: MM_POLL_MS, default: MM_POLL_MS }
+  }
+};
+
+// Queue status or match, never cached
+function sendState(reply, state) {
+  reply.header('Cache-Control', 'no-store').send(state);
+}
+
+export default async function matchmakingRoutes(fastify) {
+  // post /matchmaking/queue
+  // Joins the queue with the player's current Elo. Answers { status: 'matched', ... } when an
+  // opponent is waiting already, otherwise { status: 'queued', ... }; then poll GET until matched.
+  fastify.post('/queue', { preHandler: requireAuth }, async (request, reply) => {
+    try {
+      const state = await writer.joinMatchmaking(request.id, request.username);
+      sendState(reply.status(state.status === 'matched' ? 200 : 202), state);
+    } catch (err) {
+      reply.status(err.statusCode || 500).send({ error: err.message });
+    }
+  });
+
+  // /matchmaking/queue?wait=25000
+  // Long-poll: answers as soon as the player is matched, or with their queue status after `wait`
+  // ms. Polling also keeps the player in the queue; players who stop polling are dropped.
+  fastify.get('/queue', { preHandler: requireAuth, schema: { querystring: pollQuerySchema } }, async (request, reply) => {
+    try {
+      sendState(reply, await writer.pollMatchmaking(request.username, request.query.wait));
+    } catch (err) {
+      reply.status(err.statusCode || 500).send({ error: err.message });
+    }
+  });
+
+  // delete /matchmaking/queue
+  fastify.delete('/queue', { preHandler: requireAuth }, async (request, reply) => {
+    try {
+      if (await writer.leaveMatchmaking(request.username)) {
+        reply.send({ message: 'Left the matchmaking queue' });
+      } else {
+        reply.status(404).send({ error: 'Not in the matchmaking queue' });
+      }
+    } catch (err) {
+      reply.status(err.statusCode || 500).send({ error: err.message });
+    }
+  });
+}
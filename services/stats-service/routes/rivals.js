@@ -1,17 +1,13 @@
-import { db } from '../db/init.js';
-import { requireAuth } from '../utils/auth.js';
-import { calculateLossAgainstRival, calculateGamesPlayedAgainstRival, calculateWinsAgainstRival, getEloScoreByUsername } from '../utils/calculations.js';
+import { readQuery } from '../db/readPool.js';
+import { requireAuth } from '../../shared/requireAuth.js';
+import { getAvatarUrls } from '../utils/avatarCache.js';
+import { writer } from '../utils/writes.js';
+import { debugLog } from '../utils/log.js';
 
-// Hakee avatarUrlin käyttäjänimellä
-async function getAvatarUrlByUsername(username) {
-    try {
-        const res = await fetch(`http://auth_service:3001/users/profile/${username}`);
-        if (!res.ok) return null;
-        const data = await res.json();
-        return data.avatarUrl || null;
-    } catch (err) {
-        return null;
-    }
+// Lisää rivaaleille avatarUrlit yhdellä haulla
+async function withAvatars(rows) {
+    const avatarUrls = await getAvatarUrls(rows.map((rival) => rival.rival_username));
+    return rows.map((rival) => ({ ...rival, avatarUrl: avatarUrls.get(rival.rival_username) ?? null }));
 }
 
 export default async function rivalsRoutes(fastify) {
@@ -19,48 +15,38 @@ export default async function rivalsRoutes(fastify) {
     fastify.get('/:player_id', async (request, reply) => {
         const { player_id } = request.params;
         try {
-            const stmt = db.prepare('SELECT * FROM rivals WHERE player_id = ?');
-            const rows = stmt.all(player_id);
+            const rows = await readQuery('rivalsByPlayerId', player_id);
             if (rows && rows.length > 0) {
-                const rivalsWithAvatars = await Promise.all(rows.map(async (rival) => {
-                    const avatarUrl = await getAvatarUrlByUsername(rival.rival_username);
-                    return { ...rival, avatarUrl };
-                }));
-                reply.send(rivalsWithAvatars);
+                reply.send(await withAvatars(rows));
             } else {
                 // Palauta tyhjä taulukko 200-statuksella
                 reply.send([]);
             }
         }
         catch (err) {
-            reply.status(500).send({ error: err.message });
+            reply.status(err.statusCode || 500).send({ error: err.message });
         }
     });
 
     fastify.get('/username/:player_username', async (request, reply) => {
         const { player_username } = request.params;
         try {
-            const stmt = db.prepare('SELECT * FROM rivals WHERE player_username = ?');
-            const rows = stmt.all(player_username);
+            const rows = await readQuery('rivalsByUsername', player_username);
             if (rows && rows.length > 0) {
-                const rivalsWithAvatars = await Promise.all(rows.map(async (rival) => {
-                    const avatarUrl = await getAvatarUrlByUsername(rival.rival_username);
-                    return { ...rival, avatarUrl };
-                }));
-                reply.send(rivalsWithAvatars);
+                reply.send(await withAvatars(rows));
             } else {
                 // Palauta tyhjä taulukko 200-statuksella
                 reply.send([]);
             }
         }
         catch (err) {
-            reply.status(500).send({ error: err.message });
+            reply.status(err.statusCode || 500).send({ error: err.message });
         }
     });
 
     // post /rivals
-    fastify.post('/', { preHandler: requireAuth }, (request, reply) => {
-        console.log("Inserting into rivals..")
+    fastify.post('/', { preHandler: requireAuth }, async (request, reply) => {
+        debugLog("Inserting into rivals..")
         const player_id = request.id;
         const player_username = request.username;
         const { rival_username } = request.body;
@@ -72,96 +58,50 @@ export default async function rivalsRoutes(fastify) {
         if (player_id === rival_id) {
             return reply.status(400).send({ error: 'Cannot add yourself as rival' });
         }
-        const LossAgainstRival1 = calculateLossAgainstRival(player_username, rival_username);
-        const GamesPlayedAgainstRival1 = calculateGamesPlayedAgainstRival(player_username, rival_username);
-        const WinsAgainstRival1 = calculateWinsAgainstRival(player_username, rival_username);
-        const rivalEloScore1 = getEloScoreByUsername(rival_username);
-        const LossAgainstRival2 = calculateLossAgainstRival(rival_username, player_username);
-        const GamesPlayedAgainstRival2 = calculateGamesPlayedAgainstRival(rival_username, player_username);
-        const WinsAgainstRival2 = calculateWinsAgainstRival(rival_username, player_username);
-        const rivalEloScore2 = getEloScoreByUsername(player_username);
-
 
         try {
-        const stmt = db.prepare(`
-            INSERT INTO rivals (player_id, rival_id, player_username, rival_username, games_played_against_rival, wins_against_rival, loss_against_rival, rival_elo_score)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        `);
-        const result = stmt.run(player_id, rival_id, player_username, rival_username, GamesPlayedAgainstRival1, WinsAgainstRival1, LossAgainstRival1, rivalEloScore1);
-        reply.send({ 
-            id: result.lastInsertRowid,
-            player_id, 
-            rival_id,
-            message: 'Rival added successfully'
-        });
+            const id = await writer.addRival(player_id, player_username, rival_id, rival_username);
+            reply.send({ 
+                id,
+                player_id, 
+                rival_id,
+                message: 'Rival added successfully'
+            });
         }
         catch (err) {
             // UNIQUE constraint violation
-            if (err.code === 'SQLITE_CONSTRAINT_UNIQUE') {
+            if (err.statusCode === 409) {
                 reply.status(409).send({ error: 'This rival already exists' });
             } else {
-                reply.status(500).send({ error: err.message });
+                reply.status(err.statusCode || 500).send({ error: err.message });
             }
         }
-
-        try {
-        const stmt = db.prepare(`
-            INSERT INTO rivals (player_id, rival_id, player_username, rival_username, games_played_against_rival, wins_against_rival, loss_against_rival, rival_elo_score)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        `);
-        const result = stmt.run(rival_id, player_id, rival_username, player_username, GamesPlayedAgainstRival2, WinsAgainstRival2, LossAgainstRival2, rivalEloScore2);
-        reply.send({ 
-            id: result.lastInsertRowid,
-            player_id, 
-            rival_id,
-            message: 'Rival added successfully'
-        });
-        }
-        catch (err) {
-            // UNIQUE constraint violation
-            if (err.code === 'SQLITE_CONSTRAINT_UNIQUE') {
-                reply.status(409).send({ error: 'This rival already exists' });
-            } else {
-                reply.status(500).send({ error: err.message });
-            }
-        }
-
     });
     
     // DELETE rival
     // /rivals/:rival_id
-    fastify.delete('/:rival_id', { preHandler: requireAuth }, (request, reply) => {
+    fastify.delete('/:rival_id', { preHandler: requireAuth }, async (request, reply) => {
         const player_id = request.id;
         const { rival_id } = request.params;
         try {
-            const stmt = db.prepare(`
-                DELETE FROM rivals 
-                WHERE player_id = ? AND rival_id = ?
-            `);
-            const result = stmt.run(player_id, rival_id);
-            if (result.changes === 0) {
+            const removed = await writer.removeRival(player_id, rival_id);
+            if (removed === 0) {
                 reply.status(404).send({ error: 'Rival not found' });
             } else {
-                reply.send({
-                id: result.lastInsertRowid, 
-                message: 'Rival removed successfully' });
+                reply.send({ message: 'Rival removed successfully' });
             }
         }
         catch (err) {
-            reply.status(500).send({ error: err.message });
+            reply.status(err.statusCode || 500).send({ error: err.message });
         }    
     });
 
-    fastify.delete('/username/:rival_username', { preHandler: requireAuth }, (request, reply) => {
+    fastify.delete('/username/:rival_username', { preHandler: requireAuth }, async (request, reply) => {
         const player_id = request.id;
         const { rival_username } = request.params;
         try {
-            const stmt = db.prepare(`
-                DELETE FROM rivals 
-                WHERE player_id = ? AND rival_username = ?
-            `);
-            const result = stmt.run(player_id, rival_username);
-            if (result.changes === 0) {
+            const removed = await writer.removeRivalByUsername(player_id, rival_username);
+            if (removed === 0) {
                 reply.status(404).send({ error: 'Rival not found' });
             } else {
                 reply.send({
@@ -170,7 +110,7 @@ export default async function rivalsRoutes(fastify) {
             }
         }
         catch (err) {
-            reply.status(500).send({ error: err.message });
+            reply.status(err.statusCode || 500).send({ error: err.message });
         }
      });
-}
\ No newline at end of file
+}
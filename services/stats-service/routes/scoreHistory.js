@@ -1,26 +1,54 @@
 
-import { db } from '../db/init.js';
+import { readQuery } from '../db/readPool.js';
+import { listQuerySchema, parseIdCursor, sendList } from '../utils/listQuery.js';
+
+// Graph-sized score history:
+//   ?bucket=hour|day|week  one row per bucket with its min, max and last Elo
+//   ?points=N              the series reduced to N shape-preserving points (LTTB)
+// Without either every recorded point is returned, as before.
+const graphQuerySchema = {
+  type: 'object',
+  properties: {
+    bucket: { type: 'string', enum: ['hour', 'day', 'week'] },
+    points: { type: 'integer', minimum: 3, maximum: 5000 }
+  }
+};
+
+const BUCKET_SUFFIX = { hour: 'Hour', day: 'Day', week: 'Week' };
+
+// Picks the readQueries entry for the requested shape; null when both shapes were asked for
+function graphQuery(base, key, { bucket, points }) {
+    if (bucket !== undefined && points !== undefined) return null;
+    if (bucket !== undefined) return [base + BUCKET_SUFFIX[bucket], key];
+    if (points !== undefined) return [base + 'Downsampled', key, points];
+    return [base, key];
+}
 
 export default async function scoreHistoryRoutes(fastify) {
     // /score_history
-    fastify.get('/', async (request, reply) => {
+    fastify.get('/', { schema: { querystring: listQuerySchema } }, async (request, reply) => {
+        const after = parseIdCursor(request.query.after);
+        if (after === null) {
+            return reply.status(400).send({ error: 'after must be a score history id' });
+        }
         try {
-            const stmt = db.prepare('SELECT * FROM score_history');
-            const rows = stmt.all();
-            reply.send(rows);
+            return sendList(reply, request.query, 'scoreHistoryPage', after, (row) => row.id);
         }
         catch (err)
         {
-            reply.status(500).send({ error: err.message });
+            reply.status(err.statusCode || 500).send({ error: err.message });
         }
     });
   
   // /score_history/:player_id
-    fastify.get('/:player_id', (request, reply) => {
+    fastify.get('/:player_id', { schema: { querystring: graphQuerySchema } }, async (request, reply) => {
         const { player_id } = request.params;
+        const query = graphQuery('scoreHistoryByPlayerId', player_id, request.query);
+        if (!query) {
+            return reply.status(400).send({ error: 'Use either bucket or points, not both' });
+        }
         try {
-            const stmt = db.prepare('SELECT * FROM score_history WHERE player_id = ? ORDER BY played_at DESC');
-            const rows = stmt.all(player_id);
+            const rows = await readQuery(...query);
             if (rows)
             {
                 reply.send(rows);
@@ -32,16 +60,19 @@ export default async function scoreHistoryRoutes(fastify) {
         }
         catch (err)
         {
-            reply.status(500).send({ error : err.message});
+            reply.status(err.statusCode || 500).send({ error : err.message});
         }
     });
 
     // /score_history/:player_username
-    fastify.get('/username/:player_username', (request, reply) => {
+    fastify.get('/username/:player_username', { schema: { querystring: graphQuerySchema } }, async (request, reply) => {
         const { player_username } = request.params;
+        const query = graphQuery('scoreHistoryByUsername', player_username, request.query);
+        if (!query) {
+            return reply.status(400).send({ error: 'Use either bucket or points, not both' });
+        }
         try {
-            const stmt = db.prepare('SELECT * FROM score_history WHERE player_username = ? ORDER BY played_at DESC');
-            const rows = stmt.all(player_username);
+            const rows = await readQuery(...query);
             if (rows)
             {
                 reply.send(rows);
@@ -53,7 +84,7 @@ export default async function scoreHistoryRoutes(fastify) {
         }
         catch (err)
         {
-            reply.status(500).send({ error : err.message});
+            reply.status(err.statusCode || 500).send({ error : err.message});
         }
     });
 }
\ No newline at end of file
@@ -1,61 +1,61 @@
-import { db } from '../db/init.js';
+import { readQuery } from '../db/readPool.js';
+import { listQuerySchema, sendList } from '../utils/listQuery.js';
+
 export default async function userMatchDataRoutes(fastify) {
   // /user_match_data
-  fastify.get('/', (request, reply) => {
+  // Pages and exports are ordered by player_id, which never changes, so cursors stay valid
+  // while scores move.
+  fastify.get('/', { schema: { querystring: listQuerySchema } }, async (request, reply) => {
+      const after = request.query.after ?? '';
       try {
-        const rows = db.prepare('SELECT * FROM user_match_data').all();
-        // Optionally, you could sort by rank or elo_score here
-        reply.send(rows);
+        return sendList(reply, request.query, 'userMatchDataPage', after, (row) => row.player_id);
       } catch (err) {
-        reply.status(500).send({ error: err.message });
+        reply.status(err.statusCode || 500).send({ error: err.message });
       }
     });
   // /user_match_data/:player_id
-  fastify.get('/:player_id', (request, reply) => {
+  fastify.get('/:player_id', async (request, reply) => {
       const { player_id } = request.params;
       try {
-        const stmt = db.prepare(`SELECT * FROM user_match_data WHERE player_id = ?`);
-        const row = stmt.get(player_id);
+        const row = await readQuery('userMatchDataByPlayerId', player_id);
         if (row) {
           reply.send(row);
         } else {
           reply.send([]);
         }
       } catch (err) {
-        reply.status(500).send({ error: err.message });
+        reply.status(err.statusCode || 500).send({ error: err.message });
       }
     });
 
   // /user_match_data/elo_score/:player_username
-  fastify.get('/elo_score/:player_username', (request, reply) => {
+  fastify.get('/elo_score/:player_username', async (request, reply) => {
     const { player_username } = request.params;
     try {
-      const stmt = db.prepare(`SELECT elo_score FROM user_match_data WHERE player_username = ?`);
-      const row = stmt.get(player_username);
+      const row = await readQuery('eloScoreByUsername', player_username);
       if (row && typeof row.elo_score === 'number') {
         reply.send({ elo_score: row.elo_score });
       } else {
         reply.send({ elo_score: 1000 });
       }
     } catch (err) {
-      reply.status(500).send({ error: err.message });
+      reply.status(err.statusCode || 500).send({ error: err.message });
     }
   });
 
   // /user_match_data/username/:player_username
-  fastify.get('/username/:player_username', (request, reply) => {
+  fastify.get('/username/:player_username', async (request, reply) => {
     const { player_username } = request.params;
     try {
-        const stmt = db.prepare(`SELECT * FROM user_match_data WHERE player_username = ?`);
-        const row = stmt.get(player_username);
+      const row = await readQuery('userMatchDataByUsername', player_username);
       if (row) {
         reply.send(row);
       } else {
         reply.send([]);
       }
     } catch (err) {
-      reply.status(500).send({ error: err.message });
+      reply.status(err.statusCode || 500).send({ error: err.message });
     }
   });
 
-}
+}
\ No newline at end of file
@@ -0,0 +1,18 @@
+// Recompute user_match_data counters and streaks, and the head_to_head pair totals, from match_history.
+// Run from the service directory (the database path is relative): npm run rebuild:user-match-data
+import { initDB, db } from '../db/init.js';
+import { rebuildUserMatchData, rebuildHeadToHead } from '../utils/updateFunctions.js';
+
+initDB({ log: console });
+
+try {
+    const started = Date.now();
+    const { matches, players } = rebuildUserMatchData();
+    const { pairs } = rebuildHeadToHead();
+    console.log(`✅ Rebuilt ${players} players and ${pairs} head-to-head rows from ${matches} matches in ${Date.now() - started} ms`);
+} catch (err) {
+    console.error('❌ Rebuild failed:', err);
+    process.exitCode = 1;
+} finally {
+    db.close();
+}
@@ -0,0 +1,54 @@
+// Replay every match to recompute Elo ratings, score_history and rival Elo snapshots.
+// Run from the service directory (the database path is relative): npm run replay:elo [-- --dry-run]
+//
+// The replay is one IMMEDIATE transaction (replayEloRatings in utils/updateFunctions.js), so a
+// running stats-service keeps serving the old ratings until it commits and queues its own writes
+// behind it. Afterwards the script asks the running service to drop what it cached from the old
+// ratings: POST /internal/ratings/invalidate rebuilds the leaderboard on its next read and purges
+// every player's profile pages from the gateway, as the outbox applier does after a batch. That
+// call needs the ingest token (services/shared/ingestToken.js), so run the script inside the
+// stats-service container: docker compose exec stats-service npm run replay:elo
+// STATS_URL points it at another instance. If the call fails, restart stats-service instead.
+import { initDB, db } from '../db/init.js';
+import { replayEloRatings } from '../utils/updateFunctions.js';
+import { loadIngestToken } from '../../shared/ingestToken.js';
+
+const STATS_URL = process.env.STATS_URL || `http://localhost:${process.env.PORT || 3001}`;
+const REQUEST_TIMEOUT_MS = 10000;
+
+const dryRun = process.argv.includes('--dry-run');
+
+async function invalidateRunningService() {
+    const token = loadIngestToken();
+    if (!token) throw new Error('no ingest token configured');
+    const response = await fetch(`${STATS_URL}/internal/ratings/invalidate`, {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${token}` },
+        signal: AbortSignal.timeout(REQUEST_TIMEOUT_MS)
+    });
+    if (!response.ok) throw new Error(`stats-service answered ${response.status}`);
+    return (await response.json()).players;
+}
+
+initDB({ log: console });
+
+try {
+    const started = Date.now();
+    const { matches, players, scorePoints } = replayEloRatings({ dryRun });
+    const verb = dryRun ? 'Would rewrite' : 'Rewrote';
+    console.log(`✅ ${verb} ${players} ratings and ${scorePoints} score points from ${matches} matches in ${Date.now() - started} ms`);
+} catch (err) {
+    console.error('❌ Replay failed:', err);
+    process.exitCode = 1;
+} finally {
+    db.close();
+}
+
+if (!dryRun && !process.exitCode) {
+    try {
+        const purged = await invalidateRunningService();
+        console.log(`✅ stats-service dropped its cached ratings and purged ${purged} players from the gateway`);
+    } catch (err) {
+        console.warn(`⚠️  Could not reach stats-service at ${STATS_URL} (${err.message}); restart it so it serves the new ratings`);
+    }
+}
@@ -0,0 +1,96 @@
+// Avatar URLs for rival lists, resolved in one batch call to auth-service (POST /users/profiles)
+// and cached per username. Users that auth-service doesn't know (guests, deleted accounts) are
+// cached too, for a shorter time, so they don't cause a lookup on every page load.
+// auth-service calls POST /internal/avatar_cache/invalidate after an avatar upload.
+import { broadcast, onBroadcast } from './cluster.js';
+import { collector, counter, histogram, startTimer } from '../../shared/metrics.js';
+
+const AUTH_SERVICE_URL = process.env.AUTH_SERVICE_URL || 'http://auth-service:3001';
+const AVATAR_TTL_MS = Number(process.env.AVATAR_CACHE_TTL_MS) || 5 * 60 * 1000;
+const MISSING_TTL_MS = Number(process.env.AVATAR_CACHE_MISSING_TTL_MS) || 60 * 1000;
+const AVATAR_CACHE_SIZE = Number(process.env.AVATAR_CACHE_SIZE) || 10000;
+
+const avatars = new Map();
+const lookups = counter('stats_avatar_cache_requests_total', 'Avatar URL lookups by cache result');
+const fetchDuration = histogram('stats_avatar_fetch_duration_seconds', 'Batched POST /users/profiles round trips to auth-service');
+collector('stats_avatar_cache_entries', 'Usernames in the avatar cache', 'gauge', () => avatars.size);
+// Bumped on every invalidation so cached responses that embed avatar URLs can be revalidated
+let generation = 0;
+let changedAt = Date.now();
+
+export function getAvatarGeneration() {
+  return { generation, changedAt };
+}
+
+function remember(username, avatarUrl, ttl) {
+  avatars.delete(username);
+  avatars.set(username, { avatarUrl, expiresAt: Date.now() + ttl });
+  if (avatars.size > AVATAR_CACHE_SIZE) {
+    avatars.delete(avatars.keys().next().value);
+  }
+}
+
+async function fetchProfiles(usernames) {
+  const elapsed = startTimer();
+  const res = await fetch(`${AUTH_SERVICE_URL}/users/profiles`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ usernames })
+  });
+  if (!res.ok) throw new Error(`auth-service responded ${res.status}`);
+  const { data } = await res.json();
+  fetchDuration.observe({}, elapsed());
+  return data;
+}
+
+// Returns Map<username, avatarUrl|null>. If auth-service can't be reached the uncached users
+// get null (and nothing is cached), same as the old per-rival lookup did.
+export async function getAvatarUrls(usernames) {
+  const result = new Map();
+  const wanted = [];
+  const now = Date.now();
+  for (const username of new Set(usernames)) {
+    const entry = avatars.get(username);
+    if (entry && entry.expiresAt > now) {
+      result.set(username, entry.avatarUrl);
+    } else {
+      wanted.push(username);
+    }
+  }
+  lookups.inc({ result: 'hit' }, result.size);
+  lookups.inc({ result: 'miss' }, wanted.length);
+  if (wanted.length === 0) return result;
+
+  try {
+    const { profiles, missing } = await fetchProfiles(wanted);
+    for (const profile of profiles) {
+      remember(profile.username, profile.avatarUrl ?? null, AVATAR_TTL_MS);
+      result.set(profile.username, profile.avatarUrl ?? null);
+    }
+    for (const username of missing) {
+      remember(username, null, MISSING_TTL_MS);
+      result.set(username, null);
+    }
+  } catch (err) {
+    console.error('🚨 Avatar lookup failed:', err.message);
+  }
+  for (const username of wanted) {
+    if (!result.has(username)) result.set(username, null);
+  }
+  return result;
+}
+
+// In cluster mode this runs in the writer (see writeOps in utils/writes.js), which owns the
+// generation and passes the invalidation on to every worker's cache
+export function invalidateAvatar(username) {
+  avatars.delete(username);
+  generation++;
+  changedAt = Date.now();
+  broadcast('avatar', { username, generation, changedAt });
+}
+
+onBroadcast('avatar', (change) => {
+  avatars.delete(change.username);
+  generation = change.generation;
+  changedAt = change.changedAt;
+});
@@ -1,9 +1,11 @@
-import { db } from '../db/init.js';
+import { prepared } from '../db/init.js';
+import { lookupQueries } from '../db/queries.js';
+import { debugLog } from './log.js';
 
 
 function getEloScore(player_id) {
     try {
-      const stmt = db.prepare(`SELECT elo_score FROM user_match_data WHERE player_id = ?`);
+      const stmt = prepared(`SELECT elo_score FROM user_match_data WHERE player_id = ?`);
       const row = stmt.get(player_id);
       return row ? row.elo_score : 1000;
     } 
@@ -14,11 +16,18 @@ function getEloScore(player_id) {
     }
 }
 
+// Rank is the player's position when ordered by elo_score DESC, ties broken by player_id.
+// Both counts are range scans over idx_user_match_data_elo, so nothing has to be rewritten when scores change.
+export function calculateRank(elo_score, player_id) {
+  const stmt = prepared(lookupQueries.rank);
+  return stmt.get(elo_score, elo_score, player_id).rank;
+}
+
 export function getRankByPlayerId(player_id) {
   try {
-    const stmt = db.prepare(`SELECT rank FROM user_match_data WHERE player_id = ?`);
+    const stmt = prepared(`SELECT elo_score FROM user_match_data WHERE player_id = ?`);
     const row = stmt.get(player_id);
-    return row ? row.rank : 0;
+    return row ? calculateRank(row.elo_score, player_id) : 0;
   } catch (err) {
     console.error('Error getting rank:', err);
     return 0;
@@ -27,7 +36,7 @@ export function getRankByPlayerId(player_id) {
 
 export function getEloScoreByUsername(player_username) {
   try {
-      const stmt = db.prepare(`SELECT elo_score FROM user_match_data WHERE player_username = ?`);
+      const stmt = prepared(`SELECT elo_score FROM user_match_data WHERE player_username = ?`);
       const row = stmt.get(player_username);
       return row ? row.elo_score : 1000;
     } 
@@ -40,9 +49,9 @@ export function getEloScoreByUsername(player_username) {
 
 export function getRankByUsername(player_username) {
   try {
-    const stmt = db.prepare(`SELECT rank FROM user_match_data WHERE player_username = ?`);
+    const stmt = prepared(`SELECT player_id, elo_score FROM user_match_data WHERE player_username = ?`);
     const row = stmt.get(player_username);
-    return row ? row.rank : 0;
+    return row ? calculateRank(row.elo_score, row.player_id) : 0;
   } catch (err) {
     console.error('Error getting rank:', err);
     return 0;
@@ -54,33 +63,38 @@ function eloProbability(rating1, rating2)
   return 1 / (1 + Math.pow(10, (rating1 - rating2) / 400));
 }
 
-export function calculateEloScore(player_id1, player_id2, outcome, player1_name, player2_name)
+// outcome argument of calculateEloChange for a match_history.result (player 1 = the row's player)
+export const ELO_OUTCOME = { win: 1, loss: 0, draw: 0.5 };
+
+// New ratings for both players after one game, given their ratings going in.
+// outcome = 1 for player 1 win, outcome = 0 player 2 win, outcome = 0.5 means draw
+export function calculateEloChange(rating1, rating2, outcome)
 {
-  let rating1 = getEloScore(player_id1);
-  let rating2 = getEloScore(player_id2);
-  let P1;
-  let P2;
   let K = 30;
-  //outcome = 1 for player_id1 win, outcome = 0 player_id2 win, outcome = 0.5 means draw
-  P1 = eloProbability(rating1, rating2);
-  P2 = eloProbability(rating2, rating1);
+  let P1 = eloProbability(rating1, rating2);
+  let P2 = eloProbability(rating2, rating1);
 
   let newRating1 = rating1 + K * (outcome - P1);
   let newRating2 = rating2 + K * ((1 - outcome) - P2);
+  return { player1: Math.round(newRating1), player2: Math.round(newRating2) };
+}
+
+export function calculateEloScore(player_id1, player_id2, outcome, player1_name, player2_name)
+{
+  let rating1 = getEloScore(player_id1);
+  let rating2 = getEloScore(player_id2);
+  const change = calculateEloChange(rating1, rating2, outcome);
   return {
-      player1: { name: player1_name, old: rating1, new: Math.round(newRating1) },
-      player2: { name: player2_name, old: rating2, new: Math.round(newRating2) }
+      player1: { name: player1_name, old: rating1, new: change.player1 },
+      player2: { name: player2_name, old: rating2, new: change.player2 }
   }
 }
 
+// identifier may be either a player id or a username
 function getMatchHistoryForPlayer(identifier)
 {
     try {
-        const stmt = db.prepare(`
-            SELECT * FROM match_history
-            WHERE player_id = ? OR opponent_id = ? OR player_username = ? OR opponent_username = ?
-            ORDER BY played_at DESC
-        `);
+        const stmt = prepared(lookupQueries.matchHistoryForPlayer);
         return stmt.all(identifier, identifier, identifier, identifier);
     }
     catch (err)
@@ -90,29 +104,6 @@ function getMatchHistoryForPlayer(identifier)
     }
 }
 
-function getMatchHistoryForAgainstRival(player_identifier, rival_identifier) {
-  try {
-    const stmt = db.prepare(`
-      SELECT * FROM match_history
-      WHERE (
-        player_id = ? OR opponent_id = ? OR player_username = ? OR opponent_username = ?
-      ) AND (
-        player_id = ? OR opponent_id = ? OR player_username = ? OR opponent_username = ?
-      )
-      ORDER BY played_at DESC
-    `);
-
-    return stmt.all(
-      player_identifier, player_identifier, player_identifier, player_identifier,
-      rival_identifier, rival_identifier, rival_identifier, rival_identifier
-    );
-  } catch (err) {
-    console.error('Error fetching matches against rival:', err);
-    return [];
-  }
-}
-
-
 export function calculateLongestWinStreak(player_id) {
   const rows = getMatchHistoryForPlayer(player_id);
   let currentStreak = 0;
@@ -152,40 +143,22 @@ export function calculateCurrentWinStreak(player_id) {
 }
 
 export function checkIfRivals(player_username, rival_username) {
-  const stmt = db.prepare(`
-    SELECT * FROM RIVALS
-    WHERE (player_username = ?) AND (rival_username = ?) 
-  `)
+  const stmt = prepared(lookupQueries.rivalPair)
   const row = stmt.get(player_username, rival_username)
   if (row) {
     return row;
   }
   else
   {
-    console.log("Player and opponent wasn't rivals");
+    debugLog("Player and opponent wasn't rivals");
     return null;
   }
 }
 
-export function calculateWinsAgainstRival(player_username, rival_username) {
-  return getMatchHistoryForAgainstRival(player_username, rival_username)
-    .filter(row =>
-      (row.player_username === player_username && row.result === 'win') ||
-      (row.opponent_username === player_username && row.result === 'loss')
-    ).length;
-}
-
-
-export function calculateLossAgainstRival(player_username, rival_username) {
-  return getMatchHistoryForAgainstRival(player_username, rival_username)
-    .filter(row =>
-      (row.player_username === player_username && row.result === 'loss') ||
-      (row.opponent_username === player_username && row.result === 'win')
-    ).length;
-}
-
-export function calculateGamesPlayedAgainstRival(player_username, rival_username) {
-  return getMatchHistoryForAgainstRival(player_username, rival_username).length;
+// Totals of player_username's games against rival_username, from the head_to_head table
+export function getHeadToHead(player_username, rival_username) {
+  const row = prepared(lookupQueries.headToHead).get(player_username, rival_username);
+  return row ?? { games: 0, wins: 0, losses: 0, draws: 0 };
 }
 
 export function calculateGamesPlayed(player_id) {
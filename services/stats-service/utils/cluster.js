@@ -0,0 +1,98 @@
+import cluster from 'cluster';
+import os from 'os';
+
+// Cluster mode, STATS_CLUSTER_WORKERS=N (or "auto": one per core but one): the primary process is the
+// single writer. It owns the read-write stats.db connection, the migrations and the outbox applier,
+// and runs every mutation on behalf of N HTTP worker processes, one at a time in arrival order.
+// The workers answer reads from their own read-only connections (db/readPool.js) and send writes
+// here over IPC (utils/writes.js). Caches the writer invalidates are updated in every worker by
+// broadcast. Unset or 0: one process does everything, as before.
+const configured = process.env.STATS_CLUSTER_WORKERS;
+export const CLUSTER_WORKERS = configured === 'auto'
+  ? Math.max(1, os.availableParallelism() - 1)
+  : Number(configured) || 0;
+
+export const isHttpWorker = cluster.isWorker;
+export const isWriterProcess = cluster.isPrimary && CLUSTER_WORKERS > 0;
+
+// Identifies this deployment in ETags; the workers inherit the writer's, so every worker sends
+// the same tag for the same data
+export const bootId = process.env.STATS_BOOT_ID || Date.now().toString(36);
+
+const calls = new Map();
+let nextCallId = 0;
+const broadcastHandlers = new Map();
+
+// Worker side: run writeOps[op](...args) in the writer. Rejects with the writer's error, statusCode included.
+export function callWriter(op, ...args) {
+  return new Promise((resolve, reject) => {
+    if (!process.connected) {
+      const err = new Error('Stats writer is not available');
+      err.statusCode = 503;
+      reject(err);
+      return;
+    }
+    const id = ++nextCallId;
+    calls.set(id, { resolve, reject });
+    process.send({ type: 'call', id, op, args });
+  });
+}
+
+// Worker side: handler(data) runs for every broadcast(topic, data) the writer makes
+export function onBroadcast(topic, handler) {
+  broadcastHandlers.set(topic, handler);
+}
+
+if (isHttpWorker) {
+  process.on('message', (message) => {
+    if (message.type === 'result') {
+      const call = calls.get(message.id);
+      if (!call) return;
+      calls.delete(message.id);
+      if (message.error) {
+        call.reject(Object.assign(new Error(message.error.message), message.error));
+      } else {
+        call.resolve(message.result);
+      }
+    } else if (message.type === 'broadcast') {
+      broadcastHandlers.get(message.topic)?.(message.data);
+    }
+  });
+  // Writes in flight when the writer goes away will never be answered
+  process.on('disconnect', () => {
+    for (const [id, call] of calls) {
+      calls.delete(id);
+      call.reject(Object.assign(new Error('Stats writer is not available'), { statusCode: 503 }));
+    }
+  });
+}
+
+// Writer side: tell one worker, or every worker, about a change. A no-op outside cluster mode.
+export function sendTo(worker, topic, data) {
+  if (worker.isConnected()) worker.send({ type: 'broadcast', topic, data });
+}
+
+export function broadcast(topic, data) {
+  if (!isWriterProcess) return;
+  for (const worker of Object.values(cluster.workers)) sendTo(worker, topic, data);
+}
+
+// Writer side: answer callWriter() from the workers with ops[op]. Calls are started in arrival
+// order; better-sqlite3 is synchronous, so their transactions never interleave.
+export function serveWriterCalls(ops) {
+  cluster.on('message', async (worker, message) => {
+    if (message.type !== 'call') return;
+    let reply;
+    try {
+      if (!Object.hasOwn(ops, message.op)) throw new Error(`Unknown writer op: ${message.op}`);
+      reply = { type: 'result', id: message.id, result: await ops[message.op](...message.args) };
+    } catch (err) {
+      reply = {
+        type: 'result',
+        id: message.id,
+        error: { message: err.message, statusCode: err.statusCode, code: err.code }
+      };
+    }
+    if (worker.isConnected()) worker.send(reply);
+  });
+}
@@ -0,0 +1,51 @@
+// Largest-Triangle-Three-Buckets: reduce a time series to `threshold` points while keeping its
+// visual shape. The first and last points are always kept; in between, every bucket keeps the
+// point that forms the largest triangle with the point kept before it and the average of the
+// next bucket. `rows` must be sorted by x. Rows are returned as they are, not copied.
+export function lttb(rows, threshold, x, y) {
+  if (threshold >= rows.length || threshold < 3) return rows;
+
+  const sampled = [rows[0]];
+  const every = (rows.length - 2) / (threshold - 2);
+  let a = 0;
+  for (let i = 0; i < threshold - 2; i++) {
+    const nextStart = Math.floor((i + 1) * every) + 1;
+    const nextEnd = Math.min(Math.floor((i + 2) * every) + 1, rows.length);
+    let avgX = 0;
+    let avgY = 0;
+    for (let j = nextStart; j < nextEnd; j++) {
+      avgX += x(rows[j], j);
+      avgY += y(rows[j]);
+    }
+    avgX /= nextEnd - nextStart;
+    avgY /= nextEnd - nextStart;
+
+    const ax = x(rows[a], a);
+    const ay = y(rows[a]);
+    let maxArea = -1;
+    let picked = 0;
+    for (let j = Math.floor(i * every) + 1; j < nextStart; j++) {
+      const area = Math.abs((ax - avgX) * (y(rows[j]) - ay) - (ax - x(rows[j], j)) * (avgY - ay));
+      if (area > maxArea) {
+        maxArea = area;
+        picked = j;
+      }
+    }
+    sampled.push(rows[picked]);
+    a = picked;
+  }
+  sampled.push(rows[rows.length - 1]);
+  return sampled;
+}
+
+// played_at is either ISO 8601 (sent by clients) or SQLite's 'YYYY-MM-DD HH:MM:SS' UTC default
+function playedAtMs(row, index) {
+  if (!row.played_at) return index;
+  const ms = Date.parse(row.played_at.includes('T') ? row.played_at : row.played_at.replace(' ', 'T') + 'Z');
+  return Number.isNaN(ms) ? index : ms;
+}
+
+// score_history rows (oldest first) reduced to `points` rows, newest first like the unsampled routes
+export function downsampleScoreHistory(rows, points) {
+  return lttb(rows, points, playedAtMs, (row) => row.elo_score).reverse();
+}
@@ -0,0 +1,85 @@
+import { counter } from '../../shared/metrics.js';
+
+// The gateway micro-caches the public profile and leaderboard reads (see
+// gateway/public_cache.conf). After the outbox applier changes a player's stats, their cached
+// pages and the leaderboard are purged so the next view is fresh instead of up to 10 s old.
+// Purges are collected for one turn of the event loop, sent without waiting for them, and
+// failures only cost that staleness. Off unless GATEWAY_PURGE_URL is set.
+const PURGE_URL = process.env.GATEWAY_PURGE_URL;
+const PURGE_CONCURRENCY = 8;
+const PURGE_TIMEOUT_MS = 1000;
+// Past this many keys (a big bulk upload) the entries are left to expire on their own
+const MAX_PURGES = Number(process.env.GATEWAY_MAX_PURGES) || 2000;
+// score_history as the profile graph asks for it (fetchScoreHistory's default)
+const PROFILE_GRAPH_POINTS = 300;
+// The leaderboard page's top list (frontend/pages/Leaderboard.tsx)
+const LEADERBOARD_PAGE_SIZE = 10;
+
+const purges = counter('stats_gateway_purges_total', 'Gateway cache purges by outcome');
+
+const pending = new Set();
+// Settles when the next flush has been sent
+let scheduled = null;
+
+// The same list is cached with and without the trailing slash. Every applied match can move the
+// leaderboard, so its bare and default-size keys go too; other ?limit= variants expire on their own.
+const LISTS = ['user_match_data', 'match_history', 'score_history', 'leaderboard']
+  .flatMap((route) => [`/stats/${route}`, `/stats/${route}/`])
+  .concat(`/stats/leaderboard?limit=${LEADERBOARD_PAGE_SIZE}`);
+
+function playerPaths(player_id, username) {
+  const paths = [];
+  if (player_id != null) {
+    paths.push(`/stats/user_match_data/${player_id}`, `/stats/match_history/${player_id}`, `/stats/score_history/${player_id}`);
+  }
+  if (username != null) {
+    const u = encodeURIComponent(username);
+    paths.push(
+      `/stats/user_match_data/username/${u}`,
+      `/stats/user_match_data/elo_score/${u}`,
+      `/stats/match_history/username/${u}`,
+      `/stats/score_history/username/${u}`,
+      `/stats/score_history/username/${u}?points=${PROFILE_GRAPH_POINTS}`,
+      // The leaderboard page of this player, as fetchLeaderboard builds its query
+      `/stats/leaderboard?${new URLSearchParams({ limit: String(LEADERBOARD_PAGE_SIZE), around: username })}`
+    );
+  }
+  return paths;
+}
+
+async function purge(path) {
+  try {
+    const res = await fetch(`${PURGE_URL}${path}`, { method: 'PURGE', signal: AbortSignal.timeout(PURGE_TIMEOUT_MS) });
+    // 404: nothing was cached under that key
+    purges.inc({ result: res.ok ? 'purged' : res.status === 404 ? 'not_cached' : 'failed' });
+  } catch (err) {
+    purges.inc({ result: 'failed' });
+  }
+}
+
+async function flush() {
+  scheduled = null;
+  const paths = [...pending];
+  pending.clear();
+  if (paths.length > MAX_PURGES) {
+    purges.inc({ result: 'skipped' }, paths.length);
+    return;
+  }
+  for (let i = 0; i < paths.length; i += PURGE_CONCURRENCY) {
+    await Promise.all(paths.slice(i, i + PURGE_CONCURRENCY).map(purge));
+  }
+}
+
+// players: [{ player_id, username }] whose stats, match history or score history changed.
+// Resolves once the purges have been answered, so ?wait=true readers never see the old page.
+export function purgePlayers(players) {
+  if (!PURGE_URL) return Promise.resolve();
+  for (const path of LISTS) pending.add(path);
+  for (const { player_id, username } of players) {
+    for (const path of playerPaths(player_id, username)) pending.add(path);
+  }
+  if (!scheduled) {
+    scheduled = new Promise((resolve) => setImmediate(() => flush().then(resolve)));
+  }
+  return scheduled;
+}
@@ -0,0 +1,60 @@
+import { readQuery } from '../db/readPool.js';
+import { bootId, broadcast, onBroadcast } from './cluster.js';
+import { counter } from '../../shared/metrics.js';
+
+// In-memory copy of the ranked players, rebuilt from the read pool on the first request after
+// the outbox applier invalidates it. Concurrent requests share one rebuild. Only players with at
+// least one game are listed, and rank is the position in this list.
+// In cluster mode the writer owns version and modifiedAt and broadcasts them, so every worker
+// rebuilds after a change and tags the same data with the same ETag.
+let version = 0;
+let modifiedAt = Date.now();
+let current = null;
+const lookups = counter('stats_leaderboard_cache_requests_total', 'Leaderboard reads served from memory (hit) or rebuilt (miss)');
+
+export function invalidateLeaderboard() {
+  version++;
+  modifiedAt = Date.now();
+  broadcast('leaderboard', getLeaderboardState());
+}
+
+export function getLeaderboardState() {
+  return { version, modifiedAt };
+}
+
+onBroadcast('leaderboard', (state) => {
+  version = state.version;
+  modifiedAt = state.modifiedAt;
+});
+
+async function build() {
+  const rows = await readQuery('leaderboard');
+  const indexByUsername = new Map();
+  const entries = rows.map((row, i) => {
+    indexByUsername.set(row.player_username, i);
+    return { rank: i + 1, ...row };
+  });
+  return { entries, indexByUsername };
+}
+
+// Returns { version, modifiedAt, entries, indexByUsername }
+export async function getLeaderboard() {
+  if (!current || current.version !== version) {
+    lookups.inc({ result: 'miss' });
+    const building = { version, modifiedAt, view: build() };
+    current = building;
+    // A failed build must not stick around for everyone else
+    building.view.catch(() => {
+      if (current === building) current = null;
+    });
+  } else {
+    lookups.inc({ result: 'hit' });
+  }
+  const { version: builtVersion, modifiedAt: builtAt, view } = current;
+  return { version: builtVersion, modifiedAt: builtAt, ...(await view) };
+}
+
+// bootId distinguishes versions across restarts, since version starts from 0 again
+export function leaderboardTag(leaderboardVersion, avatarGeneration) {
+  return `"${bootId}-${leaderboardVersion}-${avatarGeneration}"`;
+}
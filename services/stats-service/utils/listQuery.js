@@ -0,0 +1,79 @@
+import { Readable } from 'stream';
+import { readQuery } from '../db/readPool.js';
+
+export const MAX_PAGE_SIZE = 1000;
+
+// Shared querystring for the public list endpoints:
+//   ?limit=N&after=<cursor>  one keyset page (N defaults to MAX_PAGE_SIZE); X-Next-Cursor is set
+//                            while more rows may follow
+//   ?all=true                the whole table (from `after`, if given), streamed; limit is ignored
+//   ?format=ndjson           one JSON object per line instead of a JSON array
+export const listQuerySchema = {
+  type: 'object',
+  properties: {
+    limit: { type: 'integer', minimum: 1, maximum: MAX_PAGE_SIZE },
+    after: { type: 'string' },
+    all: { type: 'boolean', default: false },
+    format: { type: 'string', enum: ['json', 'ndjson'], default: 'json' }
+  }
+};
+
+// Integer cursors (row ids) arrive as strings; returns null when the value is not usable.
+export function parseIdCursor(after) {
+  if (after === undefined) return 0;
+  const id = Number(after);
+  return Number.isSafeInteger(id) ? id : null;
+}
+
+// Send one already-fetched keyset page. cursorOf(row) gives the value the next page starts after.
+function sendPage(reply, rows, { limit, format }, cursorOf) {
+  if (rows.length === limit) {
+    reply.header('X-Next-Cursor', String(cursorOf(rows[rows.length - 1])));
+  }
+  if (format === 'ndjson') {
+    return reply.type('application/x-ndjson').send(rows.map((row) => JSON.stringify(row) + '\n').join(''));
+  }
+  return reply.send(rows);
+}
+
+// One chunk per page, so the export never holds more than MAX_PAGE_SIZE rows
+async function* serialize(pages, format) {
+  if (format !== 'ndjson') yield '[';
+  let first = true;
+  for await (const rows of pages) {
+    if (format === 'ndjson') {
+      yield rows.map((row) => JSON.stringify(row) + '\n').join('');
+    } else {
+      yield (first ? '' : ',') + rows.map((row) => JSON.stringify(row)).join(',');
+      first = false;
+    }
+  }
+  if (format !== 'ndjson') yield ']';
+}
+
+// Stream every row from `after` on. Each MAX_PAGE_SIZE keyset page is a `pageQuery` on the read
+// pool, fetched only when the client has taken the previous one, so neither the event loop nor
+// memory ever holds more than a page, and a client that goes away stops the export.
+function exportRows(reply, pageQuery, after, cursorOf, { format }) {
+  async function* pages() {
+    let cursor = after;
+    for (;;) {
+      const rows = await readQuery(pageQuery, cursor, MAX_PAGE_SIZE);
+      if (rows.length > 0) yield rows;
+      if (rows.length < MAX_PAGE_SIZE) return;
+      cursor = cursorOf(rows[rows.length - 1]);
+    }
+  }
+  return reply
+    .type(format === 'ndjson' ? 'application/x-ndjson' : 'application/json; charset=utf-8')
+    .send(Readable.from(serialize(pages(), format)));
+}
+
+// Answer a list request: one keyset page of `pageQuery` (a db/queries.js read query taking
+// (after, limit)), or with ?all=true the whole export.
+export async function sendList(reply, query, pageQuery, after, cursorOf) {
+  if (query.all) return exportRows(reply, pageQuery, after, cursorOf, query);
+  const limit = query.limit ?? MAX_PAGE_SIZE;
+  const rows = await readQuery(pageQuery, after, limit);
+  return sendPage(reply, rows, { ...query, limit }, cursorOf);
+}
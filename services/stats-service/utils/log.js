@@ -0,0 +1,3 @@
+// Per-match progress messages. They run for every row of a bulk upload, so they are off unless
+// STATS_DEBUG_LOG is set; errors still go through console.log/fastify.log as before.
+export const debugLog = process.env.STATS_DEBUG_LOG ? console.log.bind(console) : () => {};
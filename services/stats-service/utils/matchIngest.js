@@ -0,0 +1,179 @@
+import { db, prepared } from '../db/init.js';
+import { writeQueries } from '../db/queries.js';
+import { calculateEloChange, ELO_OUTCOME, checkIfRivals, getHeadToHead } from './calculations.js';
+import { histogram, startTimer } from '../../shared/metrics.js';
+
+// result column is stored from the submitting player's side
+const OPPOSITE_RESULT = { win: 'loss', loss: 'win', draw: 'draw' };
+
+const ingestDuration = histogram('stats_ingest_batch_duration_seconds', 'Time to append one batch of matches and their outbox rows, transaction included');
+const ingestedMatches = histogram('stats_ingest_batch_matches', 'Matches per ingested batch', [1, 2, 5, 10, 50, 100, 250, 500, 1000]);
+
+export const INGEST_BATCH_SIZE = Number(process.env.STATS_INGEST_BATCH_SIZE) || 500;
+
+export function validateMatch(match) {
+    if (match === null || typeof match !== 'object' || Array.isArray(match)) {
+        throw new Error('match must be a JSON object');
+    }
+    const {
+        opponent_username, played_at, duration, player_score, opponent_score,
+        opponent_id, player_id, player_name, opponent_name, result
+    } = match;
+
+    const missing =
+        opponent_username == null ||
+        played_at == null ||
+        duration == null ||
+        player_id == null ||
+        opponent_id == null ||
+        player_name == null ||
+        opponent_name == null ||
+        result == null ||
+        !['win', 'loss', 'draw'].includes(result) ||
+        typeof player_score !== 'number' ||
+        typeof opponent_score !== 'number';
+
+    if (missing) {
+        throw new Error('player/opponent names, ids, duration, played_at, result, and numeric scores are required');
+    }
+}
+
+// Current totals of a player, loaded once per batch and then updated in memory
+function loadPlayer(players, selectPlayer, player_id, username, name) {
+    let player = players.get(player_id);
+    if (!player) {
+        const row = selectPlayer.get(player_id);
+        player = {
+            elo: row ? row.elo_score : 1000,
+            played: row ? row.games_played : 0,
+            won: row ? row.games_won : 0,
+            lost: row ? row.games_lost : 0,
+            draw: row ? row.games_draw : 0,
+            streak: row ? (row.win_streak ?? 0) : 0,
+            longest: row ? (row.longest_win_streak ?? 0) : 0,
+        };
+        players.set(player_id, player);
+    }
+    player.username = username;
+    player.name = name;
+    return player;
+}
+
+function recordResult(player, result) {
+    player.played++;
+    if (result === 'win') {
+        player.won++;
+        player.streak++;
+        player.longest = Math.max(player.longest, player.streak);
+    } else {
+        if (result === 'loss') player.lost++;
+        else player.draw++;
+        player.streak = 0;
+    }
+}
+
+function refreshRival(updateRival, player_username, rival_username, rival_elo_score) {
+    if (!checkIfRivals(player_username, rival_username)) return;
+    const { games, wins, losses } = getHeadToHead(player_username, rival_username);
+    updateRival.run(games, wins, losses, rival_elo_score, player_username, rival_username);
+}
+
+/**
+ * Append a batch of matches in one transaction: each valid match gets its match_history row and
+ * a match_outbox row, and nothing else. Elo, counters, head-to-head, rivals and score_history are
+ * brought up to date afterwards by the outbox applier (utils/outbox.js), so the cost of a
+ * submission no longer grows with the database. Items that are invalid or fail to insert are
+ * rolled back on their own and reported as { index, error } with index offset by firstIndex.
+ * outboxId is the last outbox row written, for waitForOutbox; null when nothing was inserted.
+ */
+export function ingestMatches(matches, firstIndex = 0) {
+    const elapsed = startTimer();
+    const insertStmt = prepared(writeQueries.insertMatch);
+    const outboxStmt = prepared(writeQueries.insertOutbox);
+
+    const errors = [];
+    let inserted = 0;
+    let outboxId = null;
+
+    // Nested in the batch transaction this runs under a savepoint, so a match that fails half way
+    // leaves neither its match_history row nor its outbox row behind
+    const ingestOne = db.transaction((match, queuedAt) => {
+        const {
+            player_username, opponent_username, played_at, duration, player_score, opponent_score,
+            opponent_id, player_id, player_name, opponent_name, result, is_guest_opponent = 0
+        } = match;
+        const { lastInsertRowid } = insertStmt.run(player_username, opponent_username, played_at, duration, player_score, opponent_score, opponent_id, player_id, player_name, opponent_name, result, is_guest_opponent);
+        return outboxStmt.run(lastInsertRowid, queuedAt).lastInsertRowid;
+    });
+
+    db.transaction(() => {
+        const queuedAt = Date.now();
+        matches.forEach((match, i) => {
+            try {
+                validateMatch(match);
+                outboxId = ingestOne(match, queuedAt);
+            } catch (err) {
+                errors.push({ index: firstIndex + i, error: err.message });
+                return;
+            }
+            inserted++;
+        });
+    })();
+
+    ingestDuration.observe({}, elapsed());
+    ingestedMatches.observe({}, matches.length);
+    return { inserted, errors, outboxId: outboxId === null ? null : Number(outboxId) };
+}
+
+/**
+ * Apply the derived updates of match_history rows, in the order given. Must run inside the
+ * caller's transaction. Elo and counters are carried in memory through the rows and written
+ * once per affected player at the end; score_history still gets one point per match.
+ * Any failed write throws, so the caller's transaction rolls back as a whole.
+ */
+export function applyMatches(rows) {
+    const addScorePoint = prepared(writeQueries.addScorePoint);
+    const upsertPlayer = prepared(writeQueries.upsertPlayer);
+    const updateRival = prepared(writeQueries.updateRival);
+    const addHeadToHead = prepared(writeQueries.addHeadToHead);
+    const selectPlayer = prepared(writeQueries.selectPlayer);
+
+    const players = new Map();
+    const pairs = new Map();
+
+    for (const match of rows) {
+        const {
+            player_username, opponent_username, played_at, opponent_id, player_id,
+            player_name, opponent_name, result, is_guest_opponent = 0
+        } = match;
+        if (player_username !== opponent_username) {
+            const opposite = OPPOSITE_RESULT[result];
+            addHeadToHead.run(player_username, opponent_username, +(result === 'win'), +(result === 'loss'), +(result === 'draw'));
+            addHeadToHead.run(opponent_username, player_username, +(opposite === 'win'), +(opposite === 'loss'), +(opposite === 'draw'));
+        }
+        const player = loadPlayer(players, selectPlayer, player_id, player_username, player_name);
+
+        if (!is_guest_opponent) {
+            const opponent = loadPlayer(players, selectPlayer, opponent_id, opponent_username, opponent_name);
+            const change = calculateEloChange(player.elo, opponent.elo, ELO_OUTCOME[result]);
+            player.elo = change.player1;
+            opponent.elo = change.player2;
+            recordResult(opponent, OPPOSITE_RESULT[result]);
+            addScorePoint.run(opponent_username, opponent_id, opponent.elo, played_at);
+            pairs.set([player_username, opponent_username].sort().join('\u0000'), { player_username, opponent_username, player_id, opponent_id });
+        }
+
+        recordResult(player, result);
+        addScorePoint.run(player_username, player_id, player.elo, played_at);
+    }
+
+    for (const [player_id, p] of players) {
+        upsertPlayer.run(p.username, player_id, p.name, Math.round(p.elo), p.played, p.lost, p.won, p.longest, p.draw, p.streak);
+    }
+
+    // rival rows snapshot the rival's current Elo
+    for (const { player_username, opponent_username, player_id, opponent_id } of pairs.values()) {
+        refreshRival(updateRival, player_username, opponent_username, players.get(opponent_id).elo);
+        refreshRival(updateRival, opponent_username, player_username, players.get(player_id).elo);
+    }
+}
@@ -0,0 +1,225 @@
+import { randomUUID } from 'crypto';
+import { getEloScoreByUsername } from './calculations.js';
+import { collector, counter, histogram } from '../../shared/metrics.js';
+
+// Elo matchmaking queue. Queued players are kept in an array sorted by (elo_score, ticket), so a
+// newcomer's place and its nearest opponents are found with one binary search. Two players are
+// paired when their Elo difference is within the window of whichever has waited longer; the window
+// starts at STATS_MM_BASE_WINDOW and widens by STATS_MM_WINDOW_GROWTH per second of waiting, up to
+// STATS_MM_MAX_WINDOW. Players learn about their match by long-polling (pollMatchmaking).
+// In cluster mode this lives in the writer process only (see utils/writes.js).
+const BASE_WINDOW = Number(process.env.STATS_MM_BASE_WINDOW) || 50;
+const WINDOW_GROWTH = Number(process.env.STATS_MM_WINDOW_GROWTH) || 10;
+const MAX_WINDOW = Number(process.env.STATS_MM_MAX_WINDOW) || 400;
+// Longest a poll is held before answering with status: 'queued'
+export const MM_POLL_MS = Number(process.env.STATS_MM_POLL_MS) || 25000;
+// A queued player who has not polled for this long has gone away and is dropped from the queue
+const IDLE_MS = MM_POLL_MS + 10000;
+// How long a match is kept for players who have not picked it up yet
+const MATCH_TTL_MS = 60000;
+// Waiting players' windows grow, so pairs that did not fit on join are looked for again this often
+const SWEEP_MS = 1000;
+
+const matchesMade = counter('stats_matchmaking_matches_total', 'Players paired by the matchmaking queue');
+const dropped = counter('stats_matchmaking_dropped_total', 'Queued players dropped for not polling');
+const waitTime = histogram('stats_matchmaking_wait_seconds', 'Time from joining the queue to being matched',
+  [0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300]);
+
+// Sorted by elo_score, then ticket
+const queue = [];
+// username -> queue entry
+const queued = new Map();
+// username -> { match, expiresAt } until picked up and expired
+const matched = new Map();
+// match_id -> { match, expiresAt }, for game-service to look up who may join a room
+const matchesById = new Map();
+// username -> { resolve, timer } of the open poll
+const polls = new Map();
+let nextTicket = 0;
+let sweepTimer = null;
+
+collector('stats_matchmaking_queue_size', 'Players waiting in the matchmaking queue', 'gauge', () => queue.length);
+
+function compare(a, b) {
+  return a.elo_score - b.elo_score || a.ticket - b.ticket;
+}
+
+// Index of the first entry not before `entry`
+function lowerBound(entry) {
+  let lo = 0;
+  let hi = queue.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (compare(queue[mid], entry) < 0) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+function windowFor(entry, now) {
+  return Math.min(MAX_WINDOW, BASE_WINDOW + WINDOW_GROWTH * (now - entry.joinedAt) / 1000);
+}
+
+function acceptable(a, b, now) {
+  const longest = a.joinedAt <= b.joinedAt ? a : b;
+  return Math.abs(a.elo_score - b.elo_score) <= windowFor(longest, now);
+}
+
+function removeFromQueue(entry) {
+  const i = lowerBound(entry);
+  if (queue[i] === entry) queue.splice(i, 1);
+  queued.delete(entry.username);
+}
+
+function status(entry, now = Date.now()) {
+  return {
+    status: 'queued',
+    elo_score: entry.elo_score,
+    waited_ms: now - entry.joinedAt,
+    window: Math.round(windowFor(entry, now)),
+    queue_size: queue.length
+  };
+}
+
+function pair(a, b, now) {
+  removeFromQueue(a);
+  removeFromQueue(b);
+  const match = {
+    status: 'matched',
+    match_id: randomUUID(),
+    matched_at: new Date(now).toISOString(),
+    players: [a, b].map(({ player_id, username, elo_score }) => ({ player_id, username, elo_score }))
+  };
+  matchesById.set(match.match_id, { match, expiresAt: now + MATCH_TTL_MS });
+  for (const entry of [a, b]) {
+    matched.set(entry.username, { match, expiresAt: now + MATCH_TTL_MS });
+    waitTime.observe({}, (now - entry.joinedAt) / 1000);
+    const poll = polls.get(entry.username);
+    if (poll) {
+      polls.delete(entry.username);
+      clearTimeout(poll.timer);
+      poll.resolve(match);
+    }
+  }
+  matchesMade.inc({}, 2);
+  return match;
+}
+
+// The closer of the newcomer's two neighbours in Elo order, if it is acceptable. `entry` is not
+// queued yet, so its neighbours are either side of where it would go.
+function pairOnJoin(entry, now) {
+  const i = lowerBound(entry);
+  const candidates = [queue[i - 1], queue[i]].filter((c) => c && acceptable(entry, c, now));
+  if (candidates.length === 0) return null;
+  candidates.sort((x, y) => Math.abs(x.elo_score - entry.elo_score) - Math.abs(y.elo_score - entry.elo_score));
+  return pair(entry, candidates[0], now);
+}
+
+// Drops players who stopped polling, forgets stale matches and pairs neighbours whose windows
+// have grown enough. One pass in Elo order; adjacent players are the closest pairs there are.
+function sweep() {
+  const now = Date.now();
+  for (const entry of [...queue]) {
+    if (now - entry.lastSeen > IDLE_MS && !polls.has(entry.username)) {
+      removeFromQueue(entry);
+      dropped.inc();
+    }
+  }
+  for (const map of [matched, matchesById]) {
+    for (const [key, { expiresAt }] of map) {
+      if (expiresAt <= now) map.delete(key);
+    }
+  }
+  for (let i = 0; i + 1 < queue.length;) {
+    if (acceptable(queue[i], queue[i + 1], now)) {
+      pair(queue[i], queue[i + 1], now);
+    } else {
+      i++;
+    }
+  }
+  if (queue.length === 0 && matched.size === 0 && matchesById.size === 0) {
+    clearInterval(sweepTimer);
+    sweepTimer = null;
+  }
+}
+
+function ensureSweeping() {
+  if (sweepTimer) return;
+  sweepTimer = setInterval(sweep, SWEEP_MS);
+  sweepTimer.unref();
+}
+
+// Queue the player, or pair them straight away. Joining again while queued keeps the original
+// place and wait time; joining again after a match starts a new search.
+export function joinMatchmaking(player_id, username) {
+  const now = Date.now();
+  const existing = queued.get(username);
+  if (existing) {
+    existing.lastSeen = now;
+    return status(existing, now);
+  }
+  matched.delete(username);
+  const entry = {
+    ticket: ++nextTicket,
+    player_id,
+    username,
+    elo_score: getEloScoreByUsername(username),
+    joinedAt: now,
+    lastSeen: now
+  };
+  ensureSweeping();
+  const match = pairOnJoin(entry, now);
+  if (match) return match;
+  queue.splice(lowerBound(entry), 0, entry);
+  queued.set(username, entry);
+  return status(entry, now);
+}
+
+// Resolves with the player's match as soon as there is one, or with their queue status after
+// timeoutMs. Rejects with 404 when the player is neither queued nor recently matched.
+export function pollMatchmaking(username, timeoutMs = MM_POLL_MS) {
+  const done = matched.get(username);
+  if (done) return Promise.resolve(done.match);
+  const entry = queued.get(username);
+  if (!entry) {
+    const err = new Error('Not in the matchmaking queue');
+    err.statusCode = 404;
+    return Promise.reject(err);
+  }
+  entry.lastSeen = Date.now();
+  // Only the newest poll waits; an older one (a retried request) is answered now
+  const previous = polls.get(username);
+  if (previous) {
+    clearTimeout(previous.timer);
+    previous.resolve(status(entry));
+  }
+  return new Promise((resolve) => {
+    const poll = { resolve };
+    poll.timer = setTimeout(() => {
+      polls.delete(username);
+      entry.lastSeen = Date.now();
+      resolve(status(entry));
+    }, Math.min(timeoutMs, MM_POLL_MS));
+    polls.set(username, poll);
+  });
+}
+
+// A match made in the last MATCH_TTL_MS, or null
+export function getMatch(match_id) {
+  return matchesById.get(match_id)?.match ?? null;
+}
+
+// Leave the queue; returns whether the player was queued
+export function leaveMatchmaking(username) {
+  matched.delete(username);
+  const entry = queued.get(username);
+  if (!entry) return false;
+  removeFromQueue(entry);
+  const poll = polls.get(username);
+  if (poll) {
+    polls.delete(username);
+    clearTimeout(poll.timer);
+    poll.resolve({ status: 'left' });
+  }
+  return true;
+}
@@ -0,0 +1,143 @@
+import { db, prepared } from '../db/init.js';
+import { writeQueries } from '../db/queries.js';
+import { applyMatches } from './matchIngest.js';
+import { invalidateLeaderboard } from './leaderboard.js';
+import { purgePlayers } from './gatewayCache.js';
+import { collector, histogram, startTimer } from '../../shared/metrics.js';
+
+// Background applier for match_outbox. ingestMatches only appends matches; this drains the
+// outbox in id order, OUTBOX_BATCH_SIZE matches per transaction, so the per-player updates of a
+// burst of matches are coalesced into one write per player. Rows left over by a restart are
+// picked up by startOutboxApplier.
+const OUTBOX_BATCH_SIZE = Number(process.env.STATS_OUTBOX_BATCH_SIZE) || 500;
+// Longest a ?wait=true submission is held before answering with applied: false
+export const OUTBOX_WAIT_MS = Number(process.env.STATS_OUTBOX_WAIT_MS) || 5000;
+const RETRY_MS = 1000;
+
+const applyDuration = histogram('stats_outbox_apply_duration_seconds', 'Time to apply one outbox batch, transaction included');
+const applyLag = histogram('stats_outbox_lag_seconds', 'Time from a match being appended to its updates being applied',
+  [0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]);
+
+let log;
+let running = false;
+let scheduled = false;
+let retryTimer = null;
+// Highest outbox id whose match has been applied and purged from the gateway cache; ids grow,
+// and rows are applied in id order
+let appliedThrough = 0;
+// { id, resolve, timer } of submissions waiting for their own match
+const waiters = [];
+
+collector('stats_outbox_pending', 'Matches appended but not applied yet', 'gauge',
+  () => (running ? prepared(writeQueries.outboxPending).get().n : 0));
+collector('stats_outbox_waiters', 'Submissions waiting for their match to be applied', 'gauge', () => waiters.length);
+
+function applyBatch() {
+  const elapsed = startTimer();
+  const rows = [];
+  db.transaction(() => {
+    rows.push(...prepared(writeQueries.outboxBatch).all(OUTBOX_BATCH_SIZE));
+    if (rows.length === 0) return;
+    // Rows whose match has been deleted are dropped without applying anything
+    applyMatches(rows.filter((row) => row.id !== null));
+    prepared(writeQueries.deleteOutboxThrough).run(rows[rows.length - 1].outbox_id);
+  })();
+  if (rows.length === 0) return 0;
+
+  const through = rows[rows.length - 1].outbox_id;
+  const players = new Map();
+  for (const row of rows) {
+    if (row.id === null) continue;
+    players.set(row.player_username, { player_id: row.player_id, username: row.player_username });
+    players.set(row.opponent_username, { player_id: row.opponent_id, username: row.opponent_username });
+  }
+  invalidatePlayers(players.values()).then(() => {
+    appliedThrough = Math.max(appliedThrough, through);
+    releaseWaiters();
+  });
+  const now = Date.now();
+  for (const row of rows) applyLag.observe({}, (now - row.queued_at) / 1000);
+  applyDuration.observe({}, elapsed());
+  return rows.length;
+}
+
+// After a commit that changed these players' stats: rebuild the leaderboard on its next read and
+// purge their pages from the gateway. Resolves once the purges have been answered.
+export function invalidatePlayers(players) {
+  invalidateLeaderboard();
+  return purgePlayers(players);
+}
+
+function releaseWaiters() {
+  for (let i = waiters.length - 1; i >= 0; i--) {
+    const waiter = waiters[i];
+    if (waiter.id <= appliedThrough) {
+      clearTimeout(waiter.timer);
+      waiters.splice(i, 1);
+      waiter.resolve(true);
+    }
+  }
+}
+
+function drain() {
+  scheduled = false;
+  if (!running) return;
+  let applied;
+  try {
+    applied = applyBatch();
+  } catch (err) {
+    // The batch was rolled back and stays in the outbox; try again shortly
+    log.error(`❌ Applying match outbox failed: ${err.message}`);
+    retryTimer = setTimeout(() => {
+      retryTimer = null;
+      kickOutbox();
+    }, RETRY_MS);
+    return;
+  }
+  // A full batch may mean more rows; yield to pending requests before the next one
+  if (applied === OUTBOX_BATCH_SIZE) kickOutbox();
+}
+
+// Schedule a drain on the next turn of the event loop, after the current request has been answered
+export function kickOutbox() {
+  if (running && !scheduled && !retryTimer) {
+    scheduled = true;
+    setImmediate(drain);
+  }
+}
+
+// Resolves to true once outbox row `id` has been applied, or false after timeoutMs
+export function waitForOutbox(id, timeoutMs = OUTBOX_WAIT_MS) {
+  if (id === null || id <= appliedThrough) return Promise.resolve(true);
+  kickOutbox();
+  return new Promise((resolve) => {
+    const waiter = { id, resolve };
+    waiter.timer = setTimeout(() => {
+      waiters.splice(waiters.indexOf(waiter), 1);
+      resolve(false);
+    }, timeoutMs);
+    waiters.push(waiter);
+  });
+}
+
+// Call after initDB(). Applies whatever an earlier process left in the outbox.
+export function startOutboxApplier(fastify) {
+  log = fastify.log;
+  const { first, pending } = prepared('SELECT MIN(id) AS first, COUNT(*) AS pending FROM match_outbox').get();
+  const { seq } = prepared("SELECT seq FROM sqlite_sequence WHERE name = 'match_outbox'").get() ?? { seq: 0 };
+  appliedThrough = first === null ? seq : first - 1;
+  running = true;
+  if (pending > 0) {
+    log.info(`Applying ${pending} matches left in the outbox`);
+    kickOutbox();
+  }
+  fastify.addHook('onClose', async () => {
+    running = false;
+    clearTimeout(retryTimer);
+    // Anything not applied yet stays in the outbox for the next start
+    for (const waiter of waiters.splice(0)) {
+      clearTimeout(waiter.timer);
+      waiter.resolve(false);
+    }
+  });
+}
@@ -1,77 +1,171 @@
-// Päivitä kaikkien käyttäjien rank elo_score:n mukaan
-export function updateAllUserRanks() {
-  try {
-    // Hae kaikki käyttäjät järjestyksessä elo_score DESC
-    const rows = db.prepare('SELECT player_id FROM user_match_data ORDER BY elo_score DESC').all();
-    let rank = 1;
-    for (const row of rows) {
-      db.prepare('UPDATE user_match_data SET rank = ? WHERE player_id = ?').run(rank, row.player_id);
-      rank++;
-    }
-    console.log('✅ Kaikkien käyttäjien rankit päivitetty.');
-  } catch (err) {
-    console.error('Error updating user ranks:', err);
-  }
-}
-import { db } from '../db/init.js';
-export function updateScoreHistoryTable(player_id, elo_score, played_at, username)
-{
-  try
-  {
-    console.log("Inserting into score_history:", player_id, elo_score, played_at, username); 
-    const stmt = db.prepare(`
-        INSERT INTO score_history (player_username, player_id, elo_score, played_at)
-        VALUES (?, ?, ?, ?)
-      `);
-    stmt.run(username, player_id, elo_score, played_at);
-  }
-  catch(err)
-  {
-    console.log('Error updating score history table:', err);
+import { db, prepared, openReadOnlyDB, HEAD_TO_HEAD_BACKFILL } from '../db/init.js';
+import { calculateEloChange, ELO_OUTCOME } from './calculations.js';
+
+// The repair paths below recompute from all of match_history. Matches still in match_outbox would
+// then be counted twice once the applier gets to them, so they refuse to run until it has drained.
+function assertOutboxDrained() {
+  const { pending } = prepared('SELECT COUNT(*) AS pending FROM match_outbox').get();
+  if (pending > 0) {
+    throw new Error(`${pending} matches are still waiting in match_outbox; let stats-service apply them first`);
   }
 }
 
-export function updateRivalsDataTable(player_username, rival_username, games_played_against_rival, wins_against_rival, loss_against_rival, rival_elo_score) {
-  try {
-    const updateStmt = db.prepare(`
-      UPDATE rivals
-      SET games_played_against_rival = ?,
-          wins_against_rival = ?,
-          loss_against_rival = ?,
-          rival_elo_score = ?
-      WHERE player_username = ? AND rival_username = ?
+// Repair path: recompute every player's counters and streaks from match_history in one pass.
+// Elo scores are left as they are; players missing from user_match_data are created with the default score.
+export function rebuildUserMatchData() {
+  const players = new Map();
+  const track = (playerId, username, name, result) => {
+    let p = players.get(playerId);
+    if (!p) {
+      p = { username, name, played: 0, won: 0, lost: 0, draw: 0, streak: 0, longest: 0 };
+      players.set(playerId, p);
+    }
+    p.username = username;
+    p.name = name;
+    p.played++;
+    if (result === 'win') {
+      p.won++;
+      p.streak++;
+      p.longest = Math.max(p.longest, p.streak);
+    } else {
+      if (result === 'loss') p.lost++;
+      else p.draw++;
+      p.streak = 0;
+    }
+  };
+
+  const selectMatches = prepared(`
+      SELECT player_id, player_username, player_name, opponent_id, opponent_username, opponent_name, result, is_guest_opponent
+      FROM match_history
+      ORDER BY played_at ASC, id ASC
     `);
-    updateStmt.run(games_played_against_rival, wins_against_rival, loss_against_rival, rival_elo_score, player_username, rival_username);
-    console.log(`✅ Updated rivals for player: ${player_username}`);
-  }
-  catch (err) {
-    console.log('Error updating rivals table:', err);
-  }
+  const resetStmt = prepared(`
+      UPDATE user_match_data
+      SET games_played = 0, games_won = 0, games_lost = 0, games_draw = 0, win_streak = 0, longest_win_streak = 0
+    `);
+  const upsertStmt = prepared(`
+      INSERT INTO user_match_data (player_username, player_id, player_name, games_played, games_won, games_lost, games_draw, win_streak, longest_win_streak)
+      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+      ON CONFLICT(player_id) DO UPDATE SET
+      player_username = excluded.player_username,
+      player_name = excluded.player_name,
+      games_played = excluded.games_played,
+      games_won = excluded.games_won,
+      games_lost = excluded.games_lost,
+      games_draw = excluded.games_draw,
+      win_streak = excluded.win_streak,
+      longest_win_streak = excluded.longest_win_streak
+    `);
+  // Read and write in one IMMEDIATE transaction: a match applied between the aggregation and the
+  // reset would otherwise be wiped from the counters
+  let matches = 0;
+  db.transaction(() => {
+    assertOutboxDrained();
+    for (const row of selectMatches.iterate()) {
+      matches++;
+      track(row.player_id, row.player_username, row.player_name, row.result);
+      if (!row.is_guest_opponent) {
+        const opposite = row.result === 'win' ? 'loss' : row.result === 'loss' ? 'win' : 'draw';
+        track(row.opponent_id, row.opponent_username, row.opponent_name, opposite);
+      }
+    }
+    resetStmt.run();
+    for (const [playerId, p] of players) {
+      upsertStmt.run(p.username, playerId, p.name, p.played, p.won, p.lost, p.draw, p.streak, p.longest);
+    }
+  }).immediate();
+  return { matches, players: players.size };
 }
 
-export function updateUserMatchDataTable(playerId, newScore, playerName, gamesPlayed, gamesLost, gamesWon, longestWinStreak, gamesDraw, username, winstreak) {
-  try 
-  {
-    const insertStmt = db.prepare(`
-        INSERT INTO user_match_data (player_username, player_id, player_name, elo_score, games_played, games_lost, games_won, longest_win_streak, games_draw, win_streak)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(player_id) DO UPDATE SET
-        player_name = excluded.player_name,
-        elo_score = excluded.elo_score,
-        games_played = excluded.games_played,
-        games_lost = excluded.games_lost,
-        games_won = excluded.games_won,
-        games_draw = excluded.games_draw,
-        longest_win_streak = excluded.longest_win_streak,
-        player_username = excluded.player_username,
-        win_streak = excluded.win_streak
+// Repair path for head_to_head: throw the pair totals away and aggregate them again from match_history.
+export function rebuildHeadToHead() {
+  let pairs = 0;
+  db.transaction(() => {
+    assertOutboxDrained();
+    prepared('DELETE FROM head_to_head').run();
+    pairs = prepared(HEAD_TO_HEAD_BACKFILL).run().changes;
+  }).immediate();
+  return { pairs };
+}
+
+// Recompute every rating from scratch, e.g. after a match has been deleted or corrected.
+// match_history is streamed in played_at order from a read-only connection while ratings are
+// held in memory. score_history, user_match_data.elo_score and rivals.rival_elo_score are
+// replaced inside one IMMEDIATE transaction, so readers see either all old or all new ratings
+// and no match can be ingested half way through. With dryRun nothing is written. A running
+// service's caches are not touched; scripts/replayElo.js asks it to invalidate them.
+export function replayEloRatings({ dryRun = false } = {}) {
+  const ratings = new Map();
+  let matches = 0;
+  let scorePoints = 0;
+
+  const rating = (player_id, username, name) => {
+    let r = ratings.get(player_id);
+    if (!r) {
+      r = { elo: 1000 };
+      ratings.set(player_id, r);
+    }
+    r.username = username;
+    r.name = name;
+    return r;
+  };
+
+  const insertPoint = prepared(`
+      INSERT INTO score_history (player_username, player_id, elo_score, played_at)
+      VALUES (?, ?, ?, ?)
+    `);
+  const addPoint = (player_id, r, played_at) => {
+    scorePoints++;
+    if (!dryRun) insertPoint.run(r.username, player_id, r.elo, played_at);
+  };
+
+  const readDb = openReadOnlyDB();
+  const replay = () => {
+    assertOutboxDrained();
+    if (!dryRun) prepared('DELETE FROM score_history').run();
+
+    const rows = readDb.prepare(`
+        SELECT player_id, player_username, player_name, opponent_id, opponent_username, opponent_name, result, is_guest_opponent, played_at
+        FROM match_history
+        ORDER BY played_at ASC, id ASC
+      `).iterate();
+    // Same order of updates as applyMatches: opponent's point first, then the player's
+    for (const row of rows) {
+      matches++;
+      const player = rating(row.player_id, row.player_username, row.player_name);
+      if (!row.is_guest_opponent) {
+        const opponent = rating(row.opponent_id, row.opponent_username, row.opponent_name);
+        const change = calculateEloChange(player.elo, opponent.elo, ELO_OUTCOME[row.result]);
+        player.elo = change.player1;
+        opponent.elo = change.player2;
+        addPoint(row.opponent_id, opponent, row.played_at);
+      }
+      addPoint(row.player_id, player, row.played_at);
+    }
+    if (dryRun) return;
+
+    prepared('UPDATE user_match_data SET elo_score = 1000').run();
+    const upsertElo = prepared(`
+        INSERT INTO user_match_data (player_username, player_id, player_name, elo_score)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(player_id) DO UPDATE SET elo_score = excluded.elo_score
       `);
-      insertStmt.run(username, playerId, playerName, Math.round(newScore), gamesPlayed, gamesLost, gamesWon, longestWinStreak, gamesDraw, winstreak);
-      // Päivitä kaikkien käyttäjien rankit aina kun joku muuttuu
-      updateAllUserRanks();
-      console.log(`\u2705 Updated or created player: ${playerId} (${playerName})`);
-  } 
-  catch(err) {
-    console.log('Error updating user match data table:', err);
+    const eloByUsername = new Map();
+    for (const [player_id, r] of ratings) {
+      upsertElo.run(r.username, player_id, r.name, r.elo);
+      eloByUsername.set(r.username, r.elo);
+    }
+
+    const setRivalElo = prepared('UPDATE rivals SET rival_elo_score = ? WHERE id = ?');
+    for (const rival of prepared('SELECT id, rival_username FROM rivals').all()) {
+      setRivalElo.run(eloByUsername.get(rival.rival_username) ?? 1000, rival.id);
+    }
+  };
+
+  try {
+    db.transaction(replay).immediate();
+  } finally {
+    readDb.close();
   }
-}
\ No newline at end of file
+  return { matches, players: ratings.size, scorePoints };
+}
@@ -0,0 +1,139 @@
+import cluster from 'cluster';
+import { db, prepared } from '../db/init.js';
+import { getHeadToHead, getEloScoreByUsername } from './calculations.js';
+import { ingestMatches } from './matchIngest.js';
+import { kickOutbox, waitForOutbox, invalidatePlayers } from './outbox.js';
+import { invalidateAvatar, getAvatarGeneration } from './avatarCache.js';
+import { getLeaderboardState } from './leaderboard.js';
+import { joinMatchmaking, pollMatchmaking, leaveMatchmaking, getMatch } from './matchmaking.js';
+import { CLUSTER_WORKERS, bootId, isHttpWorker, callWriter, sendTo, serveWriterCalls } from './cluster.js';
+import { collector } from '../../shared/metrics.js';
+
+// Every mutation the routes make, and the matchmaking queue, which all workers must share. In
+// cluster mode they run in the writer process and the routes reach them through `writer` over
+// IPC; arguments and results must survive JSON.
+const writeOps = {
+    // Append matches and start applying them; see utils/matchIngest.js
+    ingestMatches(matches, firstIndex) {
+        const res = ingestMatches(matches, firstIndex);
+        kickOutbox();
+        return res;
+    },
+
+    // Resolves to whether everything up to outboxId has been applied, within OUTBOX_WAIT_MS
+    waitForOutbox(outboxId) {
+        return waitForOutbox(outboxId);
+    },
+
+    // Adds the pair in both directions with the current head-to-head totals. The reverse row may
+    // already exist (the rival added this player first); only a duplicate of the player's own row is a 409.
+    addRival(player_id, player_username, rival_id, rival_username) {
+        const insert = (ignore) => prepared(`
+            INSERT ${ignore ? 'OR IGNORE ' : ''}INTO rivals (player_id, rival_id, player_username, rival_username, games_played_against_rival, wins_against_rival, loss_against_rival, rival_elo_score)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        `);
+        return db.transaction(() => {
+            // head_to_head holds both directions of the pair, so each side is one primary-key lookup
+            const forward = getHeadToHead(player_username, rival_username);
+            const reverse = getHeadToHead(rival_username, player_username);
+            let result;
+            try {
+                result = insert(false).run(player_id, rival_id, player_username, rival_username,
+                    forward.games, forward.wins, forward.losses, getEloScoreByUsername(rival_username));
+            } catch (err) {
+                if (err.code === 'SQLITE_CONSTRAINT_UNIQUE') err.statusCode = 409;
+                throw err;
+            }
+            insert(true).run(rival_id, player_id, rival_username, player_username,
+                reverse.games, reverse.wins, reverse.losses, getEloScoreByUsername(player_username));
+            return Number(result.lastInsertRowid);
+        })();
+    },
+
+    // Both return the number of rows removed (0 or 1)
+    removeRival(player_id, rival_id) {
+        return prepared('DELETE FROM rivals WHERE player_id = ? AND rival_id = ?').run(player_id, rival_id).changes;
+    },
+
+    removeRivalByUsername(player_id, rival_username) {
+        return prepared('DELETE FROM rivals WHERE player_id = ? AND rival_username = ?').run(player_id, rival_username).changes;
+    },
+
+    invalidateAvatar(username) {
+        invalidateAvatar(username);
+    },
+
+    // Every rating was rewritten by another process (scripts/replayElo.js); returns the number
+    // of players purged. Past GATEWAY_MAX_PURGES keys the gateway's entries just expire.
+    async invalidateRatings() {
+        const players = prepared('SELECT player_id, player_username AS username FROM user_match_data').all();
+        await invalidatePlayers(players);
+        return players.length;
+    },
+
+    // See utils/matchmaking.js; pollMatchmaking resolves only once matched or timed out
+    joinMatchmaking(player_id, username) {
+        return joinMatchmaking(player_id, username);
+    },
+
+    pollMatchmaking(username, timeoutMs) {
+        return pollMatchmaking(username, timeoutMs);
+    },
+
+    leaveMatchmaking(username) {
+        return leaveMatchmaking(username);
+    },
+
+    getMatch(match_id) {
+        return getMatch(match_id);
+    }
+};
+
+// What the routes call: writeOps in this process, or in the writer when running as a cluster
+// worker. Always returns a promise.
+export const writer = Object.fromEntries(Object.keys(writeOps).map((op) => [
+    op,
+    isHttpWorker ? (...args) => callWriter(op, ...args) : async (...args) => writeOps[op](...args)
+]));
+
+const RESPAWN_DELAY_MS = 1000;
+
+// Cluster mode, in the primary after initDB() and startOutboxApplier(): serve writes and start
+// the HTTP workers, replacing any that die.
+export function startWriter(fastify) {
+    const log = fastify.log;
+    let stopping = false;
+
+    // The writer runs long synchronous transactions; with round-robin scheduling it would also
+    // have to accept every connection, so leave that to the workers
+    cluster.schedulingPolicy = cluster.SCHED_NONE;
+    serveWriterCalls(writeOps);
+
+    const fork = () => {
+        const worker = cluster.fork({ STATS_BOOT_ID: bootId });
+        // A worker started after some writes must not serve the boot-time leaderboard version
+        worker.once('online', () => {
+            sendTo(worker, 'leaderboard', getLeaderboardState());
+            const { generation, changedAt } = getAvatarGeneration();
+            sendTo(worker, 'avatar', { username: null, generation, changedAt });
+        });
+    };
+
+    cluster.on('exit', (worker, code, signal) => {
+        if (stopping) return;
+        log.error(`HTTP worker ${worker.process.pid} exited (${signal ?? code}), starting a new one`);
+        setTimeout(() => {
+            if (!stopping) fork();
+        }, RESPAWN_DELAY_MS);
+    });
+    collector('stats_cluster_workers', 'HTTP worker processes running', 'gauge', () => Object.keys(cluster.workers).length);
+
+    for (let i = 0; i < CLUSTER_WORKERS; i++) fork();
+    log.info(`Stats writer started ${CLUSTER_WORKERS} HTTP workers`);
+
+    // Let the workers finish their requests (and the writes those wait for) before the writer goes
+    fastify.addHook('onClose', async () => {
+        stopping = true;
+        await new Promise((resolve) => cluster.disconnect(resolve));
+    });
+}
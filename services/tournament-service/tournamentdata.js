@@ -1,10 +1,37 @@
 import Fastify from 'fastify';
 import dotenv from 'dotenv';
 import Database from 'better-sqlite3';
+import fastifyJwt from '@fastify/jwt';
+import { counter, histogram, startTimer, registerMetrics } from '../shared/metrics.js';
+import { loadAccessPublicKey, accessKeyJwtOptions } from '../shared/accessKey.js';
+import { requireAuth, getAuthCacheStats } from '../shared/requireAuth.js';
 dotenv.config();
 
 const fastify = Fastify({ logger: true });
 
+// With auth-service's public key, requireAuth verifies access tokens locally
+const publicKey = await loadAccessPublicKey(fastify.log);
+if (publicKey) {
+  fastify.register(fastifyJwt, accessKeyJwtOptions(publicKey));
+} else {
+  fastify.log.warn('No access token public key, access tokens will be verified by auth-service');
+}
+
+const sqliteDuration = histogram('tournament_sqlite_query_duration_seconds', 'SQLite execution time by statement');
+const cacheLookups = counter('tournament_cache_requests_total', 'Bracket and summary reads served from memory (hit) or rebuilt (miss)');
+
+// Runs a prepared statement method and records how long SQLite took
+function timed(query, run) {
+  const elapsed = startTimer();
+  try {
+    return run();
+  } finally {
+    sqliteDuration.observe({ query }, elapsed());
+  }
+}
+
+registerMetrics(fastify);
+
 const dbPath = process.env.DATABASE_URL || './data/tournament.db';
 let db;
 
@@ -28,68 +55,173 @@ db.prepare(`
   )
 `).run();
 
+// Every read is by tournament, in bracket order
+db.prepare(`
+  CREATE INDEX IF NOT EXISTS idx_tournament_history_bracket
+  ON tournament_history (tournament_id, stage_number, match_number)
+`).run();
+
+const insertMatch = db.prepare(`
+  INSERT INTO tournament_history (tournament_id, stage_number, match_number, player_name, opponent_name, result)
+  VALUES (?, ?, ?, ?, ?, ?)
+`);
+const selectAll = db.prepare('SELECT * FROM tournament_history');
+const selectTournament = db.prepare(`
+  SELECT * FROM tournament_history
+  WHERE tournament_id = ?
+  ORDER BY stage_number ASC, match_number ASC, played_at ASC
+`);
+// One row per tournament for the list page. The winner comes from the final (stage 1, match 1).
+const selectSummaries = db.prepare(`
+  SELECT tournament_id, COUNT(*) AS matches, MAX(stage_number) AS stages, MAX(played_at) AS last_played_at,
+    (SELECT CASE f.result WHEN 'win' THEN f.player_name WHEN 'loss' THEN f.opponent_name END
+     FROM tournament_history f
+     WHERE f.tournament_id = t.tournament_id AND f.stage_number = 1 AND f.match_number = 1
+     ORDER BY f.played_at LIMIT 1) AS winner
+  FROM tournament_history t
+  GROUP BY tournament_id
+  ORDER BY last_played_at DESC, tournament_id
+`);
+
+// Brackets and the summary list are built and serialized once, then kept until a write touches
+// them. A finished tournament never changes, so in practice each bracket is built once.
+const BRACKET_CACHE_SIZE = Number(process.env.BRACKET_CACHE_SIZE) || 500;
+const brackets = new Map();
+let summaries = null;
+
+function winnerOf(match) {
+  if (match.result === 'win') return match.player_name;
+  if (match.result === 'loss') return match.opponent_name;
+  return null;
+}
+
+// rounds run from the first round (highest stage_number) to the final (stage 1)
+function buildBracket(tournament_id, rows) {
+  const stages = rows.reduce((max, row) => Math.max(max, row.stage_number), 1);
+  const rounds = [];
+  for (let stage = stages; stage >= 1; stage--) {
+    rounds.push({ stage_number: stage, matches: [] });
+  }
+  for (const row of rows) {
+    if (row.stage_number < 1) continue;
+    rounds[stages - row.stage_number].matches.push({
+      id: row.id,
+      match_number: row.match_number,
+      player_name: row.player_name,
+      opponent_name: row.opponent_name,
+      result: row.result,
+      winner: winnerOf(row),
+      played_at: row.played_at
+    });
+  }
+  const final = rounds[rounds.length - 1].matches.find((m) => m.match_number === 1);
+  return {
+    tournament_id,
+    total_players: 2 ** stages,
+    winner: final ? final.winner : null,
+    last_played_at: rows.reduce((last, row) => (row.played_at > last ? row.played_at : last), rows[0].played_at),
+    rounds
+  };
+}
+
+function getBracket(tournament_id) {
+  let bracket = brackets.get(tournament_id);
+  cacheLookups.inc({ cache: 'bracket', result: bracket ? 'hit' : 'miss' });
+  if (bracket) {
+    brackets.delete(tournament_id);
+  } else {
+    const rows = timed('selectTournament', () => selectTournament.all(tournament_id));
+    if (rows.length === 0) return null;
+    bracket = JSON.stringify(buildBracket(tournament_id, rows));
+  }
+  // Map insertion order doubles as the LRU order
+  brackets.set(tournament_id, bracket);
+  if (brackets.size > BRACKET_CACHE_SIZE) {
+    brackets.delete(brackets.keys().next().value);
+  }
+  return bracket;
+}
+
+function getSummaries() {
+  cacheLookups.inc({ cache: 'summary', result: summaries ? 'hit' : 'miss' });
+  if (!summaries) {
+    summaries = JSON.stringify(
+      timed('selectSummaries', () => selectSummaries.all()).map((row) => ({ ...row, total_players: 2 ** Math.max(row.stages, 1) }))
+    );
+  }
+  return summaries;
+}
+
+// The gateway micro-caches the public tournament reads under both /tournament_history and
+// /tournament/tournament_history; purge what a write changed (see stats-service/utils/gatewayCache.js).
+// Writes answer once the purges have been answered (a failed one only means the entry lives out
+// its 10 s), so the client's next read through the gateway already sees its write.
+const GATEWAY_PURGE_URL = process.env.GATEWAY_PURGE_URL;
+const gatewayPurges = counter('tournament_gateway_purges_total', 'Gateway cache purges by outcome');
+
+function purgeGatewayCache(tournamentIds) {
+  if (!GATEWAY_PURGE_URL) return Promise.resolve();
+  const paths = ['', '/', '/summary'];
+  for (const id of tournamentIds) {
+    paths.push(`/${encodeURIComponent(id)}`, `/${encodeURIComponent(id)}/bracket`);
+  }
+  const purges = [];
+  for (const prefix of ['/tournament_history', '/tournament/tournament_history']) {
+    for (const path of paths) {
+      purges.push(fetch(`${GATEWAY_PURGE_URL}${prefix}${path}`, { method: 'PURGE', signal: AbortSignal.timeout(1000) })
+        .then((res) => gatewayPurges.inc({ result: res.ok ? 'purged' : res.status === 404 ? 'not_cached' : 'failed' }))
+        .catch(() => gatewayPurges.inc({ result: 'failed' })));
+    }
+  }
+  return Promise.all(purges);
+}
+
+function invalidateTournaments(tournamentIds) {
+  for (const id of tournamentIds) brackets.delete(id);
+  summaries = null;
+  return purgeGatewayCache(tournamentIds);
+}
+
 fastify.get('/tournament_history', (request, reply) => {
   try {
-    const rows = db.prepare('SELECT * FROM tournament_history').all();
+    const rows = timed('selectAll', () => selectAll.all());
     reply.send(rows);
   } catch (err) {
     reply.status(500).send({ error: err.message });
   }
 });
 
+// Tournament list without the matches. Registered before /:tournament_id, so a tournament
+// literally called "summary" can only be read through its bracket.
+fastify.get('/tournament_history/summary', (request, reply) => {
+  try {
+    reply.type('application/json; charset=utf-8').send(getSummaries());
+  } catch (err) {
+    reply.status(500).send({ error: err.message });
+  }
+});
+
 fastify.get('/tournament_history/:tournament_id', (request, reply) => {
   const { tournament_id } = request.params;
   try {
-    const stmt = db.prepare(`
-      SELECT * FROM tournament_history
-      WHERE tournament_id = ?
-      ORDER BY stage_number ASC, match_number ASC, played_at ASC
-    `);
-    const rows = stmt.all(tournament_id);
+    const rows = timed('selectTournament', () => selectTournament.all(tournament_id));
     rows.length ? reply.send(rows) : reply.status(404).send({ error: 'Tournament not found' });
   } catch (err) {
     reply.status(500).send({ error: err.message });
   }
 });
 
-const requireAuth = async (request, reply) => {
-    try {
-        const authHeader = request.headers.authorization;
-        if (!authHeader || !authHeader.startsWith('Bearer ')) {
-          return reply.status(401).send({ error: 'Missing or invalid authorization header' });
-        }
-        console.log("Authenticating...")
-        const response = await fetch('http://auth-service:3001/auth/verify-token', {
-          method: 'POST',
-          headers: {
-            'Authorization': authHeader
-          }
-        });
-    
-        if (!response.ok) {
-          const errorData = await response.json().catch(() => ({ error: 'Authentication failed' }));
-          return reply.status(response.status).send(errorData);
-        }
-    
-        const userData = await response.json();
-        
-        request.id = userData.id;
-        request.email = userData.email;
-        request.username = userData.username;
-        console.log("loggin userData");
-        console.log(userData);
-        
-        console.log(`✅ Authenticated user: ${userData.username} (${userData.id})`);
-        
-      } catch (error) {
-        console.error('🚨 Auth service connection error:', error.message);
-        return reply.status(503).send({ 
-          error: 'Authentication service unavailable',
-          details: error.message 
-        });
-    }
-};
+fastify.get('/tournament_history/:tournament_id/bracket', (request, reply) => {
+  const { tournament_id } = request.params;
+  try {
+    const bracket = getBracket(tournament_id);
+    bracket ? reply.type('application/json; charset=utf-8').send(bracket) : reply.status(404).send({ error: 'Tournament not found' });
+  } catch (err) {
+    reply.status(500).send({ error: err.message });
+  }
+});
 
+fastify.get('/auth_cache', () => getAuthCacheStats());
 
 fastify.post('/tournament_history/update_all', {
   preHandler: requireAuth,
@@ -144,23 +276,20 @@ fastify.post('/tournament_history/update_all', {
       500: { type: 'object', properties: { error: { type: 'string' } } }
     }
   }
- }, (request, reply) => {
+ }, async (request, reply) => {
   const { matches } = request.body ?? {};
   if (!Array.isArray(matches) || matches.length === 0) {
     return reply.status(400).send({ error: 'matches (array) required' });
   }
 
   try {
-    const stmt = db.prepare(`
-      INSERT INTO tournament_history (tournament_id, stage_number, match_number, player_name, opponent_name, result)
-      VALUES (?, ?, ?, ?, ?, ?)
-    `);
     const results = [];
     const errors = [];
+    // One transaction for the whole batch: a single commit instead of one per match
     const insertMany = db.transaction((rows) => {
       rows.forEach((row, idx) => {
         try {
-          const res = stmt.run(
+          const res = insertMatch.run(
             row.tournament_id,
             row.stage_number,
             row.match_number,
@@ -174,7 +303,8 @@ fastify.post('/tournament_history/update_all', {
         }
       });
     });
-    insertMany(matches);
+    timed('insertMatchBatch', () => insertMany(matches));
+    if (results.length) await invalidateTournaments(new Set(matches.map((m) => m.tournament_id)));
     reply.send({ inserted: results.length, ids: results.map(r => r.id), errors });
   } catch (err) {
     reply.status(500).send({ error: err.message });
@@ -216,15 +346,12 @@ fastify.post('/tournament_history', {
       500: { type: 'object', properties: { error: { type: 'string' } } }
     }
   }
- }, (request, reply) => {
+ }, async (request, reply) => {
   const { tournament_id, stage_number, match_number, player_name, opponent_name, result } = request.body ?? {};
 
   try {
-    const stmt = db.prepare(`
-      INSERT INTO tournament_history (tournament_id, stage_number, match_number, player_name, opponent_name, result)
-      VALUES (?, ?, ?, ?, ?, ?)
-    `);
-    const resultDb = stmt.run(tournament_id, stage_number, match_number, player_name, opponent_name, result);
+    const resultDb = timed('insertMatch', () => insertMatch.run(tournament_id, stage_number, match_number, player_name, opponent_name, result));
+    await invalidateTournaments([tournament_id]);
 
     reply.send({
       id: resultDb.lastInsertRowid,
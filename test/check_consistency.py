@@ -0,0 +1,299 @@
+"""
+Offline drift checker for stats.db (and auth.db).
+
+    python test/check_consistency.py
+    python test/check_consistency.py --checks counters,streaks --examples 50 --json drift.json
+
+Recomputes the aggregates stats-service maintains on every ingest from match_history and
+compares them with what is stored:
+
+    counters       user_match_data games_played/won/lost/draw
+    streaks        user_match_data win_streak/longest_win_streak, in played_at order
+                   (the order rebuild:user-match-data uses; out-of-order ingests differ here)
+    elo            one score_history point per game, the newest one equal to elo_score
+    ranks          stored elo_score values usable for ranking, and the rank the API computes
+                   (correlated counts) equal to a sorted pass, for --rank-sample players
+    head_to_head   head_to_head totals for every pair
+    rivals         rivals games/wins/losses against the pair totals
+    auth           player ids and usernames known to auth.db with the same username
+
+All work is done by SQLite (GROUP BY, window functions, joins) on read-only connections, so
+the script's memory stays flat on multi-GB files and it is safe to run while the services
+are up; only the first --examples drifted rows of each check are kept. Exit status is 1
+when any check finds drift. Matches still waiting in match_outbox have not been applied to
+the aggregates yet and show up as drift; the script says so when the outbox is not empty.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_STATS_DB = os.path.join(REPO_ROOT, "services/stats-service/data/stats.db")
+DEFAULT_AUTH_DB = os.path.join(REPO_ROOT, "services/auth-service/data/auth.db")
+
+# Every game a player took part in, from that player's side. A guest opponent has no stats row.
+SIDES = """
+    SELECT player_id AS id, player_username AS username, played_at, id AS match_id, 1 AS side, result
+    FROM match_history
+    UNION ALL
+    SELECT opponent_id, opponent_username, played_at, id, 0,
+           CASE result WHEN 'win' THEN 'loss' WHEN 'loss' THEN 'win' ELSE 'draw' END
+    FROM match_history WHERE is_guest_opponent = 0
+"""
+
+# Both directions of every pair, like HEAD_TO_HEAD_BACKFILL in stats-service/db/init.js
+PAIRS = """
+    SELECT player_username, rival_username, COUNT(*) AS games,
+           SUM(won) AS wins, SUM(lost) AS losses, SUM(drawn) AS draws
+    FROM (
+      SELECT player_username, opponent_username AS rival_username,
+             result = 'win' AS won, result = 'loss' AS lost, result = 'draw' AS drawn
+      FROM match_history WHERE player_username <> opponent_username
+      UNION ALL
+      SELECT opponent_username, player_username, result = 'loss', result = 'win', result = 'draw'
+      FROM match_history WHERE player_username <> opponent_username
+    )
+    GROUP BY player_username, rival_username
+"""
+
+CHECKS = {}
+
+
+def check(name):
+    def register(fn):
+        CHECKS[name] = fn
+        return fn
+    return register
+
+
+@check("counters")
+def check_counters(conn, args):
+    yield from conn.execute(f"""
+        WITH expected AS MATERIALIZED (
+          SELECT id, COUNT(*) AS played, SUM(result = 'win') AS won,
+                 SUM(result = 'loss') AS lost, SUM(result = 'draw') AS draw
+          FROM ({SIDES}) GROUP BY id
+        )
+        SELECT u.player_id, 'stored', u.games_played, u.games_won, u.games_lost, u.games_draw,
+               'expected', IFNULL(e.played, 0), IFNULL(e.won, 0), IFNULL(e.lost, 0), IFNULL(e.draw, 0)
+        FROM user_match_data u LEFT JOIN expected e ON e.id = u.player_id
+        WHERE (u.games_played, u.games_won, u.games_lost, u.games_draw)
+              IS NOT (IFNULL(e.played, 0), IFNULL(e.won, 0), IFNULL(e.lost, 0), IFNULL(e.draw, 0))
+        UNION ALL
+        SELECT e.id, 'missing from user_match_data', NULL, NULL, NULL, NULL, 'expected', e.played, e.won, e.lost, e.draw
+        FROM expected e
+        WHERE NOT EXISTS (SELECT 1 FROM user_match_data u WHERE u.player_id = e.id)
+    """)
+
+
+@check("streaks")
+def check_streaks(conn, args):
+    # Consecutive wins share the same count of non-wins before them: each such group is a run
+    yield from conn.execute(f"""
+        WITH seq AS (
+          SELECT id, result = 'win' AS won,
+                 SUM(result <> 'win') OVER (PARTITION BY id ORDER BY played_at, match_id, side
+                                            ROWS UNBOUNDED PRECEDING) AS nonwins
+          FROM ({SIDES})
+        ),
+        runs AS (
+          SELECT id, nonwins, SUM(won) AS run, MAX(nonwins) OVER (PARTITION BY id) AS last
+          FROM seq GROUP BY id, nonwins
+        ),
+        expected AS (
+          SELECT id, MAX(CASE WHEN nonwins = last THEN run END) AS current, MAX(run) AS longest
+          FROM runs GROUP BY id
+        )
+        SELECT u.player_id, 'stored', u.win_streak, u.longest_win_streak, 'expected', e.current, e.longest
+        FROM user_match_data u JOIN expected e ON e.id = u.player_id
+        WHERE (IFNULL(u.win_streak, 0), IFNULL(u.longest_win_streak, 0)) IS NOT (e.current, e.longest)
+    """)
+
+
+@check("elo")
+def check_elo(conn, args):
+    yield from conn.execute("""
+        WITH points AS (
+          SELECT player_id, COUNT(*) AS points,
+                 (SELECT s2.elo_score FROM score_history s2 WHERE s2.player_id = s.player_id
+                  ORDER BY s2.played_at DESC, s2.id DESC LIMIT 1) AS last_elo
+          FROM score_history s GROUP BY player_id
+        )
+        SELECT u.player_id, 'elo_score', u.elo_score, 'games_played', u.games_played,
+               'score points', IFNULL(p.points, 0), 'newest point', p.last_elo
+        FROM user_match_data u LEFT JOIN points p ON p.player_id = u.player_id
+        WHERE IFNULL(p.points, 0) <> u.games_played
+           OR (p.last_elo IS NOT NULL AND p.last_elo IS NOT u.elo_score)
+    """)
+
+
+@check("ranks")
+def check_ranks(conn, args):
+    yield from conn.execute("""
+        SELECT player_id, 'unusable elo_score', elo_score, typeof(elo_score)
+        FROM user_match_data WHERE typeof(elo_score) <> 'integer'
+    """)
+    yield from conn.execute("""
+        SELECT player_username, 'username on several players', COUNT(*)
+        FROM user_match_data GROUP BY player_username HAVING COUNT(*) > 1
+    """)
+    # The API's rank is two range counts per player; compare it with one sorted pass
+    yield from conn.execute("""
+        WITH ranked AS (
+          SELECT player_id, elo_score, ROW_NUMBER() OVER (ORDER BY elo_score DESC, player_id) AS position
+          FROM user_match_data
+        ),
+        sample AS (SELECT * FROM ranked ORDER BY random() LIMIT ?)
+        SELECT player_id, 'position', position, 'rank',
+               (SELECT COUNT(*) FROM user_match_data WHERE elo_score > s.elo_score) +
+               (SELECT COUNT(*) FROM user_match_data WHERE elo_score = s.elo_score AND player_id < s.player_id) + 1 AS rank
+        FROM sample s
+        WHERE rank <> position
+    """, (args.rank_sample,))
+
+
+@check("head_to_head")
+def check_head_to_head(conn, args):
+    if not table_exists(conn, "head_to_head"):
+        yield ("head_to_head table missing, stats-service has not run migration 2",)
+        return
+    yield from conn.execute(f"""
+        WITH expected AS MATERIALIZED ({PAIRS})
+        SELECT e.player_username, e.rival_username, 'stored', h.games, h.wins, h.losses, h.draws,
+               'expected', e.games, e.wins, e.losses, e.draws
+        FROM expected e LEFT JOIN head_to_head h
+          ON h.player_username = e.player_username AND h.rival_username = e.rival_username
+        WHERE (h.games, h.wins, h.losses, h.draws) IS NOT (e.games, e.wins, e.losses, e.draws)
+        UNION ALL
+        SELECT h.player_username, h.rival_username, 'stored', h.games, h.wins, h.losses, h.draws,
+               'expected', 0, 0, 0, 0
+        FROM head_to_head h
+        WHERE NOT EXISTS (SELECT 1 FROM expected e
+                          WHERE e.player_username = h.player_username AND e.rival_username = h.rival_username)
+    """)
+
+
+@check("rivals")
+def check_rivals(conn, args):
+    # Only the pairs somebody follows are aggregated, through the participant indexes
+    yield from conn.execute("""
+        WITH expected AS (
+          SELECT r.id,
+                 (SELECT COUNT(*) FROM match_history WHERE player_username = r.player_username AND opponent_username = r.rival_username) +
+                 (SELECT COUNT(*) FROM match_history WHERE player_username = r.rival_username AND opponent_username = r.player_username) AS games,
+                 (SELECT COUNT(*) FROM match_history WHERE player_username = r.player_username AND opponent_username = r.rival_username AND result = 'win') +
+                 (SELECT COUNT(*) FROM match_history WHERE player_username = r.rival_username AND opponent_username = r.player_username AND result = 'loss') AS wins,
+                 (SELECT COUNT(*) FROM match_history WHERE player_username = r.player_username AND opponent_username = r.rival_username AND result = 'loss') +
+                 (SELECT COUNT(*) FROM match_history WHERE player_username = r.rival_username AND opponent_username = r.player_username AND result = 'win') AS losses
+          FROM rivals r
+          WHERE r.player_username <> r.rival_username
+        )
+        SELECT r.player_username, r.rival_username, 'stored', r.games_played_against_rival, r.wins_against_rival,
+               r.loss_against_rival, 'expected', e.games, e.wins, e.losses
+        FROM rivals r JOIN expected e ON e.id = r.id
+        WHERE (IFNULL(r.games_played_against_rival, 0), IFNULL(r.wins_against_rival, 0), IFNULL(r.loss_against_rival, 0))
+              IS NOT (e.games, e.wins, e.losses)
+    """)
+
+
+@check("auth")
+def check_auth(conn, args):
+    if not os.path.exists(args.auth_db):
+        yield (f"{args.auth_db} not found",)
+        return
+    conn.execute("ATTACH DATABASE ? AS auth", (f"file:{args.auth_db}?mode=ro",))
+    try:
+        yield from conn.execute("""
+            SELECT u.player_id, u.player_username, 'auth username', a.username
+            FROM user_match_data u LEFT JOIN auth.Users a ON a.id = u.player_id
+            WHERE a.username IS NOT u.player_username
+        """)
+        # Participants of non-guest games that never got a stats row are covered by counters;
+        # here only ids auth-service does not know
+        yield from conn.execute("""
+            SELECT id, username, 'played without an account'
+            FROM (SELECT player_id AS id, player_username AS username FROM match_history
+                  UNION
+                  SELECT opponent_id, opponent_username FROM match_history WHERE is_guest_opponent = 0) p
+            WHERE NOT EXISTS (SELECT 1 FROM auth.Users a WHERE a.id = p.id)
+        """)
+        yield from conn.execute("""
+            SELECT r.player_username, r.rival_username, 'rival_id', r.rival_id, 'auth id', a.id
+            FROM rivals r LEFT JOIN auth.Users a ON a.username = r.rival_username
+            WHERE a.id IS NULL OR (r.rival_id IS NOT NULL AND r.rival_id <> a.id)
+        """)
+    finally:
+        conn.execute("DETACH DATABASE auth")
+
+
+def table_exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def open_read_only(path):
+    if not os.path.exists(path):
+        sys.exit(f"❌ {path} not found")
+    # uri=True also lets ATTACH take a mode=ro URI
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.execute("PRAGMA query_only = 1")
+    # GROUP BY and window sorts spill to temp files instead of growing in memory
+    conn.execute("PRAGMA temp_store = FILE")
+    return conn
+
+
+def run_checks(conn, names, args):
+    report = {}
+    for name in names:
+        started = time.perf_counter()
+        drifted = 0
+        examples = []
+        for row in CHECKS[name](conn, args):
+            drifted += 1
+            if len(examples) < args.examples:
+                examples.append(list(row))
+        seconds = time.perf_counter() - started
+        report[name] = {"drifted": drifted, "seconds": round(seconds, 3), "examples": examples}
+        status = "✅ ok" if drifted == 0 else f"❌ {drifted} drifted"
+        print(f"{name:14} {status:20} {seconds:8.2f} s")
+        for example in examples:
+            print("    " + " ".join(str(v) for v in example))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stats-db", default=os.environ.get("STATS_DB", DEFAULT_STATS_DB))
+    parser.add_argument("--auth-db", default=DEFAULT_AUTH_DB)
+    parser.add_argument("--checks", default=",".join(CHECKS), help=f"comma separated (default {','.join(CHECKS)})")
+    parser.add_argument("--examples", type=int, default=10, help="drifted rows shown per check (default 10)")
+    parser.add_argument("--rank-sample", type=int, default=1000, help="players whose rank is recomputed (default 1000)")
+    parser.add_argument("--json", metavar="FILE", help="also write the report as JSON")
+    args = parser.parse_args()
+    names = [n.strip() for n in args.checks.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CHECKS]
+    if unknown:
+        parser.error(f"unknown checks {', '.join(unknown)}, choose from {', '.join(CHECKS)}")
+
+    conn = open_read_only(args.stats_db)
+    pending = conn.execute("SELECT COUNT(*) FROM match_outbox").fetchone()[0] if table_exists(conn, "match_outbox") else 0
+    if pending:
+        print(f"⚠️  {pending} matches are still in match_outbox; they count as drift until stats-service applies them\n")
+    started = time.perf_counter()
+    report = run_checks(conn, names, args)
+    report["outbox_pending"] = pending
+    conn.close()
+    total = sum(r["drifted"] for r in report.values() if isinstance(r, dict))
+    print(f"\n{'✅ No drift' if total == 0 else f'❌ {total} drifted rows'} in {time.perf_counter() - started:.2f} s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.json}")
+    sys.exit(1 if total else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,462 @@
+"""
+Synthetic population generator: default_data_import.py, scaled up.
+
+    python test/generate_dataset.py --users 2000 --matches 200000 --tournaments 100 --rivals 5 --seed 7 --mode db
+    python test/generate_dataset.py --users 200 --matches 20000 --mode api --workers 8
+
+Users get a hidden skill and an activity weight (a few players play most of the games, as in
+production). Opponents are picked near the player's skill and outcomes follow the skill gap.
+Rivals are each user's most frequent opponents. Tournaments are single-elimination brackets
+played out with the same skill model. The same --seed and arguments always give the same
+dataset.
+
+--mode api   registers the users through auth-service and uploads matches and tournaments
+             through the update_all endpoints, --workers requests at a time.
+--mode db    writes auth.db, stats.db and tournament.db directly, in one transaction per file,
+             with the same ratings, counters, score_history, head_to_head and rivals rows
+             ingestMatches would have produced. The services must have created their schema
+             (start them once). Stop them, or restart them afterwards: stats-service and
+             tournament-service cache the leaderboard, brackets and summaries in memory.
+
+Every generated user logs in with password Seed123!A and PIN 1234.
+"""
+import argparse
+import datetime
+import math
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+
+import default_data_import as seed_data
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_DBS = {
+    "auth": os.path.join(REPO_ROOT, "services/auth-service/data/auth.db"),
+    "stats": os.path.join(REPO_ROOT, "services/stats-service/data/stats.db"),
+    "tournament": os.path.join(REPO_ROOT, "services/tournament-service/data/tournament.db"),
+}
+
+PASSWORD = "Seed123!A"
+PIN_CODE = "1234"
+# bcrypt (cost 12, like auth-service) of PASSWORD and PIN_CODE, so --mode db needs no bcrypt module
+PASSWORD_HASH = "$2b$12$AeUP9XIKiKDRhRLuUSWRHe4PjdGhU49lx3MS/Skcz2kJOXzKwYgla"
+PIN_CODE_HASH = "$2b$12$Kjh4kpmXq2w/8J02TyNenOmk4caDN0QU3ZPPuztx6ACkUbZ7cxK2W"
+
+OPPOSITE_RESULT = {"win": "loss", "loss": "win", "draw": "draw"}
+ELO_OUTCOME = {"win": 1, "loss": 0, "draw": 0.5}
+
+
+# ---------------------------------------------------------------------------
+# Generation
+# ---------------------------------------------------------------------------
+
+def win_probability(skill, opponent_skill):
+    return 1 / (1 + 10 ** ((opponent_skill - skill) / 400))
+
+
+def iso(ts):
+    """played_at the way the frontend sends it (Date.toISOString)"""
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + f"{int(ts * 1000) % 1000:03d}Z"
+
+
+def generate(args):
+    rng = random.Random(args.seed)
+    end = datetime.datetime.fromisoformat(args.end.replace("Z", "+00:00")).timestamp()
+    start = end - args.days * 86400
+    width = max(6, len(str(args.users - 1)))
+
+    users = []
+    for i in range(args.users):
+        username = f"{args.prefix}{i:0{width}d}"
+        users.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "username": username,
+            "email": f"{username}@example.com",
+            "skill": rng.gauss(1000, args.skill_spread),
+            "activity": rng.paretovariate(args.activity_alpha),
+        })
+
+    # Opponents are found by position in skill order, within +-window places
+    by_skill = sorted(range(len(users)), key=lambda i: users[i]["skill"])
+    position = {u: p for p, u in enumerate(by_skill)}
+    window = max(1, len(users) // 20)
+    cum_weights = []
+    total = 0.0
+    for u in users:
+        total += u["activity"]
+        cum_weights.append(total)
+
+    matches = []
+    times = sorted(rng.uniform(start, end) for _ in range(args.matches))
+    players = rng.choices(range(len(users)), cum_weights=cum_weights, k=args.matches) if users else []
+    for played_at, p in zip(times, players):
+        while True:
+            o = by_skill[min(len(users) - 1, max(0, position[p] + rng.randint(-window, window)))]
+            if o != p:
+                break
+        if rng.random() < args.draw_rate:
+            result = "draw"
+            player_score = opponent_score = rng.randint(0, args.points_to_win - 1)
+        else:
+            won = rng.random() < win_probability(users[p]["skill"], users[o]["skill"])
+            result = "win" if won else "loss"
+            loser_score = rng.randint(0, args.points_to_win - 1)
+            player_score, opponent_score = (args.points_to_win, loser_score) if won else (loser_score, args.points_to_win)
+        seconds = rng.randint(60, 600)
+        matches.append({
+            "player": p, "opponent": o, "played_at": iso(played_at), "result": result,
+            "player_score": player_score, "opponent_score": opponent_score,
+            "duration": f"00:{seconds // 60:02d}:{seconds % 60:02d}",
+        })
+
+    # Rivals: each user's most frequent opponents
+    met = defaultdict(Counter)
+    for m in matches:
+        met[m["player"]][m["opponent"]] += 1
+        met[m["opponent"]][m["player"]] += 1
+    rivals = []
+    for u in range(len(users)):
+        ranked = sorted(met[u].items(), key=lambda item: (-item[1], users[item[0]]["username"]))
+        rivals.extend((u, r) for r, _ in ranked[:args.rivals])
+
+    tournaments = []
+    sizes = [int(s) for s in args.tournament_sizes.split(",")]
+    for t in range(args.tournaments):
+        size = min(rng.choice(sizes), 2 ** int(math.log2(max(len(users), 1))))
+        if size < 2:
+            break
+        tournament_id = f"{args.prefix}-cup-{t + 1}"
+        played_at = rng.uniform(start, end)
+        current = rng.sample(range(len(users)), size)
+        stages = int(math.log2(size))
+        for stage in range(stages, 0, -1):
+            winners = []
+            for n in range(len(current) // 2):
+                a, b = current[2 * n], current[2 * n + 1]
+                won = rng.random() < win_probability(users[a]["skill"], users[b]["skill"])
+                played_at += rng.randint(60, 600)
+                tournaments.append({
+                    "tournament_id": tournament_id, "stage_number": stage, "match_number": n + 1,
+                    "player_name": users[a]["username"], "opponent_name": users[b]["username"],
+                    "result": "win" if won else "loss",
+                    "played_at": datetime.datetime.fromtimestamp(played_at, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+                })
+                winners.append(a if won else b)
+            current = winners
+
+    return users, matches, rivals, tournaments
+
+
+def match_payload(users, m):
+    """One item of POST /stats/match_history/update_all"""
+    player, opponent = users[m["player"]], users[m["opponent"]]
+    return {
+        "player_username": player["username"],
+        "opponent_username": opponent["username"],
+        "played_at": m["played_at"],
+        "duration": m["duration"],
+        "player_score": m["player_score"],
+        "opponent_score": m["opponent_score"],
+        "opponent_id": opponent["id"],
+        "player_id": player["id"],
+        "player_name": player["username"],
+        "opponent_name": opponent["username"],
+        "result": m["result"],
+        "is_guest_opponent": 0,
+    }
+
+
+def batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# ---------------------------------------------------------------------------
+# --mode api
+# ---------------------------------------------------------------------------
+
+_local = threading.local()
+
+
+def session():
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = requests.Session()
+        s.verify = False
+    return s
+
+
+def login(identifier):
+    response = session().post(f"{seed_data.AUTH_URL}/auth/login",
+                              json={"identifier": identifier, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["accessToken"]
+
+
+def register(user):
+    """Registers the user (or finds the existing account) and stores the real id"""
+    response = session().post(f"{seed_data.AUTH_URL}/auth/register", json={
+        "email": user["email"], "username": user["username"], "password": PASSWORD, "pinCode": PIN_CODE})
+    if response.status_code == 201:
+        user["id"] = response.json()["userId"]
+        return
+    if response.status_code != 409:
+        raise RuntimeError(f"register {user['username']}: {response.status_code} {response.text}")
+    token = login(user["email"])
+    verified = session().post(f"{seed_data.AUTH_URL}/auth/verify-token", headers=seed_data.get_auth_headers(token))
+    verified.raise_for_status()
+    user["id"] = verified.json()["id"]
+
+
+def post_bulk(url, headers, items):
+    response = session().post(url, json={"matches": items}, headers=headers)
+    if response.status_code != 200:
+        raise RuntimeError(f"POST {url}: {response.status_code} {response.text}")
+    body = response.json()
+    return body["inserted"], body.get("errors", [])
+
+
+def add_rivals(users, u, rival_indexes):
+    headers = seed_data.get_auth_headers(login(users[u]["email"]))
+    for r in rival_indexes:
+        response = session().post(f"{seed_data.STATS_URL}/rivals/", headers=headers,
+                                  json={"rival_username": users[r]["username"], "rival_id": users[r]["id"]})
+        if response.status_code not in (200, 409):
+            raise RuntimeError(f"{users[u]['username']} -> {users[r]['username']}: {response.status_code} {response.text}")
+
+
+def write_api(args, users, matches, rivals, tournaments):
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(register, users))
+        print(f"✅ {len(users)} users registered")
+
+        headers = seed_data.get_auth_headers(login(users[0]["email"]))
+        url = f"{seed_data.STATS_URL}/match_history/update_all"
+        payloads = [match_payload(users, m) for m in matches]
+        inserted = errors = 0
+        for n, e in pool.map(lambda batch: post_bulk(url, headers, batch), batches(payloads, args.batch_size)):
+            inserted += n
+            errors += len(e)
+        print(f"✅ {inserted} matches inserted, {errors} rejected")
+        if args.workers > 1:
+            print("ℹ️  Batches arrive out of order with --workers > 1; run `npm run replay:elo` in "
+                  "services/stats-service for ratings in played_at order")
+
+        url = f"{seed_data.BASE_URL}/tournament_history/update_all"
+        rows = [{k: v for k, v in row.items() if k != "played_at"} for row in tournaments]
+        inserted = sum(n for n, _ in pool.map(lambda batch: post_bulk(url, headers, batch), batches(rows, args.batch_size)))
+        print(f"✅ {inserted} tournament matches inserted")
+
+        by_player = defaultdict(list)
+        for u, r in rivals:
+            by_player[u].append(r)
+        list(pool.map(lambda item: add_rivals(users, *item), by_player.items()))
+        print(f"✅ {len(rivals)} rivals added")
+
+
+# ---------------------------------------------------------------------------
+# --mode db
+# ---------------------------------------------------------------------------
+
+def js_round(x):
+    """Math.round"""
+    return math.floor(x + 0.5)
+
+
+def js_pow10(x):
+    """Math.pow(10, x), which overflows to Infinity instead of raising"""
+    try:
+        return 10 ** x
+    except OverflowError:
+        return math.inf
+
+
+def elo_change(rating1, rating2, outcome):
+    """Mirror of calculateEloChange in stats-service/utils/calculations.js, quirks included"""
+    p1 = 1 / (1 + js_pow10((rating1 - rating2) / 400))
+    p2 = 1 / (1 + js_pow10((rating2 - rating1) / 400))
+    return js_round(rating1 + 30 * (outcome - p1)), js_round(rating2 + 30 * ((1 - outcome) - p2))
+
+
+def open_db(path, required_tables):
+    if not os.path.exists(path):
+        sys.exit(f"❌ {path} not found, start the service once so it creates its schema")
+    conn = sqlite3.connect(path, isolation_level=None)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    missing = [t for t in required_tables if t not in tables]
+    if missing:
+        sys.exit(f"❌ {path} has no {', '.join(missing)} table, start the service once so it creates its schema")
+    return conn, tables
+
+
+def ensure_unused(conn, sql, values, what):
+    for chunk in batches(values, 500):
+        row = conn.execute(sql.format(",".join("?" * len(chunk))), chunk).fetchone()
+        if row:
+            sys.exit(f"❌ {what} {row[0]!r} already exists, pick another --prefix or --seed")
+
+
+def write_auth_db(conn, users):
+    # Sequelize's SQLite date format
+    now = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] + " +00:00"
+    conn.execute("BEGIN")
+    conn.executemany("""
+        INSERT INTO Users (id, email, username, passwordHash, pinCodeHash, is2FAConfirmed, role, isVerified, createdAt, updatedAt)
+        VALUES (?, ?, ?, ?, ?, 0, 'user', 0, ?, ?)
+    """, ((u["id"], u["email"], u["username"], PASSWORD_HASH, PIN_CODE_HASH, now, now) for u in users))
+    conn.execute("COMMIT")
+
+
+def write_stats_db(conn, tables, users, matches, rivals):
+
+    # Same bookkeeping as ingestMatches: opponent's score point first, then the player's
+    state = {}
+    score_points = []
+    pairs = defaultdict(lambda: [0, 0, 0, 0])  # games, wins, losses, draws
+
+    def player(u):
+        s = state.get(u)
+        if s is None:
+            s = state[u] = {"elo": 1000, "played": 0, "won": 0, "lost": 0, "draw": 0, "streak": 0, "longest": 0}
+        return s
+
+    def record(s, result):
+        s["played"] += 1
+        if result == "win":
+            s["won"] += 1
+            s["streak"] += 1
+            s["longest"] = max(s["longest"], s["streak"])
+        else:
+            s["lost" if result == "loss" else "draw"] += 1
+            s["streak"] = 0
+
+    for m in matches:
+        p, o, result = m["player"], m["opponent"], m["result"]
+        ps, os_ = player(p), player(o)
+        ps["elo"], os_["elo"] = elo_change(ps["elo"], os_["elo"], ELO_OUTCOME[result])
+        record(os_, OPPOSITE_RESULT[result])
+        score_points.append((users[o]["username"], users[o]["id"], os_["elo"], m["played_at"]))
+        record(ps, result)
+        score_points.append((users[p]["username"], users[p]["id"], ps["elo"], m["played_at"]))
+        for a, b, r in ((p, o, result), (o, p, OPPOSITE_RESULT[result])):
+            pair = pairs[(a, b)]
+            pair[0] += 1
+            pair[("win", "loss", "draw").index(r) + 1] += 1
+
+    conn.execute("BEGIN")
+    conn.executemany("""
+        INSERT INTO match_history (player_username, opponent_username, played_at, duration, player_score, opponent_score,
+                                   opponent_id, player_id, player_name, opponent_name, result, is_guest_opponent)
+        VALUES (:player_username, :opponent_username, :played_at, :duration, :player_score, :opponent_score,
+                :opponent_id, :player_id, :player_name, :opponent_name, :result, :is_guest_opponent)
+    """, (match_payload(users, m) for m in matches))
+    conn.executemany("INSERT INTO score_history (player_username, player_id, elo_score, played_at) VALUES (?, ?, ?, ?)",
+                     score_points)
+    conn.executemany("""
+        INSERT INTO user_match_data (player_username, player_id, player_name, elo_score, games_played, games_lost,
+                                     games_won, longest_win_streak, games_draw, win_streak)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, ((users[u]["username"], users[u]["id"], users[u]["username"], s["elo"], s["played"], s["lost"],
+           s["won"], s["longest"], s["draw"], s["streak"]) for u, s in state.items()))
+    if "head_to_head" in tables:
+        conn.executemany("""
+            INSERT INTO head_to_head (player_username, rival_username, games, wins, losses, draws)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, ((users[a]["username"], users[b]["username"], *totals) for (a, b), totals in pairs.items()))
+    conn.executemany("""
+        INSERT INTO rivals (player_username, rival_username, player_id, rival_id, rival_elo_score,
+                            games_played_against_rival, wins_against_rival, loss_against_rival)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, ((users[u]["username"], users[r]["username"], users[u]["id"], users[r]["id"],
+           state[r]["elo"], *pairs[(u, r)][:3]) for u, r in rivals))
+    conn.execute("COMMIT")
+    return len(score_points), len(pairs)
+
+
+def write_tournament_db(conn, tournaments):
+    conn.execute("BEGIN")
+    conn.executemany("""
+        INSERT INTO tournament_history (tournament_id, stage_number, match_number, player_name, opponent_name, result, played_at)
+        VALUES (:tournament_id, :stage_number, :match_number, :player_name, :opponent_name, :result, :played_at)
+    """, tournaments)
+    conn.execute("COMMIT")
+
+
+def write_db(args, users, matches, rivals, tournaments):
+    # Check all three files before writing to any of them
+    usernames = [u["username"] for u in users]
+    auth, _ = open_db(args.auth_db, ["Users"])
+    ensure_unused(auth, "SELECT username FROM Users WHERE username IN ({})", usernames, "User")
+    stats, stats_tables = open_db(args.stats_db, ["match_history", "score_history", "user_match_data", "rivals"])
+    ensure_unused(stats, "SELECT player_username FROM user_match_data WHERE player_username IN ({})", usernames, "Player")
+    tournament, _ = open_db(args.tournament_db, ["tournament_history"])
+    ensure_unused(tournament, "SELECT tournament_id FROM tournament_history WHERE tournament_id IN ({})",
+                  sorted({row["tournament_id"] for row in tournaments}), "Tournament")
+
+    write_auth_db(auth, users)
+    print(f"✅ {len(users)} users written to {args.auth_db}")
+    points, pairs = write_stats_db(stats, stats_tables, users, matches, rivals)
+    print(f"✅ {len(matches)} matches, {points} score points, {pairs} head-to-head rows and "
+          f"{len(rivals)} rivals written to {args.stats_db}")
+    write_tournament_db(tournament, tournaments)
+    print(f"✅ {len(tournaments)} tournament matches written to {args.tournament_db}")
+    for conn in (auth, stats, tournament):
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["api", "db"], required=True)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--matches", type=int, default=5000)
+    parser.add_argument("--rivals", type=int, default=3, help="rivals per user (default 3)")
+    parser.add_argument("--tournaments", type=int, default=10)
+    parser.add_argument("--tournament-sizes", default="4,8,16", help="bracket sizes to pick from (default 4,8,16)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--prefix", default="seed", help="username prefix; must start with a letter (default seed)")
+    parser.add_argument("--end", default="2025-09-01T00:00:00Z", help="time of the last match (default 2025-09-01T00:00:00Z)")
+    parser.add_argument("--days", type=float, default=180, help="matches are spread over this many days (default 180)")
+    parser.add_argument("--skill-spread", type=float, default=250, help="standard deviation of hidden skill (default 250)")
+    parser.add_argument("--activity-alpha", type=float, default=1.2,
+                        help="Pareto shape of per-user activity; smaller means a few players play most games (default 1.2)")
+    parser.add_argument("--draw-rate", type=float, default=0.03)
+    parser.add_argument("--points-to-win", type=int, default=11)
+    parser.add_argument("--workers", type=int, default=8, help="--mode api: requests in flight (default 8)")
+    parser.add_argument("--batch-size", type=int, default=500, help="--mode api: matches per update_all call (default 500)")
+    parser.add_argument("--auth-db", default=DEFAULT_DBS["auth"])
+    parser.add_argument("--stats-db", default=DEFAULT_DBS["stats"])
+    parser.add_argument("--tournament-db", default=DEFAULT_DBS["tournament"])
+    args = parser.parse_args()
+    if args.users < 2:
+        parser.error("--users must be at least 2")
+    # auth-service's username rule, checked on the longest generated name
+    if not re.fullmatch(r"[a-zA-Z][a-zA-Z0-9._-]{5,19}", f"{args.prefix}{args.users - 1:06d}"):
+        parser.error("--prefix must start with a letter and leave usernames of 6-20 characters")
+
+    started = time.perf_counter()
+    users, matches, rivals, tournaments = generate(args)
+    print(f"🎲 Generated {len(users)} users, {len(matches)} matches, {len(rivals)} rivals and "
+          f"{len(tournaments)} tournament matches in {time.perf_counter() - started:.1f} s (seed {args.seed})")
+
+    started = time.perf_counter()
+    if args.mode == "api":
+        write_api(args, users, matches, rivals, tournaments)
+    else:
+        write_db(args, users, matches, rivals, tournaments)
+    print(f"✅ Done in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+Load generator for the gateway, built on the integration tests' login helpers.
+
+    cd test && python load_test.py --duration 60 --concurrency 50 \
+        --mix match_post=4,bulk=1,tournament_bulk=1,leaderboard=10,rivals=3,history=6
+
+Each of --concurrency asyncio workers repeatedly picks a scenario by weight and runs it on a
+thread with its own keep-alive requests.Session, so connections are reused the way a browser
+would reuse them. Logging in happens once, up front. The report lists per-endpoint throughput,
+status codes and p50/p95/p99 latency with a bucketed histogram; --json also writes it to a file.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+
+import test_match_history_scores as stats_tests
+import test_tournament_history as tournament_tests
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+DEFAULT_MIX = "match_post=4,bulk=1,tournament_bulk=1,leaderboard=10,rivals=3,history=6"
+# Upper bounds (ms) of the histogram buckets; the last bucket is everything slower
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+_local = threading.local()
+
+
+def session():
+    """One keep-alive session per worker thread"""
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = requests.Session()
+        s.verify = False
+        # remembered ETags, so leaderboard polls revalidate like a browser does
+        s.etags = {}
+    return s
+
+
+class Users:
+    """The two integration-test users, logged in once and reused by every request"""
+
+    def __init__(self):
+        stats_tests.setup_test_users()
+        self.tokens = [stats_tests.ACCESS_TOKEN, stats_tests.ACCESS_TOKEN_USER2]
+        self.info = []
+        for token in self.tokens:
+            response = requests.post(f"{stats_tests.AUTH_URL}/auth/verify-token",
+                                     headers=stats_tests.get_auth_headers(token), verify=False)
+            response.raise_for_status()
+            self.info.append(response.json())
+
+    def pick(self):
+        """(headers, me, opponent) for a random orientation of the two users"""
+        i = random.randrange(2)
+        return stats_tests.get_auth_headers(self.tokens[i]), self.info[i], self.info[1 - i]
+
+
+# Request bodies
+
+def build_match_payload(opponent_username, opponent_id, result, player_score, opponent_score,
+                        player_name, opponent_name, duration="00:05:00"):
+    """Body for POST /match_history; the player is whoever the token belongs to"""
+    return {
+        "player_score": player_score,
+        "opponent_score": opponent_score,
+        "duration": duration,
+        "opponent_id": opponent_id,
+        "player_name": player_name,
+        "opponent_name": opponent_name,
+        "result": result,
+        "opponent_username": opponent_username,
+        "played_at": datetime.datetime.now(datetime.timezone.utc).isoformat()
+    }
+
+
+def build_bulk_match(player, opponent, result, played_at, duration="00:05:00", player_score=3, opponent_score=2):
+    """One row for POST /stats/match_history/update_all; player and opponent are plain names"""
+    return {
+        "player_username": player,
+        "opponent_username": opponent,
+        "played_at": played_at,
+        "duration": duration,
+        "player_score": player_score,
+        "opponent_score": opponent_score,
+        "opponent_id": f"uuid-{opponent.lower()}",
+        "player_id": f"uuid-{player.lower()}",
+        "player_name": player,
+        "opponent_name": opponent,
+        "result": result,
+        "is_guest_opponent": 0
+    }
+
+
+def build_tournament_match(tournament_id, stage_number, match_number, player_name, opponent_name, result):
+    """One row for POST /tournament_history or /tournament_history/update_all"""
+    return {
+        "tournament_id": tournament_id,
+        "stage_number": stage_number,
+        "match_number": match_number,
+        "player_name": player_name,
+        "opponent_name": opponent_name,
+        "result": result
+    }
+
+
+# Each scenario returns (endpoint name for the report, method, url, request kwargs)
+
+def match_post(users, args):
+    headers, me, opponent = users.pick()
+    data = build_match_payload(
+        opponent["username"], opponent["id"], random.choice(["win", "loss", "draw"]),
+        random.randint(0, 21), random.randint(0, 21),
+        player_name=me["username"], opponent_name=opponent["username"])
+    return "POST /match_history", "POST", f"{stats_tests.STATS_URL}/match_history", {"json": data, "headers": headers}
+
+
+def bulk(users, args):
+    headers, _, _ = users.pick()
+    players = [f"load_player_{i}" for i in range(args.bulk_players)]
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    matches = []
+    for _ in range(args.bulk_size):
+        player, opponent = random.sample(players, 2)
+        matches.append(build_bulk_match(player, opponent, random.choice(["win", "loss", "draw"]), now))
+    return ("POST /match_history/update_all", "POST", f"{stats_tests.STATS_URL}/match_history/update_all",
+            {"json": {"matches": matches}, "headers": headers})
+
+
+def tournament_bulk(users, args):
+    headers, _, _ = users.pick()
+    tournament_id = f"load-{random.getrandbits(32):08x}"
+    matches = [
+        build_tournament_match(tournament_id, 1, n + 1, f"Player{2 * n}", f"Player{2 * n + 1}",
+                               random.choice(["win", "loss", "draw"]))
+        for n in range(args.bulk_size)
+    ]
+    return ("POST /tournament_history/update_all", "POST", f"{tournament_tests.BASE_URL}/tournament_history/update_all",
+            {"json": {"matches": matches}, "headers": headers})
+
+
+def leaderboard(users, args):
+    _, me, _ = users.pick()
+    url = f"{stats_tests.STATS_URL}/leaderboard?limit=10&around={me['username']}"
+    return "GET /leaderboard", "GET", url, {"conditional": True}
+
+
+def rivals(users, args):
+    _, me, _ = users.pick()
+    return "GET /rivals/username", "GET", f"{stats_tests.STATS_URL}/rivals/username/{me['username']}", {}
+
+
+def history(users, args):
+    _, me, _ = users.pick()
+    if random.random() < 0.5:
+        return "GET /match_history/username", "GET", f"{stats_tests.STATS_URL}/match_history/username/{me['username']}", {}
+    return "GET /score_history/username", "GET", f"{stats_tests.STATS_URL}/score_history/username/{me['username']}", {}
+
+
+SCENARIOS = {
+    "match_post": match_post,
+    "bulk": bulk,
+    "tournament_bulk": tournament_bulk,
+    "leaderboard": leaderboard,
+    "rivals": rivals,
+    "history": history,
+}
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}, choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def send(method, url, kwargs):
+    """Runs on a worker thread. Returns (status, seconds); status is None on connection errors."""
+    s = session()
+    kwargs = dict(kwargs)
+    conditional = kwargs.pop("conditional", False)
+    if conditional and url in s.etags:
+        kwargs["headers"] = {**kwargs.get("headers", {}), "If-None-Match": s.etags[url]}
+    start = time.perf_counter()
+    try:
+        response = s.request(method, url, timeout=30, **kwargs)
+        response.content  # include the body transfer in the timing
+    except requests.RequestException:
+        return None, time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    if conditional and "ETag" in response.headers:
+        s.etags[url] = response.headers["ETag"]
+    return response.status_code, elapsed
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def record(self, endpoint, status, seconds):
+        self.latencies[endpoint].append(seconds * 1000)
+        self.statuses[endpoint][status if status is not None else "conn_error"] += 1
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[k]
+
+
+def histogram(values):
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for v in values:
+        for i, bound in enumerate(BUCKETS_MS):
+            if v <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+    return dict(zip(labels, counts))
+
+
+def summarize(results, elapsed):
+    report = {"duration_s": round(elapsed, 2), "endpoints": {}}
+    for endpoint in sorted(results.latencies):
+        values = sorted(results.latencies[endpoint])
+        statuses = results.statuses[endpoint]
+        failed = sum(n for status, n in statuses.items() if status == "conn_error" or status >= 400)
+        report["endpoints"][endpoint] = {
+            "requests": len(values),
+            "rps": round(len(values) / elapsed, 1),
+            "failed": failed,
+            "statuses": {str(k): v for k, v in statuses.items()},
+            "p50_ms": round(percentile(values, 50), 1),
+            "p95_ms": round(percentile(values, 95), 1),
+            "p99_ms": round(percentile(values, 99), 1),
+            "max_ms": round(values[-1], 1),
+            "histogram": histogram(values),
+        }
+    return report
+
+
+def print_report(report):
+    print(f"\n📊 {report['duration_s']} s")
+    header = f"{'endpoint':36} {'reqs':>7} {'rps':>8} {'fail':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, r in report["endpoints"].items():
+        print(f"{endpoint:36} {r['requests']:>7} {r['rps']:>8} {r['failed']:>6} "
+              f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['max_ms']:>8}")
+    for endpoint, r in report["endpoints"].items():
+        print(f"\n{endpoint}  statuses {r['statuses']}")
+        peak = max(r["histogram"].values()) or 1
+        for label, count in r["histogram"].items():
+            if count:
+                print(f"  {label:>9} {count:>7} {'#' * max(1, round(40 * count / peak))}")
+
+
+async def worker(users, args, mix, results, deadline, budget):
+    loop = asyncio.get_running_loop()
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < deadline:
+        if budget is not None:
+            if budget[0] <= 0:
+                return
+            budget[0] -= 1
+        scenario = SCENARIOS[random.choices(names, weights)[0]]
+        endpoint, method, url, kwargs = scenario(users, args)
+        status, seconds = await loop.run_in_executor(None, send, method, url, kwargs)
+        results.record(endpoint, status, seconds)
+
+
+async def run(args):
+    users = Users()
+    results = Results()
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=args.concurrency))
+    budget = [args.requests] if args.requests else None
+    start = time.monotonic()
+    deadline = start + args.duration
+    await asyncio.gather(*(worker(users, args, args.mix, results, deadline, budget) for _ in range(args.concurrency)))
+    return summarize(results, time.monotonic() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run (default 30)")
+    parser.add_argument("--requests", type=int, default=None, help="stop after this many requests instead")
+    parser.add_argument("--concurrency", type=int, default=20, help="requests in flight (default 20)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"scenario=weight,... (default {DEFAULT_MIX})")
+    parser.add_argument("--bulk-size", type=int, default=50, help="matches per bulk upload (default 50)")
+    parser.add_argument("--bulk-players", type=int, default=200, help="synthetic players used by bulk uploads")
+    parser.add_argument("--seed", type=int, default=None, help="random seed, for repeatable request mixes")
+    parser.add_argument("--json", metavar="FILE", help="also write the report as JSON")
+    args = parser.parse_args()
+    if args.requests:
+        args.duration = float("inf")
+    random.seed(args.seed)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 import requests
 import json
+import os
+import subprocess
 
 BASE_URL = "https://localhost:8443"
 STATS_URL = f"{BASE_URL}/stats"
 AUTH_URL = f"{BASE_URL}/as"
+# docker-compose.yml lives here; internal-only endpoints are read with docker compose exec
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
 
 # Test users for real authentication - unique emails per test run
 import time
@@ -567,3 +571,235 @@ def test_get_elo_score_by_username():
     assert data["elo_score"] == 1000
 
     print("✅ test_get_elo_score_by_username passed")
+
+def test_score_history_keyset_pages():
+    """Test GET /score_history?limit=&after= - follows X-Next-Cursor without repeating rows"""
+    first_page_response = requests.get(f"{STATS_URL}/score_history", params={"limit": 1}, verify=False)
+    assert first_page_response.status_code == 200
+    first_page = first_page_response.json()
+    assert len(first_page) <= 1
+
+    response = requests.get(f"{STATS_URL}/score_history", params={"after": "not-an-id"}, verify=False)
+    assert response.status_code == 400
+
+    cursor = first_page_response.headers.get("X-Next-Cursor")
+    if cursor is None:
+        return
+    response = requests.get(f"{STATS_URL}/score_history", params={"limit": 1, "after": cursor}, verify=False)
+    assert response.status_code == 200
+    for row in response.json():
+        assert row["id"] > first_page[0]["id"]
+
+    print("✅ test_score_history_keyset_pages passed")
+
+def test_match_history_ndjson_export():
+    """Test GET /match_history?format=ndjson&all=true - the whole table, one JSON object per line"""
+    response = requests.get(f"{STATS_URL}/match_history", params={"format": "ndjson", "all": "true"}, verify=False)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines() if line]
+    assert rows == requests.get(f"{STATS_URL}/match_history", params={"all": "true"}, verify=False).json()
+
+    print("✅ test_match_history_ndjson_export passed")
+
+def test_match_history_list_is_paged_by_default():
+    """Test GET /match_history without limit - one page of at most 1000 rows, not the whole table"""
+    response = requests.get(f"{STATS_URL}/match_history", verify=False)
+    assert response.status_code == 200
+    rows = response.json()
+    assert len(rows) <= 1000
+    if len(rows) == 1000:
+        assert response.headers["X-Next-Cursor"] == str(rows[-1]["id"])
+    else:
+        assert "X-Next-Cursor" not in response.headers
+
+    print("✅ test_match_history_list_is_paged_by_default passed")
+
+def test_batch_user_profiles():
+    """Test POST /users/profiles - existing and unknown usernames in one request"""
+    test_setup_users()
+    unknown = f"ei_ole_tallaista_kayttajaa{TIMESTAMP}"
+    response = requests.post(f"{AUTH_URL}/users/profiles", json={"usernames": ["testuser123", unknown]}, verify=False)
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [p["username"] for p in data["profiles"]] == ["testuser123"]
+    assert "avatarUrl" in data["profiles"][0]
+    assert data["missing"] == [unknown]
+
+    print("✅ test_batch_user_profiles passed")
+
+def test_leaderboard_conditional_get():
+    """Test GET /leaderboard - ranked top list, and 304 on an unchanged revalidation"""
+    response = requests.get(f"{STATS_URL}/leaderboard", params={"limit": 5, "around": "testuser123"}, verify=False)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["top"]) <= 5
+    assert [p["rank"] for p in data["top"]] == list(range(1, len(data["top"]) + 1))
+    scores = [p["elo_score"] for p in data["top"]]
+    assert scores == sorted(scores, reverse=True)
+    for player in data["around"]:
+        assert player["player_username"] == "testuser123"
+
+    etag = response.headers["ETag"]
+    response = requests.get(f"{STATS_URL}/leaderboard", params={"limit": 5, "around": "testuser123"},
+                            headers={"If-None-Match": etag}, verify=False)
+    assert response.status_code == 304
+
+    print("✅ test_leaderboard_conditional_get passed")
+
+def test_score_history_graph_shapes():
+    """Test GET /score_history/username/:player_username?bucket= and ?points= - graph-sized series"""
+    response = requests.get(f"{STATS_URL}/score_history/username/testuser123", verify=False)
+    assert response.status_code == 200
+    full = response.json()
+
+    response = requests.get(f"{STATS_URL}/score_history/username/testuser123", params={"points": 3}, verify=False)
+    assert response.status_code == 200
+    sampled = response.json()
+    assert len(sampled) == min(3, len(full))
+    if full:
+        # newest first like the full series, and the newest and oldest points are always kept
+        assert sampled[0]["id"] == max(p["id"] for p in full)
+        assert sampled[-1]["id"] == min(p["id"] for p in full)
+
+    response = requests.get(f"{STATS_URL}/score_history/username/testuser123", params={"bucket": "day"}, verify=False)
+    assert response.status_code == 200
+    buckets = response.json()
+    assert sum(b["points"] for b in buckets) == len(full)
+    for b in buckets:
+        assert b["min_elo_score"] <= b["elo_score"] <= b["max_elo_score"]
+    assert [b["bucket"] for b in buckets] == sorted((b["bucket"] for b in buckets), reverse=True)
+
+    response = requests.get(f"{STATS_URL}/score_history/username/testuser123",
+                            params={"bucket": "day", "points": 10}, verify=False)
+    assert response.status_code == 400
+
+    print("✅ test_score_history_graph_shapes passed")
+
+def scrape_internal(service, path, service_token=False):
+    """GET http://localhost:3001<path> inside the service's container, as a scraper on the internal network would.
+    With service_token, under the ingest token, as game-service calls the /internal/ routes"""
+    headers = "{ Authorization: 'Bearer ' + require('fs').readFileSync('/run/secrets/stats_ingest_token', 'utf8').trim() }" if service_token else "{}"
+    script = f"fetch('http://localhost:3001{path}', {{ headers: {headers} }}).then(async (r) => console.log(r.status + '\\n' + await r.text()))"
+    result = subprocess.run(["docker", "compose", "exec", "-T", service, "node", "-e", script],
+                            cwd=REPO_ROOT, capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    status, _, body = result.stdout.partition("\n")
+    return int(status), body
+
+def test_metrics_endpoint():
+    """Test GET /metrics - Prometheus text format with route latencies and read-pool timings, internal only"""
+    for path in ("/stats/metrics", "/stats/auth_cache", "/as/metrics", "/tournament/metrics", "/tournament/auth_cache",
+                 "/game/rooms/stats"):
+        response = requests.get(f"{BASE_URL}{path}", verify=False)
+        assert response.status_code == 404, path
+
+    requests.get(f"{STATS_URL}/leaderboard", verify=False)
+    status, body = scrape_internal("stats-service", "/metrics")
+    assert status == 200
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'route="/leaderboard"' in body
+    assert "stats_sqlite_query_duration_seconds_bucket" in body
+    assert "nodejs_eventloop_lag_seconds" in body
+
+    print("✅ test_metrics_endpoint passed")
+
+def test_post_match_history_wait():
+    """Test POST /match_history?wait=true - answers once Elo and counters include the match"""
+    setup_test_users()
+    headers = get_auth_headers(ACCESS_TOKEN)
+    me = requests.post(f"{AUTH_URL}/auth/verify-token", headers=headers, verify=False).json()
+    opponent = requests.post(f"{AUTH_URL}/auth/verify-token", headers=get_auth_headers(ACCESS_TOKEN_USER2), verify=False).json()
+
+    before = requests.get(f"{STATS_URL}/user_match_data/username/{me['username']}", verify=False).json()
+    played_before = before["games_played"] if before else 0
+
+    data = {
+        "player_score": 11,
+        "opponent_score": 7,
+        "duration": "00:05:00",
+        "opponent_id": opponent["id"],
+        "player_name": me["username"],
+        "opponent_name": opponent["username"],
+        "result": "win",
+        "opponent_username": opponent["username"],
+        "played_at": f"{DATETIME}"
+    }
+    response = requests.post(f"{STATS_URL}/match_history", params={"wait": "true"}, json=data, headers=headers, verify=False)
+    assert response.status_code == 200
+    assert response.json()["applied"] is True
+
+    after = requests.get(f"{STATS_URL}/user_match_data/username/{me['username']}", verify=False).json()
+    assert after["games_played"] == played_before + 1
+
+    print("✅ test_post_match_history_wait passed")
+
+def test_gateway_cache_purged_on_write():
+    """Test the gateway micro-cache - a repeat profile read is a HIT, and ?wait=true purges it"""
+    setup_test_users()
+    headers = get_auth_headers(ACCESS_TOKEN)
+    me = requests.post(f"{AUTH_URL}/auth/verify-token", headers=headers, verify=False).json()
+    opponent = requests.post(f"{AUTH_URL}/auth/verify-token", headers=get_auth_headers(ACCESS_TOKEN_USER2), verify=False).json()
+    url = f"{STATS_URL}/user_match_data/username/{me['username']}"
+
+    requests.get(url, verify=False)
+    cached = requests.get(url, verify=False)
+    assert cached.headers.get("X-Cache-Status") == "HIT"
+
+    data = {
+        "player_score": 5,
+        "opponent_score": 5,
+        "duration": "00:05:00",
+        "opponent_id": opponent["id"],
+        "player_name": me["username"],
+        "opponent_name": opponent["username"],
+        "result": "draw",
+        "opponent_username": opponent["username"],
+        "played_at": f"{DATETIME}"
+    }
+    response = requests.post(f"{STATS_URL}/match_history", params={"wait": "true"}, json=data, headers=headers, verify=False)
+    assert response.json()["applied"] is True
+
+    fresh = requests.get(url, verify=False)
+    assert fresh.headers.get("X-Cache-Status") != "HIT"
+    assert fresh.json()["games_played"] == cached.json()["games_played"] + 1
+
+    print("✅ test_gateway_cache_purged_on_write passed")
+
+def test_matchmaking_long_poll():
+    """Test /matchmaking/queue - two queued players are paired and the waiting one's poll returns the match"""
+    setup_test_users()
+    headers1 = get_auth_headers(ACCESS_TOKEN)
+    headers2 = get_auth_headers(ACCESS_TOKEN_USER2)
+    for headers in (headers1, headers2):
+        requests.delete(f"{STATS_URL}/matchmaking/queue", headers=headers, verify=False)
+
+    response = requests.get(f"{STATS_URL}/matchmaking/queue", params={"wait": 0}, headers=headers1, verify=False)
+    assert response.status_code == 404
+
+    response = requests.post(f"{STATS_URL}/matchmaking/queue", headers=headers1, verify=False)
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+
+    requests.post(f"{STATS_URL}/matchmaking/queue", headers=headers2, verify=False)
+    # Held open until the pair's Elo windows overlap, then both see the same match
+    match = requests.get(f"{STATS_URL}/matchmaking/queue", headers=headers1, verify=False).json()
+    assert match["status"] == "matched"
+    other = requests.get(f"{STATS_URL}/matchmaking/queue", headers=headers2, verify=False).json()
+    assert other["match_id"] == match["match_id"]
+    assert sorted(p["username"] for p in match["players"]) == sorted(["testuser123", "testuser2"])
+
+    # game-service looks the pairing up by id when the first player opens the room; the gateway
+    # does not route it, and without the ingest token it is refused
+    for path in (f"/internal/matches/{match['match_id']}", f"/matchmaking/matches/{match['match_id']}"):
+        response = requests.get(f"{STATS_URL}{path}", verify=False)
+        assert response.status_code == 404, path
+    status, _ = scrape_internal("stats-service", f"/internal/matches/{match['match_id']}")
+    assert status == 401
+    status, body = scrape_internal("stats-service", f"/internal/matches/{match['match_id']}", service_token=True)
+    assert status == 200
+    assert json.loads(body)["players"] == match["players"]
+    status, _ = scrape_internal("stats-service", "/internal/matches/not-a-match", service_token=True)
+    assert status == 404
+
+    print("✅ test_matchmaking_long_poll passed")
@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+
+import pytest
+
+# Reads the database written by the running stats-service (same path as check_stats_db.py)
+STATS_DB = os.environ.get("STATS_DB", "./services/stats-service/data/stats.db")
+
+STATS_SERVICE_DIR = os.path.join(os.path.dirname(__file__), "..", "services", "stats-service")
+
+# The SQL as stats-service runs it, read from db/queries.js so the plans checked here are never stale
+LOAD_QUERIES = """
+import { readQueries, lookupQueries } from './db/queries.js';
+const sql = Object.fromEntries(Object.entries(readQueries).map(([name, q]) => [name, q.sql]));
+console.log(JSON.stringify({ ...sql, ...lookupQueries }));
+"""
+
+
+def load_queries():
+    if shutil.which("node") is None:
+        return {}
+    result = subprocess.run(
+        ["node", "--input-type=module", "-e", LOAD_QUERIES],
+        cwd=STATS_SERVICE_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout)
+
+
+QUERIES = load_queries()
+PLAYER_HISTORY_QUERIES = ["matchHistoryByPlayerId", "matchHistoryByUsername", "matchHistoryForPlayer"]
+
+
+@pytest.fixture
+def conn():
+    if not os.path.exists(STATS_DB):
+        pytest.skip(f"{STATS_DB} not found, start stats-service first")
+    if not QUERIES:
+        pytest.skip("node not found, cannot read db/queries.js")
+    conn = sqlite3.connect(f"file:{STATS_DB}?mode=ro", uri=True)
+    yield conn
+    conn.close()
+
+
+def query_plan(conn, sql, params=None):
+    if params is None:
+        params = ("x",) * sql.count("?")
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def test_migrations_applied(conn):
+    assert conn.execute("PRAGMA user_version").fetchone()[0] >= 1
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    for name in (
+        "idx_match_history_player_id",
+        "idx_match_history_opponent_id",
+        "idx_match_history_player_username",
+        "idx_match_history_opponent_username",
+    ):
+        assert name in indexes
+
+
+@pytest.mark.parametrize("name", PLAYER_HISTORY_QUERIES)
+def test_match_history_lookups_use_indexes(conn, name):
+    sql = QUERIES[name]
+    plan = query_plan(conn, sql)
+    assert not any(step.startswith("SCAN match_history") for step in plan)
+    searches = [step for step in plan if step.startswith("SEARCH match_history")]
+    assert len(searches) == sql.count("SELECT")
+    assert all("USING INDEX idx_match_history_" in step for step in searches)
+
+
+def test_rank_lookup_uses_elo_index(conn):
+    plan = query_plan(conn, QUERIES["rank"], (1000, 1000, "id"))
+    assert all("idx_user_match_data_elo" in step for step in plan if "user_match_data" in step)
+
+
+def test_user_match_data_page_ranks_in_one_pass(conn):
+    plan = query_plan(conn, QUERIES["userMatchDataPage"], ("", 10))
+    assert not any("CORRELATED" in step for step in plan)
+    assert plan.count("SCAN user_match_data USING INDEX idx_user_match_data_elo") == 1
+
+
+def test_head_to_head_is_primary_key_lookup(conn):
+    assert conn.execute("PRAGMA user_version").fetchone()[0] >= 2
+    plan = query_plan(conn, QUERIES["headToHead"])
+    assert plan == ["SEARCH head_to_head USING PRIMARY KEY (player_username=? AND rival_username=?)"]
+
+
+def test_score_history_lookups_use_indexes(conn):
+    assert conn.execute("PRAGMA user_version").fetchone()[0] >= 3
+    for name, column in (("scoreHistoryByPlayerIdDownsampled", "player_id"), ("scoreHistoryByUsernameDownsampled", "player_username")):
+        plan = query_plan(conn, QUERIES[name])
+        assert plan[0] == f"SEARCH score_history USING INDEX idx_score_history_{column} ({column}=?)"
@@ -158,3 +158,60 @@ def test_match_history_update_all_bulk_insert():
     assert response.status_code == 200
     assert "inserted" in response.json()
     assert response.json()["inserted"] == 2
+
+def test_bracket_and_summary():
+    setup_test_user()
+    tournament_id = f"bracket-{TIMESTAMP}"
+    headers = get_auth_headers()
+    semis = [
+        {
+            "tournament_id": tournament_id,
+            "stage_number": 2,
+            "match_number": 1,
+            "player_name": "Alice",
+            "opponent_name": "Bob",
+            "result": "win"
+        },
+        {
+            "tournament_id": tournament_id,
+            "stage_number": 2,
+            "match_number": 2,
+            "player_name": "Charlie",
+            "opponent_name": "Dave",
+            "result": "loss"
+        }
+    ]
+    response = requests.post(f"{BASE_URL}/tournament_history/update_all", json={"matches": semis}, headers=headers, verify=VERIFY)
+    assert response.status_code == 200
+
+    response = requests.get(f"{BASE_URL}/tournament_history/{tournament_id}/bracket", verify=VERIFY)
+    assert response.status_code == 200
+    bracket = response.json()
+    assert bracket["total_players"] == 4
+    assert bracket["winner"] is None
+    assert [r["stage_number"] for r in bracket["rounds"]] == [2, 1]
+    assert [m["winner"] for m in bracket["rounds"][0]["matches"]] == ["Alice", "Dave"]
+
+    # the cached bracket and summary must pick up the final
+    final = {
+        "tournament_id": tournament_id,
+        "stage_number": 1,
+        "match_number": 1,
+        "player_name": "Alice",
+        "opponent_name": "Dave",
+        "result": "loss"
+    }
+    response = requests.post(f"{BASE_URL}/tournament_history", json=final, headers=headers, verify=VERIFY)
+    assert response.status_code == 200
+    bracket = requests.get(f"{BASE_URL}/tournament_history/{tournament_id}/bracket", verify=VERIFY).json()
+    assert bracket["winner"] == "Dave"
+    assert len(bracket["rounds"][1]["matches"]) == 1
+
+    summaries = requests.get(f"{BASE_URL}/tournament_history/summary", verify=VERIFY).json()
+    summary = next(s for s in summaries if s["tournament_id"] == tournament_id)
+    assert summary["matches"] == 3
+    assert summary["total_players"] == 4
+    assert summary["winner"] == "Dave"
+
+    response = requests.get(f"{BASE_URL}/tournament_history/ei-ole-{TIMESTAMP}/bracket", verify=VERIFY)
+    assert response.status_code == 404